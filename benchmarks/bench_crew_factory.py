@@ -0,0 +1,70 @@
+"""
+Microbenchmark: crew construction overhead per lecture/section.
+
+Compares building a crew the old way (`SomeCrew().crew()`, which re-parses the
+YAML config and re-creates every Agent) with `build_crew(SomeCrew)` from
+guide_creator_flow/utils/crew_factory.py. No LLM calls are made.
+
+    python benchmarks/bench_crew_factory.py --flow course -n 50
+    python benchmarks/bench_crew_factory.py --flow guide -n 50
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, "src")
+
+
+def _setup_path(flow: str):
+    # Both flows have a top-level `crews` package, so only one can be imported per process
+    package_dir = "udemy_course_creator" if flow == "course" else "guide_creator_flow"
+    for path in (os.path.join(SRC, package_dir), SRC, ROOT):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+    os.environ.setdefault("GEMINI_MODEL", "gemini/gemini-2.0-flash")
+
+
+def _crew_classes(flow: str):
+    if flow == "course":
+        from crews.content_crew.content_crew import ContentCrew
+        from crews.asset_generation_crew.asset_generation_crew import AssetGenerationCrew
+        return [ContentCrew, AssetGenerationCrew]
+    from crews.content_crew.content_crew import ContentCrew
+    return [ContentCrew]
+
+
+def _time_per_call(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1000
+
+
+def run(flow: str, iterations: int) -> dict:
+    _setup_path(flow)
+    from guide_creator_flow.utils.crew_factory import build_crew
+
+    results = {}
+    for crew_cls in _crew_classes(flow):
+        before = _time_per_call(lambda: crew_cls().crew(), iterations)
+        build_crew(crew_cls)  # first call builds the prototype
+        after = _time_per_call(lambda: build_crew(crew_cls), iterations)
+        results[crew_cls.__name__] = {
+            "before_ms_per_crew": round(before, 3),
+            "after_ms_per_crew": round(after, 3),
+            "speedup": round(before / after, 2) if after else None,
+        }
+    return {"benchmark": "crew_factory", "flow": flow, "iterations": iterations, "results": results}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--flow", choices=["course", "guide"], default="course")
+    parser.add_argument("-n", "--iterations", type=int, default=50)
+    args = parser.parse_args()
+    print(json.dumps(run(args.flow, args.iterations), indent=2))
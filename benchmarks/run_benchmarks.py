@@ -0,0 +1,291 @@
+"""
+Offline benchmark suite: microbenchmarks on the Flow_Output corpus plus end-to-end
+timings of both flows against the deterministic fake LLM (no API calls, no cost).
+
+    python benchmarks/run_benchmarks.py                       # everything
+    python benchmarks/run_benchmarks.py --only micro -n 20
+    python benchmarks/run_benchmarks.py --only flows --latency lognormal:0.4,0.5
+    python benchmarks/run_benchmarks.py --output bench.json   # track regressions
+    python benchmarks/run_benchmarks.py --only flow-course --cassette output/run.cassette.gz
+
+Each group runs in its own process: both flows have top-level `crews`/`utils`
+packages, and the flows write to ./output, so they run in a scratch directory.
+The fake LLM is configured through LLM_FAKE / FAKE_LLM_* (see
+guide_creator_flow/utils/fake_llm.py).
+"""
+import argparse
+import glob
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, "src")
+CORPUS = os.path.join(ROOT, "Flow_Output")
+GROUPS = ["micro", "flow-guide", "flow-course"]
+
+
+def _setup_path(package_dir: str):
+    for path in (os.path.join(SRC, package_dir), SRC, ROOT):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+
+
+def _timings(fn, iterations: int) -> dict:
+    fn()  # warm up imports and caches
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "iterations": iterations,
+        "mean_ms": round(statistics.mean(samples), 3),
+        "p50_ms": round(statistics.median(samples), 3),
+        "min_ms": round(min(samples), 3),
+        "max_ms": round(max(samples), 3),
+    }
+
+
+def _load_generate_ppt():
+    # generate_ppt.py is a script, not part of a package, so load it by path. It imports
+    # the guide's `utils`, while the micro group has the course's `utils` on sys.path.
+    import guide_creator_flow.utils
+    import guide_creator_flow.utils.markdown_ast
+    names = ("utils", "utils.markdown_ast")
+    saved = {name: sys.modules.get(name) for name in names}
+    sys.modules["utils"] = guide_creator_flow.utils
+    sys.modules["utils.markdown_ast"] = guide_creator_flow.utils.markdown_ast
+    try:
+        spec = importlib.util.spec_from_file_location(
+            "generate_ppt", os.path.join(SRC, "guide_creator_flow", "generate_ppt.py"))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        for name, previous in saved.items():
+            if previous is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = previous
+    return module
+
+
+def _guides() -> list:
+    paths = sorted(glob.glob(os.path.join(CORPUS, "*.md")))
+    return [(path, open(path, encoding="utf-8").read()) for path in paths]
+
+
+# --- Microbenchmarks ---
+
+def micro(iterations: int, scratch: str) -> dict:
+    _setup_path("udemy_course_creator")
+    guides = _guides()
+    corpus_bytes = sum(len(text.encode("utf-8")) for _, text in guides)
+    results = {}
+
+    def bench(name, setup):
+        try:
+            fn = setup()
+        except ImportError as e:
+            results[name] = {"skipped": f"missing dependency: {e.name or e}"}
+            return
+        results[name] = _timings(fn, iterations)
+
+    def parse_curriculum():
+        from utils.parser import parse_curriculum_markdown
+        with open(os.path.join(CORPUS, "curriculum", "course_curriculum_raw.md"), encoding="utf-8") as f:
+            text = f.read()
+        return lambda: parse_curriculum_markdown(text)
+
+    def convert_pptx():
+        from utils.pptx_converter import convert_md_to_pptx
+        out = os.path.join(scratch, "convert.pptx")
+        return lambda: [convert_md_to_pptx(text, out) for _, text in guides]
+
+    def ppt_agents():
+        module = _load_generate_ppt()
+        reader, planner, writer = module.ReaderAgent(), module.SlidePlanner(), module.SlideWriter()
+        out = os.path.join(scratch, "agents.pptx")
+
+        def run():
+            for path, _ in guides:
+                writer.run(planner.run(reader.run(path)), out)
+        return run
+
+    def reader_only():
+        module = _load_generate_ppt()
+        reader, planner = module.ReaderAgent(), module.SlidePlanner()
+        return lambda: [planner.run(reader.run(path)) for path, _ in guides]
+
+    # One parse shared by every exporter, against the old markdown -> HTML -> BeautifulSoup path
+    def parse_ast():
+        from guide_creator_flow.utils.markdown_ast import parse_markdown
+        return lambda: [parse_markdown(text) for _, text in guides]
+
+    def parse_bs4():
+        import markdown
+        from bs4 import BeautifulSoup
+        return lambda: [BeautifulSoup(markdown.markdown(text), "html.parser") for _, text in guides]
+
+    def html_ast():
+        from guide_creator_flow.utils.markdown_ast import parse_markdown
+        return lambda: [parse_markdown(text).to_html() for _, text in guides]
+
+    def html_markdown_lib():
+        import markdown
+        return lambda: [markdown.markdown(text) for _, text in guides]
+
+    def save():
+        from tools.file_manager_tool import save_file
+        target = os.path.join(scratch, "saved")
+        return lambda: [save_file(target, os.path.basename(path), text) for path, text in guides]
+
+    bench("parse_curriculum_markdown", parse_curriculum)
+    bench("convert_md_to_pptx", convert_pptx)
+    bench("reader_planner", reader_only)
+    bench("reader_planner_writer", ppt_agents)
+    bench("markdown_parse_ast", parse_ast)
+    bench("markdown_parse_bs4", parse_bs4)
+    bench("markdown_html_ast", html_ast)
+    bench("markdown_html_markdown_lib", html_markdown_lib)
+    bench("save_file", save)
+    return {"corpus_files": len(guides), "corpus_bytes": corpus_bytes, "results": results}
+
+
+# --- End-to-end flows (run inside a scratch working directory) ---
+
+def _trace_summary() -> dict:
+    from guide_creator_flow.utils.tracing import TRACE_PATH, load_trace, summarize
+    if not os.path.exists(TRACE_PATH):
+        return {}
+    return summarize(load_trace(TRACE_PATH))["stages"]
+
+
+def flow_guide() -> dict:
+    _setup_path("guide_creator_flow")
+    from main import GuideCreatorFlow
+    from utils.llm_registry import registered_llms
+
+    start = time.perf_counter()
+    GuideCreatorFlow().kickoff(inputs={
+        "topic": "CrewAI Flows",
+        "topic_details": "Building event-driven multi-agent pipelines with CrewAI Flows and Crews.",
+        "audience_level": "intermediate",
+    })
+    wall = time.perf_counter() - start
+    return {"wall_s": round(wall, 3), "models": registered_llms(), "stages": _trace_summary(),
+            "output_files": len(glob.glob(os.path.join("output", "**", "*"), recursive=True))}
+
+
+def flow_course() -> dict:
+    _setup_path("udemy_course_creator")
+    from flows.udemy_course_flow import UdemyCourseCreationFlow
+
+    start = time.perf_counter()
+    UdemyCourseCreationFlow().kickoff(inputs={
+        "course_title": "Practical CrewAI",
+        "course_subtitle": "Benchmark course",
+        "description_points": ["Agents and tasks", "Flows", "Custom tools"],
+        "target_audience": "Python developers",
+        "course_goal": "Build and deploy CrewAI applications.",
+    })
+    wall = time.perf_counter() - start
+    return {"wall_s": round(wall, 3), "stages": _trace_summary(),
+            "lectures": len(glob.glob(os.path.join("output", "lectures", "*", "*.md"))),
+            "decks": len(glob.glob(os.path.join("output", "slides", "*", "*.pptx")))}
+
+
+def run_group(group: str, args) -> dict:
+    """Run one group in a child process and collect its JSON result"""
+    with tempfile.TemporaryDirectory(prefix=f"bench-{group}-") as scratch:
+        result_path = os.path.join(scratch, "result.json")
+        env = dict(os.environ)
+        env.update({
+            "LLM_FAKE": "1",
+            "LLM_CACHE_DISABLED": "1",
+            "FAKE_LLM_LATENCY": args.latency,
+            "TRACE_PATH": os.path.join(scratch, "output", "trace.jsonl"),
+            "PYTHONPATH": os.pathsep.join([SRC, ROOT, env.get("PYTHONPATH", "")]),
+        })
+        if args.cassette:
+            # Replay a recorded run instead of generating fake responses
+            env.pop("LLM_FAKE")
+            env.update({"LLM_CASSETTE": os.path.abspath(args.cassette), "LLM_CASSETTE_MODE": "replay",
+                        "LLM_CASSETTE_LATENCY": args.cassette_latency})
+        for key, value in (("OPENAI_API_KEY", "benchmark"), ("GEMINI_API_KEY", "benchmark"),
+                           ("GEMINI_MODEL", "gemini/gemini-2.0-flash")):
+            env.setdefault(key, value)
+
+        command = [sys.executable, os.path.abspath(__file__), "--child", group,
+                   "-n", str(args.iterations), "--result", result_path]
+        start = time.perf_counter()
+        proc = subprocess.run(command, cwd=scratch, env=env, capture_output=True, text=True,
+                              encoding="utf-8", errors="replace")
+        elapsed = round(time.perf_counter() - start, 3)
+
+        if os.path.exists(result_path):
+            with open(result_path, encoding="utf-8") as f:
+                result = json.load(f)
+        else:
+            result = {"error": (proc.stderr or proc.stdout).strip().splitlines()[-5:]}
+        result["process_s"] = elapsed
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--only", choices=["micro", "flows"] + GROUPS, default=None)
+    parser.add_argument("-n", "--iterations", type=int, default=10, help="Iterations per microbenchmark")
+    parser.add_argument("--latency", default=os.getenv("FAKE_LLM_LATENCY", "fixed:0"),
+                        help='Fake LLM latency, e.g. "fixed:0.2", "uniform:0.1,1", "lognormal:0.5,0.6"')
+    parser.add_argument("--cassette", default=None,
+                        help="Replay this recorded LLM cassette in the flow benchmarks instead of the fake LLM")
+    parser.add_argument("--cassette-latency", choices=["recorded", "zero"], default="zero")
+    parser.add_argument("--output", default=None, help="Also write the JSON report to this file")
+    parser.add_argument("--child", choices=GROUPS, help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        try:
+            if args.child == "micro":
+                result = micro(args.iterations, os.getcwd())
+            elif args.child == "flow-guide":
+                result = flow_guide()
+            else:
+                result = flow_course()
+        except ImportError as e:
+            result = {"skipped": f"missing dependency: {e.name or e}"}
+        with open(args.result, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        return
+
+    if args.only == "flows":
+        groups = ["flow-guide", "flow-course"]
+    elif args.only:
+        groups = [args.only]
+    else:
+        groups = GROUPS
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "fake_llm_latency": args.latency,
+        "cassette": args.cassette,
+        "benchmarks": {group: run_group(group, args) for group in groups},
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Generate many guides in one process from a topic list.
+
+    python src/guide_creator_flow/batch.py Docs/Course_Topics.md --level beginner
+    python src/guide_creator_flow/batch.py topics.jsonl --jobs 3
+    python src/guide_creator_flow/batch.py topics.yaml --output-root output/batch
+
+Topic files can be:
+- Markdown in the Docs/Course_Topics.md layout ("## Level: ..." headings with
+  "### N. Course Title: ..." entries and a "**Details:**" bullet)
+- JSONL, one {"topic", "topic_details", "audience_level"} object per line
+- YAML, a list of the same mappings (or a mapping with a "guides" list)
+
+All guides share the LLM registry, response cache and rate limiters. Each guide is
+written to <output-root>/<topic>/, and progress is kept in <output-root>/batch_status.json.
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+from main import GuideCreatorFlow
+from utils.llm_cache import get_default_cache
+from utils.rate_limiter import format_limiter_stats
+from utils.tracing import TRACE_PATH, span
+
+AUDIENCE_LEVELS = ("beginner", "intermediate", "advanced")
+BATCH_CONCURRENCY = int(os.getenv("GUIDE_BATCH_CONCURRENCY", "2"))
+
+
+def _normalize(entry: dict, default_level: Optional[str] = None) -> dict:
+    """Accept the common spellings of the topic/details/audience fields"""
+    topic = (entry.get("topic") or entry.get("title") or "").strip()
+    details = (entry.get("topic_details") or entry.get("details") or entry.get("description") or "").strip()
+    level = (entry.get("audience_level") or entry.get("audience") or entry.get("level") or default_level or "")
+    level = level.strip().lower()
+    if not topic:
+        raise ValueError(f"Topic entry without a topic: {entry}")
+    if level not in AUDIENCE_LEVELS:
+        raise ValueError(f"Topic '{topic}' has audience level '{level}', expected one of {AUDIENCE_LEVELS}")
+    return {"topic": topic, "topic_details": details, "audience_level": level}
+
+
+def parse_topics_markdown(text: str) -> List[dict]:
+    """Parse the Docs/Course_Topics.md layout into topic entries"""
+    entries = []
+    level = None
+    current = None
+    in_objectives = False
+
+    for raw in text.splitlines():
+        line = raw.strip()
+        level_match = re.match(r"^##\s+Level:\s*(\w+)", line, re.IGNORECASE)
+        title_match = re.match(r"^###\s+(?:\d+\.\s*)?(?:Course Title:\s*)?(.+)$", line, re.IGNORECASE)
+
+        if level_match:
+            level = level_match.group(1).lower()
+        elif title_match:
+            current = {"topic": title_match.group(1).strip(), "details": "", "level": level}
+            entries.append(current)
+            in_objectives = False
+        elif current is not None:
+            details_match = re.match(r"^[*-]\s+\*\*Details:\*\*\s*(.+)$", line)
+            if details_match:
+                current["details"] = details_match.group(1).strip()
+            elif re.match(r"^[*-]\s+\*\*Learning Objectives:\*\*", line):
+                in_objectives = True
+                current["details"] += "\nLearning objectives:"
+            elif re.match(r"^[*-]\s+\*\*", line):
+                in_objectives = False
+            elif in_objectives and re.match(r"^[*-]\s+", line):
+                current["details"] += "\n- " + re.sub(r"^[*-]\s+", "", line)
+
+    return [_normalize(entry) for entry in entries]
+
+
+def load_topics(path: str) -> List[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".jsonl":
+        return [_normalize(json.loads(line)) for line in text.splitlines() if line.strip()]
+    if extension in (".yaml", ".yml"):
+        import yaml
+        data = yaml.safe_load(text) or []
+        if isinstance(data, dict):
+            data = data.get("guides", [])
+        return [_normalize(entry) for entry in data]
+    return parse_topics_markdown(text)
+
+
+def _slug(topic: str) -> str:
+    return re.sub(r"[^\w\- ]", "", topic).strip().replace(" ", "_")[:80] or "guide"
+
+
+class BatchStatus:
+    """Per-job status file, rewritten atomically after every change"""
+
+    def __init__(self, path: str, jobs: List[dict]):
+        self.path = path
+        self.started = time.time()
+        self.jobs = jobs
+        self.save()
+
+    def update(self, job: dict, **fields):
+        job.update(fields)
+        self.save()
+
+    def save(self):
+        counts: Dict[str, int] = {}
+        for job in self.jobs:
+            counts[job["status"]] = counts.get(job["status"], 0) + 1
+        data = {"started": self.started, "elapsed_s": round(time.time() - self.started, 2),
+                "counts": counts, "jobs": self.jobs}
+
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp_", suffix=".json")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+async def run_batch(topics: List[dict], output_root: str, concurrency: int = BATCH_CONCURRENCY) -> List[dict]:
+    """Run one GuideCreatorFlow per topic, at most `concurrency` at a time"""
+    jobs = [{**topic, "status": "pending", "output_dir": os.path.join(output_root, _slug(topic["topic"])),
+             "wall_s": None, "error": None} for topic in topics]
+    status = BatchStatus(os.path.join(output_root, "batch_status.json"), jobs)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run_job(job: dict):
+        async with semaphore:
+            status.update(job, status="running")
+            print(f"▶ {job['topic']} ({job['audience_level']})")
+            start = time.time()
+            try:
+                with span("guide_job", topic=job["topic"]):
+                    await GuideCreatorFlow().kickoff_async(inputs={
+                        "topic": job["topic"],
+                        "topic_details": job["topic_details"],
+                        "audience_level": job["audience_level"],
+                        "output_dir": job["output_dir"],
+                    })
+                status.update(job, status="done", wall_s=round(time.time() - start, 2))
+                print(f"✔ {job['topic']} → {job['output_dir']}")
+            except Exception as e:
+                # One failed guide must not take the rest of the batch down
+                status.update(job, status="failed", wall_s=round(time.time() - start, 2), error=repr(e))
+                print(f"✘ {job['topic']}: {e}")
+
+    with span("guide_batch", jobs=len(jobs)):
+        await asyncio.gather(*(run_job(job) for job in jobs))
+    return jobs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate many guides from a topic list")
+    parser.add_argument("topics", help="Topic file (.md in the Course_Topics layout, .jsonl or .yaml)")
+    parser.add_argument("--jobs", type=int, default=BATCH_CONCURRENCY, help="Guides generated at the same time")
+    parser.add_argument("--level", choices=AUDIENCE_LEVELS, help="Only generate guides for this audience level")
+    parser.add_argument("--limit", type=int, default=None, help="Only generate the first N guides")
+    parser.add_argument("--output-root", default=os.path.join("output", "batch"))
+    args = parser.parse_args()
+
+    topics = load_topics(args.topics)
+    if args.level:
+        topics = [t for t in topics if t["audience_level"] == args.level]
+    if args.limit is not None:
+        topics = topics[:args.limit]
+    print(f"Generating {len(topics)} guides, {args.jobs} at a time...")
+
+    jobs = asyncio.run(run_batch(topics, args.output_root, args.jobs))
+
+    print("\n=== Batch Complete ===")
+    for job in jobs:
+        wall = f"{job['wall_s']:.1f}s" if job["wall_s"] is not None else "-"
+        print(f"{job['status']:8} {wall:>8}  {job['topic']}")
+    cache = get_default_cache()
+    if cache is not None:
+        print(cache.format_stats())
+    print(format_limiter_stats())
+    print(f"Status: {os.path.join(args.output_root, 'batch_status.json')}  Trace: {TRACE_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,16 @@
 # src/guide_creator_flow/crews/content_crew/content_crew.py
-from crewai import Agent, Crew, Process, Task, LLM
+from crewai import Agent, Crew, Process, Task
 import os
 from crewai.project import CrewBase, agent, crew, task
 from crewai.agents.agent_builder.base_agent import BaseAgent
 from typing import List
+from utils.guide_writer import STREAM_TOKENS
+from utils.llm_registry import get_llm
 
-# Initialize the LLM
+# Shared LLM handle from the registry (pooled connections + on-disk response cache)
 llm_model = os.getenv("GEMINI_MODEL")  # Example model, replace with actual model
 llm_api_key = os.getenv("GEMINI_API_KEY")  # Ensure you have your API key set in the environment
-llm = LLM(model=llm_model, 
-          api_key= llm_api_key
-          )
+llm = get_llm(llm_model, api_key=llm_api_key, stream=STREAM_TOKENS)
 
 @CrewBase
 class ContentCrew():
@@ -56,4 +56,39 @@ class ContentCrew():
             tasks=self.tasks,
             process=Process.sequential,
             verbose=True,
-        )
\ No newline at end of file
+        )
+
+@CrewBase
+class SubsectionCrew():
+    """Writes one subsection of a section (hierarchical mode); its siblings are written in parallel"""
+
+    agents_config = "config/agents.yaml"
+    # Own task file: the review task in tasks.yaml refers to write_section_task
+    tasks_config = "config/subsection_tasks.yaml"
+
+    agents: List[BaseAgent]
+    tasks: List[Task]
+
+    @agent
+    def content_writer(self) -> Agent:
+        return Agent(
+            config=self.agents_config['content_writer'], # type: ignore[index]
+            llm=llm,
+            verbose=True
+        )
+
+    @task
+    def write_subsection_task(self) -> Task:
+        return Task(
+            config=self.tasks_config['write_subsection_task'], # type: ignore[index]
+        )
+
+    @crew
+    def crew(self) -> Crew:
+        """Creates the subsection writing crew"""
+        return Crew(
+            agents=self.agents,
+            tasks=self.tasks,
+            process=Process.sequential,
+            verbose=True,
+        )
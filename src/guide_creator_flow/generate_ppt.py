@@ -2,41 +2,35 @@ from pptx import Presentation
 from pptx.util import Pt
 from pptx.enum.text import PP_ALIGN
 import re
-import markdown
-from bs4 import BeautifulSoup
+from utils.markdown_ast import load_document, plain
 
 # --- ReaderAgent ---
 class ReaderAgent:
     def run(self, file_path):
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        html = markdown.markdown(content)
-        soup = BeautifulSoup(html, 'html.parser')
+        # Parsed once per content and shared with every other exporter of this file
+        document = load_document(file_path)
 
         slides = []
         current_title = "Untitled"
         current_content = []
 
-        for tag in soup.contents:
-            if tag.name == 'h1':
+        for block in document.blocks:
+            if block.kind == 'heading' and block.level == 1:
                 if current_content:
                     slides.append({'title': current_title, 'content': current_content})
-                current_title = tag.get_text()
+                current_title = plain(block.text)
                 current_content = []
-            elif tag.name in ['h2', 'h3']:
-                current_content.append(f"**{tag.get_text()}**")
-            elif tag.name == 'p':
-                current_content.append(tag.get_text())
-            elif tag.name == 'ul':
-                for li in tag.find_all('li'):
-                    current_content.append(f"- {li.get_text()}")
-            elif tag.name == 'ol':
-                for i, li in enumerate(tag.find_all('li'), start=1):
-                    current_content.append(f"{i}. {li.get_text()}")
-            elif tag.name == 'blockquote':
-                current_content.append(f"> {tag.get_text()}")
-            elif tag.name == 'pre':
-                current_content.append(f"`{tag.get_text()}`")
+            elif block.kind == 'heading' and block.level in (2, 3):
+                current_content.append(f"**{plain(block.text)}**")
+            elif block.kind == 'paragraph':
+                current_content.append(plain(block.text))
+            elif block.kind == 'list':
+                for i, (_, text) in enumerate(block.items, start=1):
+                    current_content.append(f"{i}. {plain(text)}" if block.ordered else f"- {plain(text)}")
+            elif block.kind == 'quote':
+                current_content.append(f"> {plain(block.text)}")
+            elif block.kind == 'code':
+                current_content.append(f"`{block.text}`")
 
         if current_content:
             slides.append({'title': current_title, 'content': current_content})
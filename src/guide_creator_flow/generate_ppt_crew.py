@@ -1,36 +1,27 @@
 import os
-from crewai import Agent, Task, Crew, Process, LLM
+from crewai import Agent, Task, Crew, Process
 from crewai.tools import tool
-import markdown
 from pptx import Presentation
 from pptx.util import Inches, Pt
 from pptx.enum.text import PP_ALIGN
 from uuid import uuid4
+from utils.llm_registry import get_llm
+from utils.markdown_ast import load_document
 llm_model = os.getenv("GEMINI_MODEL")  # Example model, replace with actual model
 llm_api_key = os.getenv("GEMINI_API_KEY")  # Ensure you have your API key set in the environment
-llm = LLM(model=llm_model, 
-          api_key= llm_api_key
-          )
+llm = get_llm(llm_model, api_key=llm_api_key)
 # Custom Tool: Markdown Reader (unchanged)
 @tool
 def markdown_reader_tool(file_path: str) -> dict:
     """Reads a Markdown file and extracts headers and content."""
     try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            content = file.read()
-        html = markdown.markdown(content)
-        sections = []
-        current_section = {"header": "", "content": ""}
-        for line in content.split('\n'):
-            if line.startswith('#'):
-                if current_section["header"] or current_section["content"]:
-                    sections.append(current_section)
-                current_section = {"header": line.strip('# ').strip(), "content": ""}
-            else:
-                current_section["content"] += line + "\n"
-        if current_section["header"] or current_section["content"]:
-            sections.append(current_section)
-        return {"sections": sections, "raw_content": content}
+        # Headings inside code blocks are code, not section breaks
+        document = load_document(file_path)
+        sections = [
+            {"header": section.title, "content": document.source(section.start, section.end) + "\n"}
+            for section in document.sections()
+        ]
+        return {"sections": sections, "raw_content": document.text}
     except Exception as e:
         return {"error": f"Failed to read Markdown file: {str(e)}"}
 
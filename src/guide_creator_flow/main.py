@@ -1,10 +1,34 @@
+import argparse
+import asyncio
+import contextvars
+import itertools
 import json
 import os
 from typing import List, Dict
 from pydantic import BaseModel, Field
-from crewai import LLM
 from crewai.flow.flow import Flow, listen, start
-from crews.content_crew.content_crew import ContentCrew
+from crews.content_crew.content_crew import ContentCrew, SubsectionCrew
+from utils.cassette import get_cassette
+from utils.context_store import SectionContextStore
+from utils.crew_factory import build_crew, crew_fingerprint
+from utils.fingerprint import BuildManifest, RebuildPlan, artifact_fingerprint
+from utils.html_export import export_guide_html, get_fragment_cache
+from utils.guide_writer import (STREAM_TOKENS, OrderedGuideWriter, finish_section_stream, section_file_name,
+                                stream_section_tokens)
+from utils.llm_cache import get_default_cache
+from utils.llm_registry import get_llm
+from utils.outline_stream import STREAM_OUTLINE, OutlineStreamParser, stream_outline_chunks
+from utils.rate_limiter import format_limiter_stats
+from utils.tracing import TRACE_PATH, span, trace_crew_tasks
+
+# Maximum number of sections written at the same time
+SECTION_CONCURRENCY = int(os.getenv("GUIDE_SECTION_CONCURRENCY", "4"))
+# Token budget for the previous_sections context handed to the content crew
+CONTEXT_TOKEN_BUDGET = int(os.getenv("GUIDE_CONTEXT_TOKEN_BUDGET", "1500"))
+# Hierarchical mode: plan each section as a subsection skeleton, then write the subsections in parallel
+HIERARCHICAL_SECTIONS = os.getenv("GUIDE_HIERARCHICAL_SECTIONS", "").lower() in ("1", "true", "yes")
+# Subsections written at the same time across all sections
+SUBSECTION_CONCURRENCY = int(os.getenv("GUIDE_SUBSECTION_CONCURRENCY", "8"))
 
 # Define our models for structured data
 class Section(BaseModel):
@@ -18,6 +42,10 @@ class GuideOutline(BaseModel):
     sections: List[Section] = Field(description="List of sections in the guide")
     conclusion: str = Field(description="Conclusion or summary of the guide")
 
+class SectionSkeleton(BaseModel):
+    introduction: str = Field(description="Two or three sentences introducing the section")
+    subsections: List[Section] = Field(description="Subsections of the section, in reading order")
+
 # Define our flow state
 class GuideCreatorState(BaseModel):
     topic: str = ""
@@ -25,6 +53,8 @@ class GuideCreatorState(BaseModel):
     audience_level: str = ""
     guide_outline: GuideOutline = None
     sections_content: Dict[str, str] = {}
+    output_dir: str = "output"  # batch runs give every guide its own directory
+    rebuild: bool = False  # regenerate only the sections whose inputs changed
 
 class GuideCreatorFlow(Flow[GuideCreatorState]):
     """Flow for creating a comprehensive guide on any topic"""
@@ -32,6 +62,14 @@ class GuideCreatorFlow(Flow[GuideCreatorState]):
     @start()
     def get_user_input(self):
         """Get input from the user about the guide topic and audience"""
+        if self.state.rebuild:
+            self._restore_inputs()
+        # Inputs passed to kickoff(inputs=...) skip the interactive prompts
+        if self.state.topic and self.state.audience_level:
+            print(f"\nCreating a guide on {self.state.topic} for {self.state.audience_level} audience...\n")
+            self._remember_inputs()
+            return self.state
+
         print("\n=== Create Your Comprehensive Guide ===\n")
 
         # Get user input
@@ -54,11 +92,48 @@ class GuideCreatorFlow(Flow[GuideCreatorState]):
             print("Please enter 'beginner', 'intermediate', or 'advanced'")
 
         print(f"\nCreating a guide on {self.state.topic} for {self.state.audience_level} audience...\n")
+        self._remember_inputs()
         return self.state
 
+    @property
+    def manifest(self) -> BuildManifest:
+        """Fingerprints of the sections written into output_dir (output/guide_manifest.json)"""
+        if getattr(self, "_manifest", None) is None:
+            self._manifest = BuildManifest(os.path.join(self.state.output_dir, "guide_manifest.json"))
+        return self._manifest
+
+    def _restore_inputs(self):
+        """Fill the inputs not passed to a rebuild from the run that produced the manifest"""
+        for field, value in self.manifest.inputs.items():
+            if field in ("topic", "topic_details", "audience_level") and not getattr(self.state, field):
+                setattr(self.state, field, value)
+
+    def _remember_inputs(self):
+        self.manifest.set_inputs({
+            "topic": self.state.topic,
+            "topic_details": self.state.topic_details,
+            "audience_level": self.state.audience_level,
+        })
+
+    def _load_outline(self):
+        """The outline saved by an earlier run, or None"""
+        path = os.path.join(self.state.output_dir, "guide_outline.json")
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return GuideOutline(**json.load(f))
+
     @listen(get_user_input)
-    def create_guide_outline(self, state):
+    async def create_guide_outline(self, state):
         """Create a structured outline for the guide using a direct LLM call"""
+        if self.state.rebuild:
+            # A rebuild keeps the saved outline (edit guide_outline.json to change it)
+            outline = self._load_outline()
+            if outline is not None:
+                self.state.guide_outline = outline
+                print(f"Reusing saved outline with {len(outline.sections)} sections")
+                return outline
+
         print("Creating guide outline...")
 
         # Initialize the LLM
@@ -67,9 +142,10 @@ class GuideCreatorFlow(Flow[GuideCreatorState]):
         # Initialize the LLM
         llm_model = os.getenv("GEMINI_MODEL")  # Example model, replace with actual model
         llm_api_key = os.getenv("GEMINI_API_KEY")  # Ensure you have your API key set in the environment
-        llm = LLM(model=llm_model, 
-                  api_key= llm_api_key,
-                  response_format=GuideOutline)
+        llm = get_llm(llm_model,
+                      api_key=llm_api_key,
+                      response_format=GuideOutline,
+                      stream=STREAM_OUTLINE)
 
         # Create the messages for the outline
         messages = [
@@ -89,81 +165,341 @@ class GuideCreatorFlow(Flow[GuideCreatorState]):
         ]
 
         # Make the LLM call with JSON response format
-        response = llm.call(messages=messages)
+        with span("create_guide_outline", topic=state.topic, streaming=STREAM_OUTLINE):
+            if STREAM_OUTLINE:
+                # Sections start writing while the rest of the outline is still arriving
+                self._start_sections()
+                try:
+                    response = await self._stream_outline(llm, messages)
+                    outline_dict = json.loads(response)
+                    self.state.guide_outline = GuideOutline(**outline_dict)
+                except BaseException:
+                    # Sections dispatched from a bad outline must not keep writing
+                    await self._cancel_sections()
+                    raise
+            else:
+                # Off the event loop, so guides generated side by side (batch mode) overlap
+                response = await asyncio.to_thread(llm.call, messages=messages)
 
-        # Parse the JSON response
-        outline_dict = json.loads(response)
-        self.state.guide_outline = GuideOutline(**outline_dict)
+                # Parse the JSON response
+                outline_dict = json.loads(response)
+                self.state.guide_outline = GuideOutline(**outline_dict)
 
         # Ensure output directory exists before saving
-        os.makedirs("output", exist_ok=True)
+        os.makedirs(self.state.output_dir, exist_ok=True)
 
         # Save the outline to a file
-        with open("output/guide_outline.json", "w") as f:
+        with open(os.path.join(self.state.output_dir, "guide_outline.json"), "w") as f:
             json.dump(outline_dict, f, indent=2)
 
         print(f"Guide outline created with {len(self.state.guide_outline.sections)} sections")
         return self.state.guide_outline
 
+    async def _stream_outline(self, llm, messages) -> str:
+        """Make the outline call with streaming on and dispatch each section as soon as it is complete"""
+        loop = asyncio.get_running_loop()
+        # Section tasks are created in this context, not in the streaming thread's
+        context = contextvars.copy_context()
+        parser = OutlineStreamParser("sections")
+        # Items arrive in outline order, so their count is their outline index
+        positions = itertools.count()
+
+        def dispatch(items):
+            for item in items:
+                index = next(positions)
+                try:
+                    section = Section(**item)
+                except ValueError:
+                    continue  # left to the full outline, which reports the error
+                print(f"Outline streamed section: {section.title}")
+                self._dispatch_section(index, section)
+
+        def sink(chunk):
+            items = parser.feed(chunk)
+            if items:
+                loop.call_soon_threadsafe(dispatch, items, context=context)
+
+        def call():
+            # Only chunks of this thread's call reach the parser
+            stream_outline_chunks(sink)
+            return llm.call(messages=messages)
+
+        response = await asyncio.to_thread(call)
+        # Cache hits and replays arrive in one piece
+        dispatch(parser.finish(response))
+        return response
+
     @listen(create_guide_outline)
-    def write_and_compile_guide(self, outline):
-        """Write all sections and compile the guide"""
-        print("Writing guide sections and compiling...")
-        completed_sections = []
+    async def write_and_compile_guide(self, outline):
+        """Write all sections concurrently and compile the guide"""
+        self._start_sections()
+        writer = self._writer
+        writer.write_header(outline.title, outline.introduction)
+        if self.state.rebuild:
+            print(self.rebuild_plan(outline).format())
+
+        streamed = len(self._dispatched)
+        for index, section in enumerate(outline.sections):
+            writer.add_title(index, section.title)
+        for index, section in enumerate(outline.sections):
+            # Sections already started while the outline streamed are skipped
+            if index not in self._dispatched:
+                self._dispatch_section(index, section)
+        if streamed:
+            print(f"{streamed} of {len(outline.sections)} sections were started while the outline streamed")
+
+        try:
+            await asyncio.gather(*self._section_tasks)
+            writer.close(conclusion=outline.conclusion)
+        finally:
+            # A failed section leaves the others running; stop them before the file is closed
+            await self._cancel_sections()
+
+        stats = self._context_store.stats()
+        print(f"Context tokens sent: {stats['tokens_sent']} "
+              f"(full concatenation would be {stats['tokens_full']}, saved {stats['tokens_saved']})")
+
+        print(f"\nComplete guide compiled and saved to {writer.path} ({writer.bytes_written / 1024:.0f} KB)")
+        return "Guide creation completed successfully"
+
+    @listen(write_and_compile_guide)
+    async def export_html(self, message):
+        """Render the finished guide to HTML; sections that did not change reuse their cached fragments"""
+        guide_path = os.path.join(self.state.output_dir, "complete_guide.md")
+        html_path = await asyncio.to_thread(export_guide_html, guide_path)
+        print(f"HTML guide saved to {html_path}")
+        return message
+
+    def _start_sections(self):
+        """Set up the shared state of the section writers, once per run"""
+        if getattr(self, "_section_tasks", None) is not None:
+            return
+        concurrency = max(1, SECTION_CONCURRENCY)
+        print(f"Writing guide sections (up to {concurrency} at a time) and compiling...")
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._subsection_semaphore = asyncio.Semaphore(max(1, SUBSECTION_CONCURRENCY))
+        self._context_store = SectionContextStore(token_budget=CONTEXT_TOKEN_BUDGET)
+        self._dispatched: Dict[int, Section] = {}  # outline index -> section
+        self._section_tasks = []
+
+        # The guide grows on disk in outline order as sections finish; titles are added on dispatch
+        self._writer = OrderedGuideWriter(os.path.join(self.state.output_dir, "complete_guide.md"), [])
+        if STREAM_TOKENS:
+            print(f"Streaming section drafts to {self.state.output_dir}/sections/<section>.partial.md")
+
+    async def _cancel_sections(self):
+        """Cancel the section writers still running and wait for them before the guide file is closed"""
+        for task in self._section_tasks:
+            task.cancel()
+        await asyncio.gather(*self._section_tasks, return_exceptions=True)
+        # Sections already flushed stay on disk even if a later one fails
+        self._writer.close()
+
+    def rebuild_plan(self, outline: GuideOutline = None) -> RebuildPlan:
+        """Which sections of the outline a rebuild would rewrite, compared with the manifest"""
+        self._restore_inputs()
+        plan = RebuildPlan("sections")
+        outline = outline or self._load_outline()
+        if outline is None:
+            print(f"No saved outline in {self.state.output_dir}; a rebuild writes the whole guide")
+            return plan
+        for index, section in enumerate(outline.sections):
+            name = self._section_name(index, section)
+            plan.add(name, self.manifest.reasons(name, self._section_fingerprint(section)))
+        return plan
+
+    @staticmethod
+    def _section_name(index: int, section: Section) -> str:
+        """Manifest entry and saved file name of a section; the outline position keeps repeated titles apart"""
+        return f"{index + 1:02d} {section.title}"
 
-        # Process sections one by one to maintain context flow
-        for section in outline.sections:
+    def _section_inputs(self, section: Section, previous_sections: str) -> dict:
+        return {
+            "section_title": section.title,
+            "section_description": section.description,
+            "audience_level": self.state.audience_level,
+            "previous_sections": previous_sections,
+            "draft_content": ""
+        }
+
+    def _section_fingerprint(self, section: Section) -> dict:
+        inputs = self._section_inputs(section, previous_sections="")
+        if HIERARCHICAL_SECTIONS:
+            inputs["hierarchical"] = True
+        return artifact_fingerprint(
+            {"title": section.title, "description": section.description},
+            inputs,
+            crew_fingerprint(SubsectionCrew if HIERARCHICAL_SECTIONS else ContentCrew),
+        )
+
+    def _dispatch_section(self, index: int, section: Section):
+        """Start writing the section at an outline index; a rebuild reuses sections whose inputs are unchanged"""
+        self._dispatched[index] = section
+        self._writer.add_title(index, section.title)
+        name = self._section_name(index, section)
+        if self.state.rebuild and not self.manifest.reasons(name, self._section_fingerprint(section)):
+            print(f"Reusing unchanged section: {section.title}")
+            with open(self.manifest.output_path(name), "r", encoding="utf-8") as f:
+                self._finish_section(index, section, f.read())
+            return
+        self._section_tasks.append(asyncio.ensure_future(self._write_section(index, section)))
+
+    async def _write_section(self, index: int, section: Section):
+        if STREAM_TOKENS:
+            stream_section_tokens(os.path.join(self.state.output_dir, "sections"))
+
+        async with self._semaphore:
             print(f"Processing section: {section.title}")
 
-            # Build context from previous sections
-            previous_sections_text = ""
-            if completed_sections:
-                previous_sections_text = "# Previously Written Sections\n\n"
-                for title in completed_sections:
-                    previous_sections_text += f"## {title}\n\n"
-                    previous_sections_text += self.state.sections_content.get(title, "") + "\n\n"
-            else:
-                previous_sections_text = "No previous sections written yet."
+            # Context is rebuilt at dispatch time from whatever has finished so far
+            sections = [self._dispatched[i] for i in sorted(self._dispatched)]
+            previous_sections_text = self._build_previous_sections(sections, section, self._context_store)
 
             # Run the content crew for this section
-            result = ContentCrew().crew().kickoff(inputs={
-                "section_title": section.title,
-                "section_description": section.description,
-                "audience_level": self.state.audience_level,
-                "previous_sections": previous_sections_text,
-                "draft_content": ""
-            })
-
-            # Store the content
-            self.state.sections_content[section.title] = result.raw
-            completed_sections.append(section.title)
-            print(f"Section completed: {section.title}")
-
-        # Compile the final guide
-        guide_content = f"# {outline.title}\n\n"
-        guide_content += f"## Introduction\n\n{outline.introduction}\n\n"
-
-        # Add each section in order
-        for section in outline.sections:
-            section_content = self.state.sections_content.get(section.title, "")
-            guide_content += f"\n\n{section_content}\n\n"
-
-        # Add conclusion
-        guide_content += f"## Conclusion\n\n{outline.conclusion}\n\n"
-
-        # Save the guide
-        with open("output/complete_guide.md", "w",encoding="utf-8") as f:
-            f.write(guide_content)
-
-        print("\nComplete guide compiled and saved to output/complete_guide.md")
-        return "Guide creation completed successfully"
+            with span("section", section=section.title, hierarchical=HIERARCHICAL_SECTIONS):
+                content = None
+                if HIERARCHICAL_SECTIONS:
+                    content = await self._write_section_hierarchical(section, previous_sections_text)
+                if content is None:
+                    crew = trace_crew_tasks(build_crew(ContentCrew), "section", ["write", "review"])
+                    result = await crew.kickoff_async(inputs=self._section_inputs(section, previous_sections_text))
+                    content = result.raw
+
+        finish_section_stream(section.title)
+        # Saved on its own with its fingerprint, so a rebuild can reuse it
+        name = self._section_name(index, section)
+        path = os.path.join(self.state.output_dir, "sections", f"{section_file_name(name)}.md")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        self.manifest.record(name, path, self._section_fingerprint(section))
+        self._finish_section(index, section, content)
 
-def kickoff():
+    async def _write_section_hierarchical(self, section: Section, previous_sections: str):
+        """
+        Plan the section as a short subsection skeleton, write the subsections in
+        parallel and stitch them together in skeleton order. Returns None when no
+        usable skeleton comes back; the section is then written in one piece.
+        """
+        skeleton = await self._section_skeleton(section)
+        if skeleton is None or len(skeleton.subsections) < 2:
+            print(f"No usable subsection skeleton for {section.title}; writing it in one piece")
+            return None
+
+        outline = "\n".join(f"- {sub.title}: {sub.description}" for sub in skeleton.subsections)
+        print(f"Writing {len(skeleton.subsections)} subsections of {section.title} in parallel")
+
+        async def write(subsection: Section) -> str:
+            # Named like a section, so streamed drafts get their own partial file
+            name = f"{section.title} - {subsection.title}"
+            async with self._subsection_semaphore:
+                with span("subsection", section=name):
+                    crew = trace_crew_tasks(build_crew(SubsectionCrew), "subsection", ["write"])
+                    result = await crew.kickoff_async(inputs={
+                        "section_title": section.title,
+                        "subsection_title": subsection.title,
+                        "subsection_description": subsection.description,
+                        "section_skeleton": outline,
+                        "audience_level": self.state.audience_level,
+                        "previous_sections": previous_sections,
+                    })
+            finish_section_stream(name)
+            return result.raw
+
+        bodies = await asyncio.gather(*(write(subsection) for subsection in skeleton.subsections))
+        parts = [f"## {section.title}", skeleton.introduction.strip()]
+        for subsection, body in zip(skeleton.subsections, bodies):
+            parts += [f"### {subsection.title}", _strip_leading_heading(body)]
+        return "\n\n".join(part for part in parts if part)
+
+    async def _section_skeleton(self, section: Section):
+        """One short structured call for the subsection plan of a section"""
+        llm = get_llm(os.getenv("GEMINI_MODEL"),
+                      api_key=os.getenv("GEMINI_API_KEY"),
+                      response_format=SectionSkeleton)
+        messages = [
+            {"role": "system", "content": "You are a helpful assistant designed to output JSON."},
+            {"role": "user", "content": f"""
+            Plan the section "{section.title}" of a guide on "{self.state.topic}" for {self.state.audience_level} level learners.
+            Section description: {section.description}
+
+            Provide:
+            1. A two or three sentence introduction to the section
+            2. 3-5 subsections that together cover the section without overlapping, each with a
+               clear title and a one-sentence description; make the last one a summary of key points
+            """}
+        ]
+        with span("section.skeleton", section=section.title):
+            response = await asyncio.to_thread(llm.call, messages=messages)
+        try:
+            return SectionSkeleton(**json.loads(response))
+        except (ValueError, TypeError) as e:
+            print(f"Could not parse the subsection skeleton of {section.title}: {e}")
+            return None
+
+    def _finish_section(self, index: int, section: Section, content: str):
+        """Store a written (or reused) section and hand it to the guide writer"""
+        self.state.sections_content[section.title] = content
+        self._context_store.add(section.title, content)
+        writer = self._writer
+        with span("file.save", path=writer.path, section=section.title):
+            flushed = writer.complete(index, content)
+        print(f"Section completed: {section.title}"
+              + (f" ({writer.next_index}/{len(writer.titles)} sections on disk)" if flushed else ""))
+
+    def _build_previous_sections(self, sections, current_section, context_store):
+        """Build the previous_sections context from finished section digests and the outline"""
+        titles = [section.title for section in sections]
+        previous_sections_text = context_store.build(titles, exclude=current_section.title)
+        if not previous_sections_text:
+            previous_sections_text = "No previous sections written yet.\n\n"
+
+        # Sections not finished yet are described from the outline alone
+        pending = [
+            section for section in sections
+            if section is not current_section and not context_store.has(section.title)
+        ]
+        if pending:
+            previous_sections_text += "# Other Sections In This Guide\n\n"
+            for section in pending:
+                previous_sections_text += f"- {section.title}: {section.description}\n"
+
+        return previous_sections_text
+
+def _strip_leading_heading(text: str) -> str:
+    """Drop a heading the writer repeated at the top of a subsection body"""
+    text = text.strip()
+    if text.startswith("#"):
+        text = text.split("\n", 1)[1].strip() if "\n" in text else ""
+    return text
+
+def kickoff(rebuild: bool = False):
     """Run the guide creator flow"""
-    GuideCreatorFlow().kickoff()
+    with span("guide_flow", rebuild=rebuild):
+        GuideCreatorFlow().kickoff(inputs={"rebuild": True} if rebuild else None)
     print("\n=== Flow Complete ===")
+    cache = get_default_cache()
+    if cache is not None:
+        print(cache.format_stats())
+    cassette = get_cassette()
+    if cassette is not None:
+        print(cassette.format_stats())
+    print(format_limiter_stats())
+    print(get_fragment_cache().format_stats())
+    print(f"Trace written to {TRACE_PATH} (summarize it with `report`)")
     print("Your comprehensive guide is ready in the output directory.")
-    print("Open output/complete_guide.md to view it.")
+    print("Open output/complete_guide.md (or complete_guide.html) to view it.")
+
+def rebuild(dry_run: bool = None):
+    """Rewrite only the sections whose outline entry, prompt inputs, crew config or model changed"""
+    if dry_run is None:
+        parser = argparse.ArgumentParser(description="Rebuild the guide in output/ incrementally")
+        parser.add_argument("--dry-run", action="store_true", help="Print the rebuild plan and exit")
+        dry_run = parser.parse_args().dry_run
+    if dry_run:
+        print(GuideCreatorFlow().rebuild_plan().format())
+        return
+    kickoff(rebuild=True)
 
 def plot():
     """Generate a visualization of the flow"""
@@ -172,4 +508,12 @@ def plot():
     print("Flow visualization saved to guide_creator_flow.html")
 
 if __name__ == "__main__":
-    kickoff()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Create a comprehensive guide with CrewAI")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Reuse the saved outline and rewrite only the sections whose inputs changed")
+    parser.add_argument("--dry-run", action="store_true", help="With --rebuild: print the plan and exit")
+    args = parser.parse_args()
+    if args.rebuild:
+        rebuild(dry_run=args.dry_run)
+    else:
+        kickoff()
\ No newline at end of file
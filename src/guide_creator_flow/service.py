@@ -0,0 +1,384 @@
+"""
+Local HTTP job service for guide and course generation.
+
+    python src/guide_creator_flow/service.py --port 8765 --workers 2
+
+Endpoints (JSON):
+    POST   /jobs                          {"kind": "guide" | "course", "inputs": {...}}
+    GET    /jobs                          recent jobs
+    GET    /jobs/<id>                     job status
+    DELETE /jobs/<id>                     cancel a queued or running job
+    GET    /jobs/<id>/artifacts           files produced by the job
+    GET    /jobs/<id>/artifacts/<path>    download one file
+    GET    /health                        queue depth and worker usage
+
+Guide jobs run inside the service process, so CrewAI imports, LLM clients, the
+response cache and the rate limiters are paid for once. Course jobs run in
+long-lived course_worker.py processes: both flows have top-level `crews`/`utils`
+packages, and the course flow writes to ./output, so it needs its own process and
+working directory. Jobs are persisted in SQLite, so queued jobs survive a restart.
+Submissions are refused with 503 once the queue is full.
+"""
+import argparse
+import asyncio
+import json
+import mimetypes
+import os
+import sqlite3
+import sys
+import time
+import uuid
+from typing import Optional
+from urllib.parse import unquote
+
+from main import GuideCreatorFlow
+from utils.tracing import span
+
+SERVICE_ROOT = os.getenv("JOB_SERVICE_ROOT", os.path.join("output", "service"))
+SERVICE_WORKERS = int(os.getenv("JOB_SERVICE_WORKERS", "2"))
+COURSE_WORKERS = int(os.getenv("JOB_SERVICE_COURSE_WORKERS", "1"))
+MAX_QUEUED_JOBS = int(os.getenv("JOB_SERVICE_MAX_QUEUE", "20"))
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COURSE_WORKER_SCRIPT = os.path.join(SRC_DIR, "udemy_course_creator", "course_worker.py")
+REQUIRED_INPUTS = {
+    "guide": ("topic", "audience_level"),
+    "course": ("course_title", "target_audience", "course_goal"),
+}
+
+
+class JobStore:
+    """Persistent job queue; all access happens on the service's event loop thread"""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                inputs TEXT NOT NULL,
+                status TEXT NOT NULL,
+                output_dir TEXT NOT NULL,
+                created REAL NOT NULL,
+                started REAL,
+                finished REAL,
+                error TEXT
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created)")
+        self.conn.commit()
+
+    def _row(self, row) -> Optional[dict]:
+        if row is None:
+            return None
+        job = dict(row)
+        job["inputs"] = json.loads(job["inputs"])
+        return job
+
+    def requeue_interrupted(self) -> int:
+        """Jobs that were running when the service stopped go back to the queue"""
+        cursor = self.conn.execute("UPDATE jobs SET status = 'queued', started = NULL WHERE status = 'running'")
+        self.conn.commit()
+        return cursor.rowcount
+
+    def submit(self, kind: str, inputs: dict, root: str) -> dict:
+        job_id = uuid.uuid4().hex[:12]
+        output_dir = os.path.abspath(os.path.join(root, job_id))
+        self.conn.execute(
+            "INSERT INTO jobs (id, kind, inputs, status, output_dir, created) VALUES (?, ?, ?, 'queued', ?, ?)",
+            (job_id, kind, json.dumps(inputs), output_dir, time.time()),
+        )
+        self.conn.commit()
+        return self.get(job_id)
+
+    def claim_next(self) -> Optional[dict]:
+        row = self.conn.execute(
+            "SELECT * FROM jobs WHERE status = 'queued' ORDER BY created LIMIT 1"
+        ).fetchone()
+        if row is None:
+            return None
+        self.conn.execute("UPDATE jobs SET status = 'running', started = ? WHERE id = ?", (time.time(), row["id"]))
+        self.conn.commit()
+        return self.get(row["id"])
+
+    def finish(self, job_id: str, status: str, error: Optional[str] = None):
+        self.conn.execute(
+            "UPDATE jobs SET status = ?, finished = ?, error = ? WHERE id = ?",
+            (status, time.time(), error, job_id),
+        )
+        self.conn.commit()
+
+    def get(self, job_id: str) -> Optional[dict]:
+        return self._row(self.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def recent(self, limit: int = 50) -> list:
+        rows = self.conn.execute("SELECT * FROM jobs ORDER BY created DESC LIMIT ?", (limit,)).fetchall()
+        return [self._row(row) for row in rows]
+
+    def counts(self) -> dict:
+        rows = self.conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+
+class CourseWorker:
+    """One course_worker.py process, reused for every course job it is given"""
+
+    def __init__(self, log_path: str):
+        self.log_path = log_path
+        self.proc: Optional[asyncio.subprocess.Process] = None
+
+    async def _ensure_started(self):
+        if self.proc is not None and self.proc.returncode is None:
+            return
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(
+            [os.path.join(SRC_DIR, "udemy_course_creator"), SRC_DIR, env.get("PYTHONPATH", "")])
+        log = open(self.log_path, "a", encoding="utf-8")
+        self.proc = await asyncio.create_subprocess_exec(
+            sys.executable, COURSE_WORKER_SCRIPT,
+            stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=log, env=env,
+        )
+        log.close()
+
+    async def run(self, job: dict) -> dict:
+        await self._ensure_started()
+        proc = self.proc
+        message = {"id": job["id"], "dir": job["output_dir"], "inputs": job["inputs"]}
+        proc.stdin.write((json.dumps(message) + "\n").encode("utf-8"))
+        await proc.stdin.drain()
+        line = await proc.stdout.readline()
+        if not line:
+            self.proc = None
+            raise RuntimeError(f"Course worker exited with code {await proc.wait()}")
+        return json.loads(line)
+
+    def kill(self):
+        """Used for cancellation; the next job starts a fresh worker"""
+        if self.proc is not None and self.proc.returncode is None:
+            self.proc.kill()
+        self.proc = None
+
+
+class JobService:
+    def __init__(self, root: str = SERVICE_ROOT, workers: int = SERVICE_WORKERS,
+                 course_workers: int = COURSE_WORKERS, max_queue: int = MAX_QUEUED_JOBS):
+        self.root = root
+        self.workers = max(1, workers)
+        self.max_queue = max_queue
+        self.store = JobStore(os.path.join(root, "jobs.sqlite"))
+        self.wakeup = asyncio.Event()
+        self.running = {}  # job id -> (asyncio task, course worker or None)
+        self.course_pool: asyncio.Queue = asyncio.Queue()
+        for i in range(max(1, course_workers)):
+            self.course_pool.put_nowait(CourseWorker(os.path.join(root, f"course_worker_{i}.log")))
+
+    # --- Workers ---
+
+    async def _worker_loop(self):
+        while True:
+            job = self.store.claim_next()
+            if job is None:
+                self.wakeup.clear()
+                await self.wakeup.wait()
+                continue
+
+            task = asyncio.create_task(self._run(job))
+            self.running[job["id"]] = (task, None)
+            try:
+                status, error = await task
+            except asyncio.CancelledError:
+                if not task.cancelled():
+                    raise  # the service itself is shutting down
+                status, error = "cancelled", None
+            except Exception as e:
+                status, error = "failed", repr(e)
+            finally:
+                self.running.pop(job["id"], None)
+            self.store.finish(job["id"], status, error)
+            print(f"[{job['id']}] {job['kind']} job {status}" + (f": {error}" if error else ""))
+
+    async def _run(self, job: dict):
+        os.makedirs(job["output_dir"], exist_ok=True)
+        print(f"[{job['id']}] {job['kind']} job started")
+        with span("service_job", job_id=job["id"], kind=job["kind"]):
+            if job["kind"] == "guide":
+                await GuideCreatorFlow().kickoff_async(inputs={**job["inputs"], "output_dir": job["output_dir"]})
+                return "done", None
+
+            worker = await self.course_pool.get()
+            self.running[job["id"]] = (self.running[job["id"]][0], worker)
+            try:
+                result = await worker.run(job)
+            finally:
+                self.course_pool.put_nowait(worker)
+            return result["status"], result.get("error")
+
+    def submit(self, kind: str, inputs: dict) -> dict:
+        job = self.store.submit(kind, inputs, self.root)
+        self.wakeup.set()
+        return job
+
+    def cancel(self, job_id: str) -> Optional[dict]:
+        job = self.store.get(job_id)
+        if job is None:
+            return None
+        if job["status"] == "queued":
+            self.store.finish(job_id, "cancelled")
+        elif job_id in self.running:
+            task, worker = self.running[job_id]
+            if worker is not None:
+                worker.kill()
+            # Crew threads already started finish in the background; their result is dropped
+            task.cancel()
+        return self.store.get(job_id)
+
+    # --- HTTP ---
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = (await reader.readline()).decode("latin-1").strip()
+            if not request_line:
+                return
+            method, target, _ = request_line.split(" ", 2)
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode("latin-1").strip()
+                if not line:
+                    break
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+            length = int(headers.get("content-length", "0") or 0)
+            body = await reader.readexactly(length) if length else b""
+            await self.route(method, unquote(target.split("?", 1)[0]), body, writer)
+        except (ValueError, json.JSONDecodeError) as e:
+            await self._json(writer, 400, {"error": str(e)})
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def route(self, method: str, path: str, body: bytes, writer: asyncio.StreamWriter):
+        parts = [p for p in path.split("/") if p]
+
+        if method == "GET" and parts == ["health"]:
+            counts = self.store.counts()
+            return await self._json(writer, 200, {
+                "queued": counts.get("queued", 0), "running": len(self.running), "workers": self.workers,
+                "max_queue": self.max_queue, "jobs": counts,
+            })
+        if parts[:1] != ["jobs"]:
+            return await self._json(writer, 404, {"error": "not found"})
+
+        if method == "POST" and len(parts) == 1:
+            request = json.loads(body or b"{}")
+            kind, inputs = request.get("kind"), request.get("inputs") or {}
+            if kind not in REQUIRED_INPUTS:
+                return await self._json(writer, 400, {"error": f"kind must be one of {sorted(REQUIRED_INPUTS)}"})
+            missing = [key for key in REQUIRED_INPUTS[kind] if not inputs.get(key)]
+            if missing:
+                return await self._json(writer, 400, {"error": f"missing inputs: {', '.join(missing)}"})
+            # Load shedding: refuse new work instead of letting the queue grow without bound
+            if self.store.counts().get("queued", 0) >= self.max_queue:
+                return await self._json(writer, 503, {"error": "queue full, retry later"},
+                                        extra_headers={"Retry-After": "30"})
+            return await self._json(writer, 202, self.submit(kind, inputs))
+
+        if method == "GET" and len(parts) == 1:
+            return await self._json(writer, 200, {"jobs": self.store.recent()})
+
+        job = self.store.get(parts[1]) if len(parts) > 1 else None
+        if job is None:
+            return await self._json(writer, 404, {"error": "unknown job"})
+
+        if method == "GET" and len(parts) == 2:
+            return await self._json(writer, 200, job)
+        if method == "DELETE" and len(parts) == 2:
+            return await self._json(writer, 200, self.cancel(job["id"]))
+        if method == "GET" and len(parts) == 3 and parts[2] == "artifacts":
+            return await self._json(writer, 200, {"artifacts": self._artifacts(job)})
+        if method == "GET" and len(parts) > 3 and parts[2] == "artifacts":
+            return await self._download(writer, job, "/".join(parts[3:]))
+        return await self._json(writer, 405, {"error": "method not allowed"})
+
+    def _artifacts(self, job: dict) -> list:
+        files = []
+        for directory, _, names in os.walk(job["output_dir"]):
+            for name in names:
+                path = os.path.join(directory, name)
+                files.append({"path": os.path.relpath(path, job["output_dir"]).replace(os.sep, "/"),
+                              "bytes": os.path.getsize(path)})
+        return sorted(files, key=lambda f: f["path"])
+
+    async def _download(self, writer: asyncio.StreamWriter, job: dict, relative: str):
+        root = os.path.realpath(job["output_dir"])
+        path = os.path.realpath(os.path.join(root, relative))
+        if not path.startswith(root + os.sep) or not os.path.isfile(path):
+            return await self._json(writer, 404, {"error": "unknown artifact"})
+
+        content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        self._head(writer, 200, content_type, os.path.getsize(path))
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(64 * 1024)
+                if not chunk:
+                    break
+                writer.write(chunk)
+                await writer.drain()
+
+    def _head(self, writer, status: int, content_type: str, length: int, extra_headers: Optional[dict] = None):
+        reasons = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found",
+                   405: "Method Not Allowed", 503: "Service Unavailable"}
+        lines = [f"HTTP/1.1 {status} {reasons.get(status, '')}", f"Content-Type: {content_type}",
+                 f"Content-Length: {length}", "Connection: close"]
+        lines += [f"{name}: {value}" for name, value in (extra_headers or {}).items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+
+    async def _json(self, writer, status: int, payload, extra_headers: Optional[dict] = None):
+        data = json.dumps(payload, indent=2, default=str).encode("utf-8")
+        self._head(writer, status, "application/json", len(data), extra_headers)
+        writer.write(data)
+        await writer.drain()
+
+    async def serve(self, host: str, port: int):
+        requeued = self.store.requeue_interrupted()
+        workers = [asyncio.create_task(self._worker_loop()) for _ in range(self.workers)]
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"Job service listening on http://{host}:{port} "
+              f"({self.workers} workers, queue limit {self.max_queue}, {requeued} jobs requeued)")
+        self.wakeup.set()
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for task in workers:
+                task.cancel()
+            while not self.course_pool.empty():
+                self.course_pool.get_nowait().kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local HTTP job service for guide and course generation")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=SERVICE_WORKERS, help="Jobs running at the same time")
+    parser.add_argument("--course-workers", type=int, default=COURSE_WORKERS,
+                        help="Course worker processes (course jobs beyond this wait for a free process)")
+    parser.add_argument("--max-queue", type=int, default=MAX_QUEUED_JOBS, help="Queued jobs before shedding load")
+    parser.add_argument("--root", default=SERVICE_ROOT, help="Job database and artifact directory")
+    args = parser.parse_args()
+
+    async def run():
+        service = JobService(args.root, args.workers, args.course_workers, args.max_queue)
+        await service.serve(args.host, args.port)
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        print("Job service stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Shared helpers for the guide and course flows."""
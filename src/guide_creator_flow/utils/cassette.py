@@ -0,0 +1,156 @@
+import atexit
+import gzip
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Optional
+
+DEFAULT_CASSETTE_MODE = "record"
+DEFAULT_CASSETTE_LATENCY = "recorded"
+
+
+class CassetteMiss(KeyError):
+    """Replay was asked for a request that is not on the cassette"""
+
+
+class Cassette:
+    """
+    Gzipped JSONL recording of every LLM request/response of a run.
+    Each line holds the request key (see llm_cache.make_cache_key), the model,
+    the request messages, the response, whether the LLM cache served it and how
+    long the provider call took (null for cache hits). In replay mode responses
+    are served back per key in recorded order, either at the recorded latency or
+    instantly.
+    """
+
+    def __init__(self, path: str, mode: str = DEFAULT_CASSETTE_MODE,
+                 latency: str = DEFAULT_CASSETTE_LATENCY):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode!r} (expected 'record' or 'replay')")
+        if latency not in ("recorded", "zero"):
+            raise ValueError(f"Unknown cassette latency: {latency!r} (expected 'recorded' or 'zero')")
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self._lock = threading.Lock()
+        self._file = None
+        self._tracks = defaultdict(deque)
+        self._last = {}
+
+        # Statistics
+        self.recorded = 0
+        self.replayed = 0
+        self.missing = 0
+
+        if mode == "record":
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Recording starts a new cassette; flushed per call so a crash keeps what ran
+            self._file = gzip.open(path, "wt", encoding="utf-8")
+            atexit.register(self.close)
+        else:
+            self._load()
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def _load(self):
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    entry = json.loads(line)
+                    self._tracks[entry["key"]].append(entry)
+
+    def record(self, key: str, model: str, response, latency_s: Optional[float],
+               messages=None, cache: Optional[str] = None):
+        # Only text completions can be replayed; tool-call objects are skipped
+        if not isinstance(response, str):
+            return
+        entry = {
+            "key": key,
+            "model": model,
+            "cache": cache,
+            "latency_s": round(latency_s, 4) if latency_s is not None else None,
+            # Kept so a CassetteMiss can be traced to the prompt that changed
+            "messages": messages,
+            "response": response,
+        }
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+            self._file.flush()
+            self.recorded += 1
+
+    def play(self, key: str, messages=None) -> str:
+        """Next recorded response for key; repeats the last one once a key runs out"""
+        with self._lock:
+            track = self._tracks.get(key)
+            if track:
+                entry = track.popleft()
+                self._last[key] = entry
+            else:
+                entry = self._last.get(key)
+            if entry is None:
+                self.missing += 1
+                raise CassetteMiss(f"Request {key[:12]} is not on cassette {self.path}"
+                                   + _describe_request(messages))
+            self.replayed += 1
+
+        if self.latency == "recorded" and (entry.get("latency_s") or 0) > 0:
+            time.sleep(entry["latency_s"])
+        return entry["response"]
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def format_stats(self) -> str:
+        if self.replaying:
+            return (f"LLM cassette: replayed {self.replayed} responses from {self.path} "
+                    f"({self.latency} latency, {self.missing} missing)")
+        return f"LLM cassette: recorded {self.recorded} responses to {self.path}"
+
+
+def _describe_request(messages) -> str:
+    """The start of the last user message, to find the prompt that changed since the recording"""
+    if not messages:
+        return ""
+    if isinstance(messages, str):
+        last = messages
+    else:
+        user = [m for m in messages if isinstance(m, dict) and m.get("role") == "user"] or list(messages)
+        last = user[-1].get("content", "") if isinstance(user[-1], dict) else user[-1]
+    last = " ".join(str(last).split())
+    return f" (last user message: {last[:200]!r})"
+
+
+_cassette: Optional[Cassette] = None
+_cassette_lock = threading.Lock()
+
+
+def get_cassette() -> Optional[Cassette]:
+    """
+    Process-wide cassette configured from the environment; None unless LLM_CASSETTE is set.
+    LLM_CASSETTE_MODE is 'record' (default) or 'replay', LLM_CASSETTE_LATENCY is
+    'recorded' (default) or 'zero'.
+    """
+    global _cassette
+    path = os.getenv("LLM_CASSETTE")
+    if not path:
+        return None
+    with _cassette_lock:
+        if _cassette is None:
+            _cassette = Cassette(
+                path,
+                mode=os.getenv("LLM_CASSETTE_MODE", DEFAULT_CASSETTE_MODE).lower(),
+                latency=os.getenv("LLM_CASSETTE_LATENCY", DEFAULT_CASSETTE_LATENCY).lower(),
+            )
+        return _cassette
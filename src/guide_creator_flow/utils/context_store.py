@@ -0,0 +1,163 @@
+import re
+import threading
+from typing import Dict, List, Optional
+
+# Rough chars-per-token ratio used for budgeting (good enough for English prose)
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate for prompt budgeting"""
+    if not text:
+        return 0
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text down to roughly max_tokens, preferring a word boundary"""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    if " " in cut:
+        cut = cut[:cut.rfind(" ")]
+    return cut.rstrip() + "..."
+
+
+def _first_sentence(paragraph: str) -> str:
+    match = re.match(r"(.+?[.!?])(\s|$)", paragraph)
+    return match.group(1) if match else paragraph
+
+
+def summarize_section(content: str, max_tokens: int = 250) -> str:
+    """
+    Build a compact extractive digest of a written section.
+    Keeps the headings, the first sentence of each paragraph and the list items.
+    """
+    lines = []
+    paragraph = []
+    in_code = False
+
+    def flush_paragraph():
+        if paragraph:
+            lines.append(_first_sentence(" ".join(paragraph)))
+            paragraph.clear()
+
+    for raw_line in content.splitlines():
+        line = raw_line.strip()
+
+        # Code blocks are too long for a digest
+        if line.startswith("```"):
+            flush_paragraph()
+            in_code = not in_code
+            continue
+        if in_code:
+            continue
+
+        if not line:
+            flush_paragraph()
+        elif line.startswith("#"):
+            flush_paragraph()
+            lines.append(line.lstrip("#").strip() + ":")
+        elif re.match(r"^([-*+]|\d+\.)\s+", line):
+            flush_paragraph()
+            lines.append("- " + _first_sentence(re.sub(r"^([-*+]|\d+\.)\s+", "", line)))
+        else:
+            paragraph.append(line)
+    flush_paragraph()
+
+    return truncate_to_tokens("\n".join(lines), max_tokens)
+
+
+def _covered_line(titles: List[str]) -> str:
+    return "Also covered earlier: " + "; ".join(titles) + "\n\n" if titles else ""
+
+
+class SectionContextStore:
+    """
+    Keeps a running digest of finished sections and builds a previous_sections
+    context capped to a token budget, instead of pasting every full section.
+    """
+
+    def __init__(self, token_budget: int = 1500, digest_tokens: int = 250):
+        self.token_budget = token_budget
+        self.digest_tokens = digest_tokens
+        self._digests: Dict[str, str] = {}
+        self._full_tokens: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        # Run statistics
+        self.builds = 0
+        self.tokens_sent = 0
+        self.tokens_full = 0
+
+    def add(self, title: str, content: str):
+        """Record a finished section"""
+        digest = summarize_section(content, self.digest_tokens)
+        with self._lock:
+            self._digests[title] = digest
+            self._full_tokens[title] = estimate_tokens(f"## {title}\n\n{content}\n\n")
+
+    def has(self, title: str) -> bool:
+        return title in self._digests
+
+    def build(self, ordered_titles: List[str], exclude: Optional[str] = None) -> str:
+        """
+        Build the context for a section from the finished sections in outline order.
+        The newest digests are kept in full; older ones collapse to their titles
+        once the token budget is exhausted. The whole context, that list of titles
+        included, stays within the budget.
+        """
+        with self._lock:
+            finished = [t for t in ordered_titles if t != exclude and t in self._digests]
+            full_tokens = sum(self._full_tokens[t] for t in finished)
+
+            if not finished:
+                return ""
+
+            header = "# Previously Written Sections (summaries)\n\n"
+            used = estimate_tokens(header)
+            blocks = []
+            collapsed = []
+
+            # Walk backwards so the most recent sections get the detailed digests
+            for i in range(len(finished) - 1, -1, -1):
+                title = finished[i]
+                # Room for the titles of the older sections, which are listed even when collapsed
+                reserve = estimate_tokens(_covered_line(finished[:i]))
+                digest = self._digests[title]
+                if not blocks:
+                    # The latest section's digest is shortened to the room left; it is
+                    # collapsed to its title too when not even that fits
+                    room = self.token_budget - used - reserve - estimate_tokens(f"## {title}\n\n\n")
+                    digest = truncate_to_tokens(digest, max(0, room - 1))
+                block = f"## {title}\n{digest}\n\n"
+                cost = estimate_tokens(block)
+                if used + cost + reserve > self.token_budget:
+                    collapsed = finished[:i + 1]
+                    break
+                blocks.append(block)
+                used += cost
+
+            context = header
+            line = _covered_line(collapsed)
+            room = self.token_budget - used
+            if estimate_tokens(line) > room:
+                # Only when the titles did not fit next to the header; keep the oldest that do
+                line = truncate_to_tokens(line.rstrip(), room - 2) + "\n\n" if room > 8 else ""
+            context += line
+            context += "".join(reversed(blocks))
+
+            self.builds += 1
+            self.tokens_full += full_tokens
+            self.tokens_sent += estimate_tokens(context)
+            return context
+
+    def stats(self) -> dict:
+        """Return how many context tokens were sent versus full concatenation"""
+        return {
+            "builds": self.builds,
+            "tokens_sent": self.tokens_sent,
+            "tokens_full": self.tokens_full,
+            "tokens_saved": max(0, self.tokens_full - self.tokens_sent),
+        }
@@ -0,0 +1,63 @@
+import threading
+from typing import Dict, Tuple
+
+from crewai import Crew
+
+from .fingerprint import llm_params, stable_hash
+
+_prototypes: Dict[type, Crew] = {}
+_configs: Dict[type, Tuple[dict, dict]] = {}
+_fingerprints: Dict[type, Dict[str, str]] = {}
+_lock = threading.Lock()
+
+
+def _prototype(crew_cls) -> Crew:
+    """Build (once per process) the prototype crew for a @CrewBase class"""
+    prototype = _prototypes.get(crew_cls)
+    if prototype is None:
+        with _lock:
+            prototype = _prototypes.get(crew_cls)
+            if prototype is None:
+                # CrewBase parses agents_config / tasks_config YAML here, and only here
+                instance = crew_cls()
+                prototype = instance.crew()
+                _configs[crew_cls] = (instance.agents_config, instance.tasks_config)
+                _prototypes[crew_cls] = prototype
+    return prototype
+
+
+def build_crew(crew_cls) -> Crew:
+    """
+    Return a crew ready for one kickoff.
+    The YAML config is parsed and the agents/tasks are created once per crew class;
+    each run gets its own copy, so concurrent kickoffs never share agent or task state.
+    The prototype itself is never kicked off.
+    """
+    return _prototype(crew_cls).copy()
+
+
+def crew_config(crew_cls) -> Tuple[dict, dict]:
+    """Return the parsed (agents_config, tasks_config) of a crew class"""
+    _prototype(crew_cls)
+    return _configs[crew_cls]
+
+
+def crew_fingerprint(crew_cls) -> Dict[str, str]:
+    """Hashes of a crew class's YAML config and of its agents' model parameters"""
+    fingerprint = _fingerprints.get(crew_cls)
+    if fingerprint is None:
+        prototype = _prototype(crew_cls)
+        fingerprint = {
+            "config": stable_hash(list(_configs[crew_cls])),
+            "model": stable_hash([llm_params(agent.llm) for agent in prototype.agents]),
+        }
+        _fingerprints[crew_cls] = fingerprint
+    return fingerprint
+
+
+def clear_crew_cache():
+    """Forget all prototypes, e.g. after editing a crew's YAML config"""
+    with _lock:
+        _prototypes.clear()
+        _configs.clear()
+        _fingerprints.clear()
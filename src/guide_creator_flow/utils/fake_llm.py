@@ -0,0 +1,201 @@
+import hashlib
+import json
+import math
+import os
+import random
+import threading
+import time
+from typing import Callable, Optional
+
+from .llm_cache import CachedLLM
+
+WORDS = (
+    "agent crew task tool flow memory context output workflow process delegate "
+    "manager planner research review structure pipeline prompt model schema "
+    "data result callback state event knowledge retrieval vector integration"
+).split()
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """
+    Latency distribution from a spec string:
+    "fixed:0.5", "uniform:0.2,1.5" or "lognormal:<median seconds>,<sigma>".
+    """
+    kind, _, args = (spec or "fixed:0").partition(":")
+    values = [float(v) for v in args.split(",") if v.strip()] or [0.0]
+    if kind == "uniform":
+        low, high = values[0], values[1] if len(values) > 1 else values[0]
+        return lambda rng: rng.uniform(low, high)
+    if kind == "lognormal":
+        median, sigma = values[0], values[1] if len(values) > 1 else 0.5
+        return lambda rng: rng.lognormvariate(math.log(max(median, 1e-6)), sigma)
+    return lambda rng: values[0]
+
+
+def _prompt_text(messages) -> str:
+    if isinstance(messages, str):
+        return messages
+    return "\n".join(str(m.get("content", "")) for m in messages)
+
+
+class MarkdownResponder:
+    """
+    Generates canned-but-plausible responses for the prompts our flows send:
+    JSON for response_format calls, course outlines with a JSON block, slide decks
+    and long-form lecture/section Markdown. Output depends only on the prompt.
+    """
+
+    def __init__(self, sections: int = 3, lectures: int = 3, paragraphs: int = 6):
+        self.sections = sections
+        self.lectures = lectures
+        self.paragraphs = paragraphs
+
+    def __call__(self, messages, response_format=None) -> str:
+        prompt = _prompt_text(messages)
+        rng = random.Random(hashlib.sha256(prompt.encode("utf-8")).hexdigest())
+
+        if response_format is not None and hasattr(response_format, "model_json_schema"):
+            schema = response_format.model_json_schema()
+            body = json.dumps(self._from_schema(schema, schema, rng, "item"), indent=2)
+        elif '"lectures"' in prompt or "course structure" in prompt.lower():
+            body = self._course_outline(rng)
+        elif "slide" in prompt.lower():
+            body = self._slides(rng)
+        else:
+            body = self._article(rng)
+
+        # CrewAI agents expect the ReAct final-answer format
+        if "Final Answer" in prompt:
+            return f"Thought: I now can give a great answer\nFinal Answer: {body}"
+        return body
+
+    def _words(self, rng: random.Random, count: int) -> str:
+        return " ".join(rng.choice(WORDS) for _ in range(count))
+
+    def _sentence(self, rng: random.Random) -> str:
+        return self._words(rng, rng.randint(8, 16)).capitalize() + "."
+
+    def _from_schema(self, node: dict, root: dict, rng: random.Random, name: str):
+        if "$ref" in node:
+            ref = node["$ref"].split("/")[-1]
+            return self._from_schema(root.get("$defs", {}).get(ref, {}), root, rng, name)
+        if "anyOf" in node:
+            options = [o for o in node["anyOf"] if o.get("type") != "null"] or node["anyOf"]
+            return self._from_schema(options[0], root, rng, name)
+
+        if "enum" in node:
+            return rng.choice(node["enum"])
+
+        kind = node.get("type", "string")
+        if kind == "object":
+            return {key: self._from_schema(value, root, rng, key)
+                    for key, value in node.get("properties", {}).items()}
+        if kind == "array":
+            count = self.sections if name == "sections" else self.lectures
+            singular = name[:-1] if name.endswith("s") else name
+            items = []
+            for i in range(count):
+                item = self._from_schema(node.get("items", {}), root, rng, f"{singular} {i + 1}")
+                # Keep titles unique, flows key their output by title
+                if isinstance(item, dict) and isinstance(item.get("title"), str):
+                    item["title"] = f"{singular.title()} {i + 1}: {item['title']}"
+                items.append(item)
+            return items
+        if kind in ("integer", "number"):
+            return rng.randint(1, 10)
+        if kind == "boolean":
+            return True
+        if name == "title":
+            return self._words(rng, 3).title()
+        if name.endswith(tuple("0123456789")):
+            return f"{name.title()}: {self._words(rng, 3).title()}"
+        return self._sentence(rng)
+
+    def _course_outline(self, rng: random.Random) -> str:
+        data = {"title": f"Course: {self._words(rng, 3).title()}", "sections": []}
+        lines = [f"# {data['title']}", ""]
+        for s in range(1, self.sections + 1):
+            section = {"title": f"Section {s}: {self._words(rng, 3).title()}", "lectures": []}
+            lines.append(f"## {section['title']}")
+            for l in range(1, self.lectures + 1):
+                lecture = {
+                    "title": f"{s}.{l} {self._words(rng, 3).title()}",
+                    "objective": self._sentence(rng),
+                    "activity": self._sentence(rng),
+                }
+                section["lectures"].append(lecture)
+                lines += [f"### Lecture {lecture['title']}",
+                          f"- Objective: {lecture['objective']}",
+                          f"- Activity: {lecture['activity']}"]
+            data["sections"].append(section)
+            lines.append("")
+        lines += ["```json", json.dumps(data, indent=2), "```"]
+        return "\n".join(lines)
+
+    def _slides(self, rng: random.Random) -> str:
+        slides = []
+        for i in range(1, 7):
+            bullets = "\n".join(f"- {self._sentence(rng)}" for _ in range(rng.randint(3, 5)))
+            slides.append(f"# [Slide {i}] {self._words(rng, 3).title()}\n{bullets}")
+        return "\n\n---\n\n".join(slides)
+
+    def _article(self, rng: random.Random) -> str:
+        parts = [f"## {self._words(rng, 4).title()}", ""]
+        for p in range(self.paragraphs):
+            if p % 3 == 2:
+                parts.append(f"### {self._words(rng, 3).title()}")
+                parts += [f"- {self._sentence(rng)}" for _ in range(4)]
+            else:
+                parts.append(" ".join(self._sentence(rng) for _ in range(5)))
+            parts.append("")
+        parts += ["```python", "crew = Crew(agents=[agent], tasks=[task])", "result = crew.kickoff()", "```"]
+        return "\n".join(parts)
+
+
+class FakeLLM(CachedLLM):
+    """
+    Deterministic offline stand-in for a provider, used for benchmarks.
+    It only replaces the provider call, so the cache and tracing layers still run,
+    and it sleeps according to a configurable latency distribution.
+    """
+
+    def __init__(self, *args, latency: Optional[str] = None, seed: int = 0,
+                 responder: Optional[Callable] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latency_spec = latency or os.getenv("FAKE_LLM_LATENCY", "fixed:0")
+        self._sample_latency = parse_latency(self.latency_spec)
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self.responder = responder or MarkdownResponder(
+            sections=int(os.getenv("FAKE_LLM_SECTIONS", "3")),
+            lectures=int(os.getenv("FAKE_LLM_LECTURES", "3")),
+            paragraphs=int(os.getenv("FAKE_LLM_PARAGRAPHS", "6")),
+        )
+        self.calls = 0
+
+    def _call_provider(self, messages, *args, **kwargs):
+        with self._rng_lock:
+            delay = self._sample_latency(self._rng)
+            self.calls += 1
+        response = self.responder(messages, self.response_format)
+        if self.stream and self._emit_chunks(response, delay):
+            return response
+        if delay > 0:
+            time.sleep(delay)
+        return response
+
+    def _emit_chunks(self, response: str, delay: float, pieces: int = 32) -> bool:
+        """Spread the response over the latency as stream chunk events, like a provider stream"""
+        try:
+            from crewai.utilities.events import crewai_event_bus
+            from crewai.utilities.events.llm_events import LLMStreamChunkEvent
+        except ImportError:
+            return False
+        size = max(1, math.ceil(len(response) / pieces))
+        for start in range(0, len(response), size):
+            time.sleep(delay / pieces)
+            crewai_event_bus.emit(self, event=LLMStreamChunkEvent(chunk=response[start:start + size]))
+        return True
+
+    def supports_function_calling(self) -> bool:
+        return False
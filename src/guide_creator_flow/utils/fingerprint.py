@@ -0,0 +1,140 @@
+"""
+Input fingerprints for generated artifacts (guide sections, lectures, slide decks).
+
+Each artifact records a hash per kind of input:
+
+- outline: its outline/curriculum entry
+- prompt: the task inputs the prompt template is rendered with
+- config: the crew's agents.yaml/tasks.yaml
+- model: the model parameters of the crew's agents
+
+The rebuild modes compare them with the current inputs and regenerate only
+what changed, make-style. Context assembled from other artifacts at run time
+(previous_sections) is left out, or every artifact would always look stale.
+"""
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, List, Optional
+
+from .llm_cache import _schema_of
+
+FINGERPRINT_PARTS = ("outline", "prompt", "config", "model")
+VOLATILE_INPUTS = ("previous_sections",)
+
+
+def stable_hash(value) -> str:
+    encoded = json.dumps(value, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:16]
+
+
+def llm_params(llm) -> dict:
+    """The parameters that change what a model generates (not keys, timeouts or streaming)"""
+    if llm is None or isinstance(llm, str):
+        return {"model": llm}
+    return {
+        "model": getattr(llm, "model", None),
+        "temperature": getattr(llm, "temperature", None),
+        "top_p": getattr(llm, "top_p", None),
+        "max_tokens": getattr(llm, "max_tokens", None),
+        "response_format": _schema_of(getattr(llm, "response_format", None)),
+    }
+
+
+def artifact_fingerprint(outline_entry, inputs: dict, crew_parts: Dict[str, str]) -> Dict[str, str]:
+    stable_inputs = {k: v for k, v in inputs.items() if k not in VOLATILE_INPUTS}
+    return {"outline": stable_hash(outline_entry), "prompt": stable_hash(stable_inputs), **crew_parts}
+
+
+def changed_parts(recorded: Optional[dict], current: Dict[str, str]) -> List[str]:
+    """Which inputs differ from the recorded fingerprint ("new" when there is none)"""
+    if not recorded:
+        return ["new"]
+    return [part for part in FINGERPRINT_PARTS if recorded.get(part) != current.get(part)]
+
+
+class RebuildPlan:
+    """What a rebuild would regenerate, and why"""
+
+    def __init__(self, kind: str = "artifacts"):
+        self.kind = kind
+        self.entries: List[tuple] = []
+
+    def add(self, name: str, reasons: List[str]):
+        self.entries.append((name, reasons))
+
+    @property
+    def stale(self) -> List[str]:
+        return [name for name, reasons in self.entries if reasons]
+
+    def format(self) -> str:
+        lines = [f"Rebuild plan: {len(self.stale)} of {len(self.entries)} {self.kind} to rebuild"]
+        for name, reasons in self.entries:
+            if not reasons:
+                lines.append(f"  keep     {name}")
+            elif reasons[0] in ("new", "missing"):
+                lines.append(f"  rebuild  {name}  ({reasons[0]})")
+            else:
+                lines.append(f"  rebuild  {name}  ({', '.join(reasons)} changed)")
+        return "\n".join(lines)
+
+
+class BuildManifest:
+    """
+    Fingerprints and output paths of the artifacts of one build, plus the inputs
+    the build was started with, in a JSON file next to the outputs.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.data = {"inputs": {}, "artifacts": {}}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.data = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable manifest {path}: {e}")
+        self.data.setdefault("inputs", {})
+        self.data.setdefault("artifacts", {})
+
+    @property
+    def inputs(self) -> dict:
+        return self.data["inputs"]
+
+    def set_inputs(self, inputs: dict):
+        with self._lock:
+            self.data["inputs"] = inputs
+            self._save()
+
+    def record(self, name: str, path: str, fingerprint: Dict[str, str]):
+        with self._lock:
+            self.data["artifacts"][name] = {"path": path, "fingerprint": fingerprint}
+            self._save()
+
+    def fingerprint(self, name: str) -> Optional[dict]:
+        return (self.data["artifacts"].get(name) or {}).get("fingerprint")
+
+    def output_path(self, name: str) -> Optional[str]:
+        """The recorded output of an artifact, if it is still on disk"""
+        path = (self.data["artifacts"].get(name) or {}).get("path")
+        if path and os.path.isfile(path) and os.path.getsize(path) > 0:
+            return path
+        return None
+
+    def reasons(self, name: str, current: Dict[str, str]) -> List[str]:
+        """Why an artifact must be rebuilt (empty when it is up to date)"""
+        reasons = changed_parts(self.fingerprint(name), current)
+        if not reasons and self.output_path(name) is None:
+            reasons = ["missing"]
+        return reasons
+
+    def _save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(tmp, self.path)
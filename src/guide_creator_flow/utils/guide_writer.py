@@ -0,0 +1,152 @@
+import contextvars
+import os
+import re
+import threading
+from typing import Dict, List, Optional
+
+from .outline_stream import outline_streaming
+from .tracing import current_span
+
+# Stream tokens from the provider into output/sections/<section>.partial.md as they arrive
+STREAM_TOKENS = os.getenv("GUIDE_STREAM_TOKENS", "").lower() in ("1", "true", "yes")
+
+
+def section_file_name(title: str) -> str:
+    """File name stem for a section title (drafts and saved sections)"""
+    return re.sub(r'[\\/*?:"<>|]', "", title).strip() or "section"
+
+
+def _sync(f):
+    """Push written data to disk so readers (and crashes) see every finished section"""
+    f.flush()
+    os.fsync(f.fileno())
+
+
+class OrderedGuideWriter:
+    """
+    Appends guide sections to the output file in outline order as they complete.
+    Sections that finish early are held back until every section before them has
+    been written, so the file is always a readable prefix of the final guide.
+    Sections are addressed by outline index, so two sections may share a title.
+    With a streamed outline, titles are added as they arrive and nothing is
+    flushed before the header.
+    """
+
+    def __init__(self, path: str, titles: List[str]):
+        self.path = path
+        self.titles = list(titles)
+        self.next_index = 0
+        self.bytes_written = 0
+        self._pending: Dict[int, str] = {}
+        self._header_written = False
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "w", encoding="utf-8")
+
+    def _write(self, text: str):
+        self._file.write(text)
+        self.bytes_written += len(text.encode("utf-8"))
+
+    def add_title(self, index: int, title: str):
+        """Register the section at an outline index that became known after the writer was created"""
+        with self._lock:
+            self.titles.extend([None] * (index + 1 - len(self.titles)))
+            self.titles[index] = title
+
+    def write_header(self, title: str, introduction: str) -> int:
+        """Write the title and introduction; returns how many held-back sections followed"""
+        with self._lock:
+            self._write(f"# {title}\n\n## Introduction\n\n{introduction}\n\n")
+            self._header_written = True
+            flushed = self._flush()
+            _sync(self._file)
+            return flushed
+
+    def _flush(self) -> int:
+        flushed = 0
+        while self._header_written and self.next_index in self._pending:
+            self._write(f"\n\n{self._pending.pop(self.next_index)}\n\n")
+            self.next_index += 1
+            flushed += 1
+        return flushed
+
+    def complete(self, index: int, content: str) -> int:
+        """Mark the section at an outline index done; returns how many sections were flushed to disk"""
+        with self._lock:
+            self._pending[index] = content
+            flushed = self._flush()
+            if flushed:
+                _sync(self._file)
+            return flushed
+
+    def close(self, conclusion: Optional[str] = None):
+        with self._lock:
+            if self._file.closed:
+                return
+            if conclusion is not None:
+                self._write(f"## Conclusion\n\n{conclusion}\n\n")
+            self._file.close()
+
+
+_stream_lock = threading.Lock()
+_stream_registered = False
+# Per-run stream directory; a context variable so concurrent guides stream to their own folders
+_stream_dir: contextvars.ContextVar = contextvars.ContextVar("stream_dir", default=None)
+_stream_files: Dict[tuple, object] = {}
+
+
+def _section_of_current_span() -> Optional[str]:
+    s = current_span()
+    while s is not None:
+        if "section" in s.attrs:
+            return s.attrs["section"]
+        s = s.parent
+    return None
+
+
+def _on_stream_chunk(_source, event):
+    directory = _stream_dir.get()
+    if directory is None or outline_streaming():
+        return
+    section = _section_of_current_span() or "unassigned"
+    with _stream_lock:
+        f = _stream_files.get((directory, section))
+        if f is None:
+            f = open(os.path.join(directory, f"{section_file_name(section)}.partial.md"), "w", encoding="utf-8")
+            _stream_files[(directory, section)] = f
+        f.write(event.chunk)
+        f.flush()
+
+
+def stream_section_tokens(directory: str = os.path.join("output", "sections")) -> bool:
+    """
+    Tee provider stream chunks into one partial file per section while it is written.
+    Chunks are attributed through the tracing span of the section that is running
+    (contextvars follow crews into kickoff_async threads). Returns False when the
+    installed CrewAI does not emit stream chunk events.
+    """
+    global _stream_registered
+    try:
+        from crewai.utilities.events import crewai_event_bus
+        from crewai.utilities.events.llm_events import LLMStreamChunkEvent
+    except ImportError:
+        return False
+
+    with _stream_lock:
+        if not _stream_registered:
+            crewai_event_bus.on(LLMStreamChunkEvent)(_on_stream_chunk)
+            _stream_registered = True
+    os.makedirs(directory, exist_ok=True)
+    _stream_dir.set(directory)
+    return True
+
+
+def finish_section_stream(section: str):
+    """Close the partial file of a finished section"""
+    with _stream_lock:
+        f = _stream_files.pop((_stream_dir.get(), section), None)
+        if f is not None:
+            f.close()
@@ -0,0 +1,220 @@
+"""
+HTML export for generated guides and lecture trees.
+
+Pages are assembled from per-section (guide) or per-lecture fragments. Each
+fragment is rendered from the shared Markdown AST (utils/markdown_ast.py) and
+cached on disk under the hash of its Markdown, so re-exporting after an edit
+only renders the sections that changed.
+
+    python -m guide_creator_flow.utils.html_export --guide output/complete_guide.md
+    python -m guide_creator_flow.utils.html_export --lectures output/lectures --out output/html
+"""
+import argparse
+import hashlib
+import html
+import os
+import threading
+from typing import List, Optional
+
+from .markdown_ast import block_html, parse_cached, plain
+from .tracing import span
+
+DEFAULT_FRAGMENT_CACHE = os.path.join(".cache", "html_fragments")
+# Bump when the HTML produced for the same Markdown changes
+RENDER_VERSION = "2"
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="UTF-8">
+<title>{title}</title>
+<style>
+body {{ max-width: 52rem; margin: 2rem auto; padding: 0 1rem; font: 16px/1.6 -apple-system, "Segoe UI", Helvetica, Arial, sans-serif; color: #24292f; }}
+pre {{ background: #f6f8fa; padding: 1rem; overflow-x: auto; border-radius: 6px; }}
+code {{ font-family: ui-monospace, Consolas, monospace; font-size: 0.9em; }}
+blockquote {{ margin: 0; padding: 0 1rem; color: #57606a; border-left: 0.25rem solid #d0d7de; }}
+table {{ border-collapse: collapse; }} th, td {{ border: 1px solid #d0d7de; padding: 0.4rem 0.8rem; }}
+nav a {{ display: block; }}
+</style>
+</head>
+<body>
+{body}
+</body>
+</html>
+"""
+
+
+class FragmentCache:
+    """Rendered HTML fragments on disk, one file per Markdown content hash"""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or os.getenv("HTML_FRAGMENT_CACHE", DEFAULT_FRAGMENT_CACHE)
+        os.makedirs(self.directory, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def key(self, markdown_text: str) -> str:
+        return hashlib.sha1(f"{RENDER_VERSION}\n{markdown_text}".encode("utf-8")).hexdigest()
+
+    def get_or_render(self, markdown_text: str, render) -> str:
+        path = os.path.join(self.directory, f"{self.key(markdown_text)}.html")
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                fragment = f.read()
+            with self._lock:
+                self.hits += 1
+            return fragment
+        except FileNotFoundError:
+            pass
+
+        fragment = render()
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(fragment)
+        os.replace(tmp, path)
+        with self._lock:
+            self.misses += 1
+        return fragment
+
+    def format_stats(self) -> str:
+        return f"HTML fragments: {self.misses} rendered, {self.hits} reused from {self.directory}"
+
+
+_default_cache: Optional[FragmentCache] = None
+_default_lock = threading.Lock()
+
+
+def get_fragment_cache() -> FragmentCache:
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = FragmentCache()
+        return _default_cache
+
+
+def section_fragments(markdown_text: str, cache: FragmentCache, level: int = 2) -> List[str]:
+    """Split a document at headings of this level or higher and render each part through the cache"""
+    document = parse_cached(markdown_text)
+    fragments = []
+    for section in document.sections(level):
+        start = section.heading.start if section.heading is not None else section.start
+        source = document.source(start, section.end)
+        blocks = ([section.heading] if section.heading is not None else []) + section.blocks
+        fragments.append(cache.get_or_render(source, lambda: "\n".join(block_html(b) for b in blocks)))
+    return fragments
+
+
+def write_page(path: str, title: str, fragments: List[str]) -> bool:
+    """Write an HTML page from fragments; returns False when the file was already up to date"""
+    body = "\n".join(f"<section>\n{fragment}\n</section>" for fragment in fragments)
+    page = PAGE_TEMPLATE.format(title=html.escape(title), body=body)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            if f.read() == page:
+                return False
+    except FileNotFoundError:
+        pass
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with span("file.save", path=path):
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(page)
+        os.replace(tmp, path)
+    return True
+
+
+def _read(path: str) -> str:
+    for encoding in ("utf-8", "utf-8-sig", "latin-1"):
+        try:
+            with open(path, "r", encoding=encoding) as f:
+                return f.read()
+        except UnicodeDecodeError:
+            continue
+    raise ValueError(f"Cannot decode {path}")
+
+
+def _title_of(markdown_text: str, fallback: str) -> str:
+    """First level-1 heading, found without parsing (unchanged lectures are never parsed)"""
+    for line in markdown_text.splitlines():
+        if line.startswith("# "):
+            return plain(line[2:].strip().rstrip("#").strip())
+    return fallback
+
+
+def export_guide_html(markdown_path: str, html_path: Optional[str] = None,
+                      cache: Optional[FragmentCache] = None) -> str:
+    """Export a guide to HTML with one cached fragment per section; returns the HTML path"""
+    cache = cache or get_fragment_cache()
+    html_path = html_path or os.path.splitext(markdown_path)[0] + ".html"
+    with span("html.export", path=html_path):
+        text = _read(markdown_path)
+        title = _title_of(text, os.path.splitext(os.path.basename(markdown_path))[0])
+        write_page(html_path, title, section_fragments(text, cache))
+    return html_path
+
+
+def export_lectures_html(lectures_dir: str = os.path.join("output", "lectures"),
+                         html_dir: str = os.path.join("output", "html"),
+                         order: Optional[List[str]] = None, title: str = "Course Lectures",
+                         cache: Optional[FragmentCache] = None) -> List[str]:
+    """
+    Export every lecture under lectures_dir to its own page in html_dir/lectures/,
+    plus html_dir/course.html with all lectures in `order` (Markdown paths relative
+    to lectures_dir; defaults to sorted file order). Each lecture is one cached
+    fragment shared by its page and the course page. Returns the pages written.
+    """
+    cache = cache or get_fragment_cache()
+    if order is None:
+        order = sorted(
+            os.path.relpath(os.path.join(root, name), lectures_dir)
+            for root, _, files in os.walk(lectures_dir) for name in files if name.endswith(".md")
+        )
+
+    written, course_fragments, toc = [], [], []
+    with span("html.export", path=html_dir, lectures=len(order)):
+        for relative in order:
+            source = os.path.join(lectures_dir, relative)
+            if not os.path.exists(source):
+                continue
+            text = _read(source)
+            fragment = cache.get_or_render(text, lambda: parse_cached(text).to_html())
+            lecture_title = _title_of(text, os.path.splitext(os.path.basename(relative))[0])
+
+            page = os.path.join(html_dir, "lectures", os.path.splitext(relative)[0] + ".html")
+            if write_page(page, lecture_title, [fragment]):
+                written.append(page)
+            anchor = f"lecture-{len(course_fragments) + 1}"
+            toc.append(f'<a href="#{anchor}">{html.escape(lecture_title)}</a>')
+            course_fragments.append(f'<div id="{anchor}">\n{fragment}\n</div>')
+
+        course_page = os.path.join(html_dir, "course.html")
+        nav = f"<h1>{html.escape(title)}</h1>\n<nav>\n" + "\n".join(toc) + "\n</nav>"
+        if write_page(course_page, title, [nav] + course_fragments):
+            written.append(course_page)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export generated Markdown to HTML")
+    parser.add_argument("--guide", action="append", default=[], help="Guide Markdown file (repeatable)")
+    parser.add_argument("--lectures", default=None, help="Lecture tree, e.g. output/lectures")
+    parser.add_argument("--out", default=os.path.join("output", "html"), help="Output directory for --lectures")
+    args = parser.parse_args()
+    if not args.guide and not args.lectures:
+        parser.error("nothing to export: pass --guide and/or --lectures")
+
+    cache = get_fragment_cache()
+    for guide in args.guide:
+        print(f"HTML guide saved to {export_guide_html(guide, cache=cache)}")
+    if args.lectures:
+        pages = export_lectures_html(args.lectures, args.out, cache=cache)
+        print(f"HTML lectures: {len(pages)} pages updated in {args.out}")
+    print(cache.format_stats())
+
+
+if __name__ == "__main__":
+    main()
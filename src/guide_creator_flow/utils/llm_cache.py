@@ -0,0 +1,296 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Optional
+
+from crewai import LLM
+
+from .cassette import get_cassette
+from .context_store import estimate_tokens
+from .rate_limiter import estimate_request_tokens, get_limiter
+from .tracing import record_llm_call, span
+
+DEFAULT_CACHE_PATH = os.path.join(".cache", "llm_cache.sqlite")
+
+
+def _schema_of(response_format) -> Optional[object]:
+    """Turn a response_format (Pydantic class, dict or None) into something JSON-serializable"""
+    if response_format is None:
+        return None
+    if hasattr(response_format, "model_json_schema"):
+        return response_format.model_json_schema()
+    if isinstance(response_format, dict):
+        return response_format
+    return str(response_format)
+
+
+def make_cache_key(model: str, messages, temperature=None, response_format=None) -> str:
+    """Content-addressed key for an LLM request"""
+    if isinstance(messages, str):
+        messages = [{"role": "user", "content": messages}]
+    payload = {
+        "model": model,
+        "messages": messages,
+        "temperature": temperature,
+        "response_format": _schema_of(response_format),
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    On-disk LLM response cache shared by every flow and process on the machine.
+    Backed by SQLite in WAL mode, evicts least recently used entries once the
+    entry or size limit is exceeded, and optionally expires entries after a TTL.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_entries: int = 5000,
+                 max_bytes: int = 256 * 1024 * 1024, ttl_seconds: Optional[float] = None):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+
+        self._local = threading.local()
+        self._guard = threading.Lock()
+        self._inflight = {}
+
+        # Statistics for this process
+        self.hits = 0
+        self.misses = 0
+        self.collapsed = 0
+        self.bypassed = 0
+        self.evictions = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                model TEXT,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries(last_access)")
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread; SQLite connections must not be shared"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[str]:
+        conn = self._conn()
+        row = conn.execute("SELECT response, created FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+
+        response, created = row
+        now = time.time()
+        if self.ttl_seconds is not None and now - created > self.ttl_seconds:
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            conn.commit()
+            return None
+
+        conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+        conn.commit()
+        return response
+
+    def put(self, key: str, model: str, response: str):
+        conn = self._conn()
+        now = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO entries (key, model, response, size, created, last_access) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (key, model, response, len(response.encode("utf-8")), now, now),
+        )
+        self._evict(conn)
+        conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection):
+        """Drop least recently used entries until the cache is within its limits"""
+        if self.ttl_seconds is not None:
+            cursor = conn.execute("DELETE FROM entries WHERE created < ?", (time.time() - self.ttl_seconds,))
+            self.evictions += cursor.rowcount
+
+        count, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        while count > self.max_entries or size > self.max_bytes:
+            excess = max(count - self.max_entries, 1)
+            rows = conn.execute(
+                "SELECT key, size FROM entries ORDER BY last_access ASC LIMIT ?", (excess,)
+            ).fetchall()
+            if not rows:
+                break
+            conn.executemany("DELETE FROM entries WHERE key = ?", [(k,) for k, _ in rows])
+            self.evictions += len(rows)
+            count -= len(rows)
+            size -= sum(s for _, s in rows)
+
+    def get_or_compute(self, key: str, model: str, compute: Callable[[], object]):
+        """
+        Return the cached response for key, or compute and store it.
+        Identical requests running at the same time in this process wait for the
+        first one instead of calling the provider again.
+        """
+        cached = self.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        with self._guard:
+            entry = self._inflight.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                cached = self.get(key)
+                if cached is not None:
+                    self.collapsed += 1
+                    return cached
+
+                self.misses += 1
+                response = compute()
+                # Only plain text completions are cacheable (tool calls are not)
+                if isinstance(response, str) and response.strip():
+                    self.put(key, model, response)
+                return response
+        finally:
+            with self._guard:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._inflight[key]
+
+    def stats(self) -> dict:
+        count, size = self._conn().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+        lookups = self.hits + self.misses + self.collapsed
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "collapsed": self.collapsed,
+            "bypassed": self.bypassed,
+            "evictions": self.evictions,
+            "hit_rate": round((self.hits + self.collapsed) / lookups, 3) if lookups else 0.0,
+            "entries": count,
+            "bytes": size,
+        }
+
+    def format_stats(self) -> str:
+        s = self.stats()
+        return (f"LLM cache: {s['hits']} hits, {s['collapsed']} collapsed, {s['misses']} misses, "
+                f"{s['bypassed']} bypassed (hit rate {s['hit_rate']:.0%}), "
+                f"{s['entries']} entries / {s['bytes'] / 1024:.0f} KB on disk")
+
+
+_default_cache: Optional[LLMCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache() -> Optional[LLMCache]:
+    """Process-wide cache configured from the environment; None when disabled"""
+    global _default_cache
+    if os.getenv("LLM_CACHE_DISABLED", "").lower() in ("1", "true", "yes"):
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            ttl = os.getenv("LLM_CACHE_TTL_SECONDS")
+            _default_cache = LLMCache(
+                path=os.getenv("LLM_CACHE_PATH", DEFAULT_CACHE_PATH),
+                max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000")),
+                max_bytes=int(float(os.getenv("LLM_CACHE_MAX_MB", "256")) * 1024 * 1024),
+                ttl_seconds=float(ttl) if ttl else None,
+            )
+        return _default_cache
+
+
+class CachedLLM(LLM):
+    """
+    LLM whose plain completions are served from the shared on-disk cache.
+    Cache misses go to the provider through the per-model rate limiter.
+    """
+
+    def __init__(self, *args, cache: Optional[LLMCache] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache = cache if cache is not None else get_default_cache()
+
+    def call(self, messages, *args, **kwargs):
+        cassette = get_cassette()
+        with span("llm.call") as s:
+            outcome = {"cache": None, "latency_s": None}
+            try:
+                if cassette is None:
+                    response = self._call_cached(messages, outcome, *args, **kwargs)
+                elif cassette.replaying:
+                    # Served entirely from the recording: no cache, limiter or provider
+                    outcome["cache"] = "replay"
+                    response = cassette.play(self._request_key(messages), messages)
+                else:
+                    response = self._call_cached(messages, outcome, *args, **kwargs)
+                    cassette.record(self._request_key(messages), self.model, response,
+                                    outcome["latency_s"], messages=messages, cache=outcome["cache"])
+            except Exception:
+                # CrewAI retries failed calls, so each failure is counted as a retry
+                s.model = self.model
+                s.add_usage(llm_calls=1, retries=1)
+                raise
+            record_llm_call(s, self.model, messages, response, outcome["cache"])
+            return response
+
+    def _call_cached(self, messages, outcome: dict, *args, **kwargs):
+        tools = kwargs.get("tools", args[0] if len(args) > 0 else None)
+        available_functions = kwargs.get("available_functions", args[2] if len(args) > 2 else None)
+
+        if self.cache is None:
+            outcome["cache"] = "disabled"
+            return self._timed_provider_call(messages, outcome, *args, **kwargs)
+
+        # Function calling has side effects, so it always goes to the provider
+        if tools or available_functions:
+            self.cache.bypassed += 1
+            outcome["cache"] = "bypass"
+            return self._timed_provider_call(messages, outcome, *args, **kwargs)
+
+        def compute():
+            outcome["cache"] = "miss"
+            return self._timed_provider_call(messages, outcome, *args, **kwargs)
+
+        outcome["cache"] = "hit"
+        return self.cache.get_or_compute(self._request_key(messages), self.model, compute)
+
+    def _request_key(self, messages) -> str:
+        return make_cache_key(self.model, messages, self.temperature, self.response_format)
+
+    def _timed_provider_call(self, messages, outcome: dict, *args, **kwargs):
+        """Provider call whose duration goes into outcome; cache hits leave latency_s at None"""
+        started = time.monotonic()
+        response = self._call_provider(messages, *args, **kwargs)
+        outcome["latency_s"] = time.monotonic() - started
+        return response
+
+    def _call_provider(self, messages, *args, **kwargs):
+        """Real provider call, paced by the shared per-model rate limiter"""
+        limiter = get_limiter(self.model)
+        estimated = estimate_request_tokens(messages, getattr(self, "max_tokens", None))
+        with limiter.slot(estimated):
+            response = super().call(messages, *args, **kwargs)
+
+        # Give back the part of the token reservation the completion did not use
+        if isinstance(response, str):
+            used = estimate_request_tokens(messages, estimate_tokens(response))
+            if used < estimated:
+                limiter.tokens.refund(estimated - used)
+        return response
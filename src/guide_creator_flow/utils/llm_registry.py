@@ -0,0 +1,84 @@
+import os
+import threading
+from typing import Dict, Tuple
+
+import httpx
+import litellm
+
+from .llm_cache import CachedLLM
+
+# Connection pool settings for the OpenAI-SDK providers; LLM_HTTP_TIMEOUT is also every LLM's call timeout
+LLM_HTTP_TIMEOUT = float(os.getenv("LLM_HTTP_TIMEOUT", "120"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "32"))
+LLM_MAX_KEEPALIVE = int(os.getenv("LLM_MAX_KEEPALIVE", "16"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60"))
+
+_llms: Dict[Tuple, CachedLLM] = {}
+_lock = threading.Lock()
+_http_client = None
+
+
+def _freeze(value):
+    """Make LLM parameters usable as part of a dict key"""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def configure_http_pool() -> httpx.Client:
+    """
+    Install one keep-alive HTTP client as litellm.client_session.
+    litellm only passes it to providers it calls through the OpenAI SDK (openai/, azure/
+    and OpenAI-compatible endpoints), so those calls share this pool and its limits.
+    Gemini and Anthropic go through litellm's own HTTP handlers and keep its default
+    client handling; this pool and LLM_MAX_* do not apply to them.
+    httpx.Client is thread-safe, which covers crews running through kickoff_async.
+    """
+    global _http_client
+    with _lock:
+        if _http_client is None:
+            _http_client = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=LLM_MAX_CONNECTIONS,
+                    max_keepalive_connections=LLM_MAX_KEEPALIVE,
+                    keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+                ),
+                timeout=httpx.Timeout(LLM_HTTP_TIMEOUT, connect=10.0),
+            )
+            litellm.client_session = _http_client
+    return _http_client
+
+
+def get_llm(model: str, **params) -> CachedLLM:
+    """
+    Return the shared LLM handle for a model and parameter set.
+    Calling this twice with the same arguments returns the same object, so crews,
+    flows and direct llm.call() users all share one client per configuration.
+    """
+    configure_http_pool()
+    params.setdefault("timeout", LLM_HTTP_TIMEOUT)
+    key = (model, _freeze(params))
+
+    llm = _llms.get(key)
+    if llm is None:
+        with _lock:
+            llm = _llms.get(key)
+            if llm is None:
+                llm = _llm_class()(model=model, **params)
+                _llms[key] = llm
+    return llm
+
+
+def _llm_class():
+    """LLM_FAKE=1 swaps every provider for the deterministic offline FakeLLM (benchmarks)"""
+    if os.getenv("LLM_FAKE", "").lower() in ("1", "true", "yes"):
+        from .fake_llm import FakeLLM
+        return FakeLLM
+    return CachedLLM
+
+
+def registered_llms() -> list:
+    """List the models currently handed out by the registry"""
+    return [key[0] for key in _llms]
@@ -0,0 +1,434 @@
+"""
+Single-pass Markdown parser shared by every exporter (PPTX decks, HTML, slide
+planning, the crew's Markdown reader).
+
+iter_blocks() walks the lines once and yields each block as soon as it is
+complete; parse_cached()/load_document() keep the resulting Document keyed by
+content hash, so an artifact is parsed once per run no matter how many
+exporters read it. Documents are shared between consumers: treat them as
+read-only.
+"""
+import hashlib
+import html
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Iterable, Iterator, List, Optional
+
+# Parsed documents kept in memory (least recently used are dropped)
+MARKDOWN_CACHE_SIZE = int(os.getenv("MARKDOWN_CACHE_SIZE", "64"))
+
+_HEADING = re.compile(r"^ {0,3}(#{1,6})(?:[ \t]+(.*?))?(?:[ \t]+#+)?[ \t]*$")
+_FENCE = re.compile(r"^ {0,3}(`{3,}|~{3,})[ \t]*([^`\s]*)")
+_RULE = re.compile(r"^ {0,3}([-*_])(?:[ \t]*\1){2,}[ \t]*$")
+_LIST_ITEM = re.compile(r"^([ \t]*)([-*+]|\d{1,9}[.)])[ \t]+(.*)$")
+_QUOTE = re.compile(r"^ {0,3}>[ \t]?(.*)$")
+_SETEXT = re.compile(r"^ {0,3}(=+|-+)[ \t]*$")
+_TABLE_RULE = re.compile(r"^[ \t]*\|?[ \t]*:?-+:?[ \t]*(\|[ \t]*:?-+:?[ \t]*)*\|?[ \t]*$")
+
+_CODE_SPAN = re.compile(r"(`+)(.+?)\1")
+_IMAGE = re.compile(r"!\[([^\]]*)\]\(([^)\s]+)(?:\s+\"[^\"]*\")?\)")
+# Images and links in one pass over the raw text (group 1 is "!" for images)
+_IMAGE_OR_LINK = re.compile(r"(!?)\[([^\]]*)\]\(([^)\s]+)(?:\s+\"[^\"]*\")?\)")
+_PLACEHOLDER = re.compile(r"\x00(\d+)\x00")
+_LINK = re.compile(r"\[([^\]]+)\]\(([^)\s]+)(?:\s+\"[^\"]*\")?\)")
+_STRONG = re.compile(r"(\*\*|__)(?=\S)(.+?)(?<=\S)\1")
+_EM = re.compile(r"(?<![\w*])(\*|_)(?=[^\s*_])([^*_]+?)(?<=\S)\1(?![\w*])")
+_STRIKE = re.compile(r"~~(?=\S)(.+?)(?<=\S)~~")
+
+
+class Block:
+    """
+    One block of a Markdown document. kind is heading, paragraph, list, code,
+    quote, table or rule. text holds the inline source (code: the raw code),
+    items the (depth, text) pairs of a list or the cell rows of a table, and
+    start/end the line span in the source.
+    """
+    __slots__ = ("kind", "text", "level", "items", "ordered", "lang", "start", "end")
+
+    def __init__(self, kind: str, start: int, end: int, text: str = "", level: int = 0,
+                 items: Optional[list] = None, ordered: bool = False, lang: str = ""):
+        self.kind = kind
+        self.text = text
+        self.level = level
+        self.items = items if items is not None else []
+        self.ordered = ordered
+        self.lang = lang
+        self.start = start
+        self.end = end
+
+    def __repr__(self):
+        return f"Block({self.kind!r}, {self.text[:40]!r}, lines {self.start}-{self.end})"
+
+
+class DocSection:
+    """The blocks under one heading (heading is None for text before the first one)"""
+    __slots__ = ("heading", "blocks", "start", "end")
+
+    def __init__(self, heading: Optional[Block], blocks: List[Block], start: int, end: int):
+        self.heading = heading
+        self.blocks = blocks
+        self.start = start
+        self.end = end
+
+    @property
+    def title(self) -> str:
+        return plain(self.heading.text) if self.heading is not None else ""
+
+
+class Document:
+    def __init__(self, text: str, blocks: List[Block]):
+        self.text = text
+        self.blocks = blocks
+        self._lines = None
+
+    @property
+    def lines(self) -> List[str]:
+        if self._lines is None:
+            self._lines = self.text.splitlines()
+        return self._lines
+
+    def source(self, start: int, end: int) -> str:
+        """The original Markdown of a line span"""
+        return "\n".join(self.lines[start:end])
+
+    def headings(self, max_level: int = 6) -> List[Block]:
+        return [b for b in self.blocks if b.kind == "heading" and b.level <= max_level]
+
+    def sections(self, level: int = 6) -> List[DocSection]:
+        """Split at every heading of this level or higher; the body excludes the heading line"""
+        sections = []
+        current = DocSection(None, [], 0, 0)
+        for block in self.blocks:
+            if block.kind == "heading" and block.level <= level:
+                if current.heading is not None or current.blocks:
+                    sections.append(current)
+                current = DocSection(block, [], block.end, block.end)
+                continue
+            current.blocks.append(block)
+            current.end = block.end
+        if current.heading is not None or current.blocks:
+            sections.append(current)
+        return sections
+
+    def to_html(self) -> str:
+        return "\n".join(block_html(block) for block in self.blocks)
+
+
+# --- Parsing ---
+
+def iter_blocks(lines: Iterable[str]) -> Iterator[Block]:
+    """Parse Markdown lines in one pass, yielding each block once it is complete"""
+    para: List[str] = []
+    para_start = 0
+    items: List[list] = []  # [depth, text] pairs of the open list
+    list_start, list_ordered, list_indents = 0, False, []
+    quote: List[str] = []
+    quote_start = 0
+    rows: List[List[str]] = []
+    table_start = 0
+    fence = None  # (marker, lang, start, lines) while inside a code fence
+    blank_in_list = False
+    index = -1
+
+    def flush_para(end):
+        nonlocal para
+        if para:
+            block = Block("paragraph", para_start, end, text="\n".join(para))
+            para = []
+            return block
+        return None
+
+    def flush_list(end):
+        nonlocal items, list_indents
+        if items:
+            block = Block("list", list_start, end, items=[(d, t) for d, t in items], ordered=list_ordered)
+            items, list_indents = [], []
+            return block
+        return None
+
+    def flush_quote(end):
+        nonlocal quote
+        if quote:
+            block = Block("quote", quote_start, end, text="\n".join(quote).strip())
+            quote = []
+            return block
+        return None
+
+    def flush_table(end):
+        nonlocal rows
+        if rows:
+            block = Block("table", table_start, end, items=rows)
+            rows = []
+            return block
+        return None
+
+    def flush_all(end, keep_list=False):
+        flushes = (flush_para, flush_quote, flush_table) if keep_list else (flush_para, flush_list, flush_quote, flush_table)
+        for flush in flushes:
+            block = flush(end)
+            if block is not None:
+                yield block
+
+    for index, raw in enumerate(lines):
+        line = raw.rstrip("\r\n")
+
+        if fence is not None:
+            marker, lang, start, code = fence
+            stripped = line.strip()
+            if stripped.startswith(marker) and set(stripped) == {marker[0]}:
+                yield Block("code", start, index + 1, text="\n".join(code), lang=lang)
+                fence = None
+            else:
+                code.append(line)
+            continue
+
+        first = line.lstrip()[:1]
+        if not first:
+            # A blank line closes paragraphs, quotes and tables; a list may go on after it
+            yield from flush_all(index, keep_list=True)
+            if items:
+                blank_in_list = True
+            continue
+
+        # Only try the patterns the first character allows; most lines are plain text
+        if first in "`~":
+            match = _FENCE.match(line)
+            if match:
+                yield from flush_all(index)
+                fence = (match.group(1), match.group(2), index, [])
+                continue
+
+        if first in "=-" and para and not items:
+            match = _SETEXT.match(line)
+            if match:
+                text = "\n".join(para)
+                para = []
+                yield Block("heading", para_start, index + 1, text=text, level=1 if match.group(1)[0] == "=" else 2)
+                continue
+
+        if first == "#":
+            match = _HEADING.match(line)
+            if match:
+                yield from flush_all(index)
+                yield Block("heading", index, index + 1, text=(match.group(2) or "").strip(),
+                            level=len(match.group(1)))
+                continue
+
+        if first in "-*_" and _RULE.match(line):
+            yield from flush_all(index)
+            yield Block("rule", index, index + 1)
+            continue
+
+        match = _LIST_ITEM.match(line) if first in "-*+" or first.isdigit() else None
+        if match and (items or not para or match.group(2) in "-*+" or match.group(2)[:-1] == "1"):
+            indent = len(match.group(1).expandtabs(4))
+            ordered = match.group(2)[-1] in ".)"
+            if items and indent <= list_indents[0] and ordered != list_ordered:
+                # A different kind of list at the top level starts a new block
+                yield flush_list(index)
+            if not items:
+                yield from flush_all(index)
+                list_start, list_ordered, list_indents = index, ordered, [indent]
+            while len(list_indents) > 1 and indent < list_indents[-1]:
+                list_indents.pop()
+            if indent > list_indents[-1]:
+                list_indents.append(indent)
+            items.append([len(list_indents) - 1, match.group(3).strip()])
+            blank_in_list = False
+            continue
+
+        if items:
+            if line[:1] in (" ", "\t") or not blank_in_list:
+                # Continuation of the last item
+                items[-1][1] += " " + line.strip()
+                continue
+            yield flush_list(index)
+
+        if first == ">":
+            match = _QUOTE.match(line)
+            if match:
+                for block in (flush_para(index), flush_table(index)):
+                    if block is not None:
+                        yield block
+                if not quote:
+                    quote_start = index
+                quote.append(match.group(1))
+                continue
+        if quote:
+            quote.append(line.strip())  # lazy continuation
+            continue
+
+        if first == "|":
+            if not rows:
+                block = flush_para(index)
+                if block is not None:
+                    yield block
+                table_start = index
+            if not _TABLE_RULE.match(line):
+                rows.append([cell.strip() for cell in line.strip().strip("|").split("|")])
+            continue
+        if rows:
+            yield flush_table(index)
+
+        if not para:
+            para_start = index
+        para.append(line.strip())
+
+    end = index + 1
+    if fence is not None:
+        # Unclosed fence: the rest of the document is code
+        _, lang, start, code = fence
+        yield Block("code", start, end, text="\n".join(code), lang=lang)
+    yield from flush_all(end)
+
+
+def parse_markdown(text: str) -> Document:
+    return Document(text, list(iter_blocks(text.splitlines())))
+
+
+# --- Cache ---
+
+_cache: "OrderedDict[str, Document]" = OrderedDict()
+_cache_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def parse_cached(text: str) -> Document:
+    """Parse once per distinct content; later callers get the same Document"""
+    key = content_hash(text)
+    with _cache_lock:
+        document = _cache.get(key)
+        if document is not None:
+            _cache.move_to_end(key)
+            _stats["hits"] += 1
+            return document
+        _stats["misses"] += 1
+
+    document = parse_markdown(text)
+    with _cache_lock:
+        _cache[key] = document
+        while len(_cache) > MARKDOWN_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return document
+
+
+def load_document(path: str) -> Document:
+    """Read a Markdown file (with encoding fallbacks) and return its cached Document"""
+    for encoding in ("utf-8", "utf-8-sig", "latin-1"):
+        try:
+            with open(path, "r", encoding=encoding) as f:
+                return parse_cached(f.read())
+        except UnicodeDecodeError:
+            continue
+    raise ValueError(f"Cannot decode {path}")
+
+
+def cache_stats() -> dict:
+    with _cache_lock:
+        return {**_stats, "documents": len(_cache)}
+
+
+# --- Inline rendering ---
+
+def plain(text: str) -> str:
+    """Inline Markdown as plain text: formatting markers dropped, links reduced to their text"""
+    if "`" in text:
+        text = _CODE_SPAN.sub(lambda m: m.group(2).strip(), text)
+    if "](" in text:
+        text = _LINK.sub(r"\1", _IMAGE.sub(r"\1", text))
+    if "*" in text or "_" in text:
+        text = _EM.sub(r"\2", _STRONG.sub(r"\2", text))
+    if "~~" in text:
+        text = _STRIKE.sub(r"\1", text)
+    return text
+
+
+def _emphasis_html(text: str) -> str:
+    """Escape text once and render emphasis and strikethrough"""
+    text = html.escape(text, quote=False)
+    if "*" in text or "_" in text:
+        text = _EM.sub(r"<em>\2</em>", _STRONG.sub(r"<strong>\2</strong>", text))
+    if "~~" in text:
+        text = _STRIKE.sub(r"<del>\1</del>", text)
+    return text
+
+
+def _inline_html_segment(text: str) -> str:
+    if "](" not in text:
+        return _emphasis_html(text)
+    # Links and images are matched on the raw text and swapped for placeholders, so each
+    # piece is escaped exactly once and emphasis can still span a link
+    rendered = []
+
+    def placeholder(match):
+        bang, label, url = match.groups()
+        if not bang and not label:
+            return match.group(0)  # "[](url)" is not a link
+        if bang:
+            rendered.append(f'<img alt="{html.escape(label)}" src="{html.escape(url)}">')
+        else:
+            rendered.append(f'<a href="{html.escape(url)}">{_emphasis_html(label)}</a>')
+        return f"\x00{len(rendered) - 1}\x00"
+
+    text = _emphasis_html(_IMAGE_OR_LINK.sub(placeholder, text.replace("\x00", "")))
+    return _PLACEHOLDER.sub(lambda m: rendered[int(m.group(1))], text)
+
+
+def inline_html(text: str) -> str:
+    """Inline Markdown as HTML; code spans are escaped verbatim"""
+    if "`" not in text:
+        return _inline_html_segment(text)
+    parts = []
+    last = 0
+    for match in _CODE_SPAN.finditer(text):
+        parts.append(_inline_html_segment(text[last:match.start()]))
+        parts.append(f"<code>{html.escape(match.group(2).strip(), quote=False)}</code>")
+        last = match.end()
+    parts.append(_inline_html_segment(text[last:]))
+    return "".join(parts)
+
+
+def _list_html(block: Block) -> str:
+    tag = "ol" if block.ordered else "ul"
+    out, depth = [f"<{tag}>"], 0
+    for i, (item_depth, text) in enumerate(block.items):
+        if i:
+            if item_depth > depth:
+                out.append(f"<{tag}>" * (item_depth - depth))
+            else:
+                out.append("</li>")
+                out.append(f"</{tag}></li>" * (depth - item_depth))
+        depth = item_depth
+        out.append(f"<li>{inline_html(text)}")
+    out.append("</li>")
+    out.append(f"</{tag}></li>" * depth)
+    out.append(f"</{tag}>")
+    return "".join(out)
+
+
+def block_html(block: Block) -> str:
+    if block.kind == "heading":
+        return f"<h{block.level}>{inline_html(block.text)}</h{block.level}>"
+    if block.kind == "paragraph":
+        return f"<p>{inline_html(block.text)}</p>"
+    if block.kind == "list":
+        return _list_html(block)
+    if block.kind == "code":
+        lang = f' class="language-{html.escape(block.lang)}"' if block.lang else ""
+        return f"<pre><code{lang}>{html.escape(block.text, quote=False)}</code></pre>"
+    if block.kind == "quote":
+        return f"<blockquote><p>{inline_html(block.text)}</p></blockquote>"
+    if block.kind == "table":
+        head, *body = block.items or [[]]
+        cells = "".join(f"<th>{inline_html(cell)}</th>" for cell in head)
+        rows = "".join("<tr>" + "".join(f"<td>{inline_html(cell)}</td>" for cell in row) + "</tr>" for row in body)
+        return f"<table><thead><tr>{cells}</tr></thead><tbody>{rows}</tbody></table>"
+    if block.kind == "rule":
+        return "<hr>"
+    return ""
@@ -0,0 +1,145 @@
+import contextvars
+import json
+import os
+import threading
+from typing import Callable, List, Optional
+
+# Dispatch sections to the content crew while the outline JSON is still streaming
+STREAM_OUTLINE = os.getenv("GUIDE_STREAM_OUTLINE", "").lower() in ("1", "true", "yes")
+
+
+class OutlineStreamParser:
+    """
+    Incremental scanner for a streamed JSON object such as a GuideOutline.
+    Each feed() continues where the last one stopped and returns the objects of
+    the `array_key` array that became complete; finished top-level string fields
+    (title, introduction, ...) are collected in `fields`. Text around the object
+    (code fences, prose) is skipped.
+    """
+
+    def __init__(self, array_key: str = "sections"):
+        self.array_key = array_key
+        self.fields = {}
+        self.items: List[dict] = []
+        self.done = False
+        self._text = ""
+        self._pos = 0
+        self._stack = []  # (bracket, offset) of the open containers
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._expect_key = False
+        self._pending_key = None
+        self._key = None  # top-level key whose value is being read
+
+    @property
+    def text(self) -> str:
+        return self._text
+
+    def feed(self, chunk: str) -> List[dict]:
+        self._text += chunk
+        new_items = []
+        text = self._text
+        for i in range(self._pos, len(text)):
+            if self.done:
+                break
+            ch = text[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if len(self._stack) == 1:
+                        value = json.loads(text[self._string_start:i + 1])
+                        if self._expect_key:
+                            self._pending_key = value
+                        else:
+                            self.fields[self._key] = value
+                continue
+
+            if not self._stack:
+                if ch == "{":
+                    self._stack.append((ch, i))
+                    self._expect_key = True
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch in "{[":
+                self._stack.append((ch, i))
+            elif ch in "}]":
+                bracket, start = self._stack.pop()
+                if not self._stack:
+                    self.done = True
+                elif (bracket == "{" and len(self._stack) == 2 and self._stack[1][0] == "["
+                      and self._key == self.array_key):
+                    item = json.loads(text[start:i + 1])
+                    self.items.append(item)
+                    new_items.append(item)
+            elif len(self._stack) == 1:
+                if ch == ":":
+                    self._key = self._pending_key
+                    self._expect_key = False
+                elif ch == ",":
+                    self._expect_key = True
+
+        self._pos = len(text)
+        return new_items
+
+    def finish(self, full_text: str) -> List[dict]:
+        """
+        Reconcile with the complete response (a cache hit or cassette replay never
+        streams): returns the items that were not emitted while streaming.
+        """
+        if full_text != self._text:
+            replay = OutlineStreamParser(self.array_key)
+            replay.feed(full_text)
+            self.fields.update(replay.fields)
+            missed = replay.items[len(self.items):]
+            self.items.extend(missed)
+            self._text, self._pos, self.done = full_text, len(full_text), True
+            return missed
+        return []
+
+
+_outline_lock = threading.Lock()
+_outline_registered = False
+# Set only inside the thread that makes the outline call, so chunks of section
+# crews started meanwhile never reach the outline sink
+_outline_sink: contextvars.ContextVar = contextvars.ContextVar("outline_sink", default=None)
+
+
+def _on_outline_chunk(_source, event):
+    sink = _outline_sink.get()
+    if sink is not None:
+        sink(event.chunk)
+
+
+def outline_streaming() -> bool:
+    """True while the current thread is streaming an outline"""
+    return _outline_sink.get() is not None
+
+
+def stream_outline_chunks(sink: Optional[Callable[[str], None]]) -> bool:
+    """
+    Route provider stream chunks of LLM calls made from the current context to
+    sink (None stops). Returns False when the installed CrewAI does not emit
+    stream chunk events; the caller then only sees the full response.
+    """
+    global _outline_registered
+    try:
+        from crewai.utilities.events import crewai_event_bus
+        from crewai.utilities.events.llm_events import LLMStreamChunkEvent
+    except ImportError:
+        return False
+
+    with _outline_lock:
+        if not _outline_registered:
+            crewai_event_bus.on(LLMStreamChunkEvent)(_on_outline_chunk)
+            _outline_registered = True
+    _outline_sink.set(sink)
+    return True
@@ -0,0 +1,194 @@
+"""
+BM25 retrieval over documents written earlier in a run (lectures, sections).
+
+Each document is split at headings into passages of a bounded size and added
+to an in-memory inverted index as soon as it is finished, so retrieval for the
+next document already sees it. build_context() returns the best-matching
+passages for a query, packed into a token budget, as a previous_sections
+context whose size no longer grows with the course.
+
+Passing documents= restricts a query to a fixed set of documents: scores,
+statistics and output order then depend only on those documents, not on what
+else happened to be indexed first, so the context (and the prompt, cache and
+cassette keys built from it) is the same on every run.
+"""
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .context_store import estimate_tokens, truncate_to_tokens
+from .markdown_ast import parse_cached, plain
+
+_WORD = re.compile(r"[a-z0-9][a-z0-9_+#.-]*[a-z0-9+#]|[a-z0-9]")
+STOPWORDS = frozenset("""
+a about an and are as at be been but by can do does for from has have how if in into is it its
+more most not of on or our so such than that the their them then there these they this those to
+use used using was we what when where which while who why will with you your
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    return [w for w in _WORD.findall(text.lower()) if w not in STOPWORDS]
+
+
+def split_passages(text: str, max_tokens: int = 200) -> List[Tuple[str, str]]:
+    """(heading, passage) pairs cut at headings, and between blocks when a section is too long"""
+    document = parse_cached(text)
+    passages = []
+    for section in document.sections(3):
+        heading = plain(section.heading.text) if section.heading is not None else ""
+        piece = []
+        for block in section.blocks:
+            source = document.source(block.start, block.end).strip()
+            if piece and estimate_tokens("\n\n".join(piece + [source])) > max_tokens:
+                passages.append((heading, "\n\n".join(piece)))
+                piece = []
+            piece.append(source)
+        if piece:
+            passages.append((heading, "\n\n".join(piece)))
+    return [(heading, body) for heading, body in passages if body]
+
+
+class PassageIndex:
+    """
+    Incremental BM25 index. Documents are keyed by name; adding a name again
+    replaces its passages (a rewritten lecture).
+    """
+
+    def __init__(self, passage_tokens: int = 200, k1: float = 1.5, b: float = 0.75):
+        self.passage_tokens = passage_tokens
+        self.k1 = k1
+        self.b = b
+        self._passages: Dict[int, Tuple[str, str, str]] = {}  # id -> (document, heading, text)
+        self._lengths: Dict[int, int] = {}
+        self._postings: Dict[str, Dict[int, int]] = defaultdict(dict)  # term -> {passage id: tf}
+        self._documents: Dict[str, List[int]] = {}  # insertion order is document order
+        self._total_length = 0
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+        # Run statistics
+        self.builds = 0
+        self.tokens_sent = 0
+
+    def __len__(self) -> int:
+        return len(self._passages)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._documents
+
+    @property
+    def document_count(self) -> int:
+        return len(self._documents)
+
+    def add(self, name: str, text: str):
+        """Index a finished document"""
+        passages = split_passages(text, self.passage_tokens)
+        with self._lock:
+            self._remove(name)
+            ids = []
+            for heading, body in passages:
+                terms = Counter(tokenize(f"{heading}\n{body}"))
+                pid = self._next_id
+                self._next_id += 1
+                self._passages[pid] = (name, heading, body)
+                self._lengths[pid] = sum(terms.values())
+                self._total_length += self._lengths[pid]
+                for term, tf in terms.items():
+                    self._postings[term][pid] = tf
+                ids.append(pid)
+            self._documents[name] = ids
+
+    def _remove(self, name: str):
+        for pid in self._documents.pop(name, []):
+            _, heading, body = self._passages.pop(pid)
+            self._total_length -= self._lengths.pop(pid)
+            for term in set(tokenize(f"{heading}\n{body}")):
+                postings = self._postings.get(term)
+                if postings is not None:
+                    postings.pop(pid, None)
+                    if not postings:
+                        del self._postings[term]
+
+    def search(self, query: str, limit: int = 10, exclude: Optional[str] = None,
+               documents: Optional[Sequence[str]] = None) -> List[Tuple[float, str, str, str]]:
+        """(score, document, heading, text) of the best passages for a query, best first"""
+        with self._lock:
+            ranked = self._rank(query, exclude, self._document_order(documents))
+            return [(score, *self._passages[pid]) for score, pid in ranked[:limit]]
+
+    def _document_order(self, documents: Optional[Sequence[str]]) -> Dict[str, int]:
+        """Position of each searchable document: the given ones that are indexed, else all in insertion order"""
+        names = self._documents if documents is None else [name for name in documents if name in self._documents]
+        return {name: i for i, name in enumerate(names)}
+
+    def _rank(self, query: str, exclude: Optional[str], order: Dict[str, int]) -> List[Tuple[float, int]]:
+        order = {name: i for name, i in order.items() if name != exclude}
+        if len(order) == len(self._documents):
+            count, total = len(self._passages), self._total_length
+        else:
+            count = sum(len(self._documents[name]) for name in order)
+            total = sum(self._lengths[pid] for name in order for pid in self._documents[name])
+        if not count:
+            return []
+        average = total / count
+        scores: Dict[int, float] = defaultdict(float)
+        # Sorted terms, so the float sums (and ties) come out the same under any hash seed
+        for term in sorted(set(tokenize(query))):
+            postings = [(pid, tf) for pid, tf in self._postings.get(term, {}).items()
+                        if self._passages[pid][0] in order]
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for pid, tf in postings:
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[pid] / average)
+                scores[pid] += idf * tf * (self.k1 + 1) / (tf + norm)
+        # Ties go to the earlier document, then the earlier passage
+        return sorted(
+            ((score, pid) for pid, score in scores.items()),
+            key=lambda item: (-item[0], order[self._passages[item[1]][0]], item[1]),
+        )
+
+    def build_context(self, query: str, token_budget: int, exclude: Optional[str] = None,
+                      header: str = "# Relevant Passages From Earlier Lectures\n\n",
+                      documents: Optional[Sequence[str]] = None) -> str:
+        """
+        The best-matching passages that fit in token_budget, grouped by document
+        in the order of documents (default: the order they were added). Empty
+        when nothing matches.
+        """
+        with self._lock:
+            order = self._document_order(documents)
+            used = estimate_tokens(header)
+            chosen = []  # (passage id, title, text)
+            for _score, pid in self._rank(query, exclude, order):
+                name, heading, body = self._passages[pid]
+                title = f"{name} - {heading}" if heading else name
+                cost = estimate_tokens(f"## {title}\n{body}\n\n")
+                if used + cost > token_budget:
+                    if chosen:
+                        continue
+                    # The best passage is always sent, shortened if it has to be
+                    body = truncate_to_tokens(body, max(0, token_budget - used - estimate_tokens(title) - 4))
+                    cost = estimate_tokens(f"## {title}\n{body}\n\n")
+                chosen.append((pid, title, body))
+                used += cost
+
+            if not chosen:
+                return ""
+            chosen.sort(key=lambda item: (order[self._passages[item[0]][0]], item[0]))
+            context, previous = header, None
+            for _pid, title, body in chosen:
+                # Neighbouring passages of one heading read as one block
+                context += f"{body}\n\n" if title == previous else f"## {title}\n{body}\n\n"
+                previous = title
+
+            self.builds += 1
+            self.tokens_sent += estimate_tokens(context)
+            return context
+
+    def format_stats(self) -> str:
+        return (f"Retrieval context: {self.builds} builds, {self.tokens_sent} tokens sent, "
+                f"{len(self)} passages from {self.document_count} documents indexed")
@@ -0,0 +1,208 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from .context_store import estimate_tokens
+
+# Default (requests per minute, tokens per minute) by provider prefix of the model name.
+# Override with LLM_RATE_LIMITS='{"openai/gpt-4o-mini": {"rpm": 500, "tpm": 200000}}'
+PROVIDER_DEFAULTS = {
+    "openai": (500, 200_000),
+    "gemini": (15, 1_000_000),
+    "google": (15, 1_000_000),
+    "anthropic": (50, 50_000),
+}
+FALLBACK_LIMITS = (int(os.getenv("LLM_RPM", "60")), int(os.getenv("LLM_TPM", "100000")))
+
+INITIAL_CONCURRENCY = float(os.getenv("LLM_INITIAL_CONCURRENCY", "4"))
+MAX_CONCURRENCY = float(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LATENCY_SPIKE_FACTOR = float(os.getenv("LLM_LATENCY_SPIKE_FACTOR", "3"))
+DEFAULT_COMPLETION_TOKENS = 512
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """True for provider throttling errors (HTTP 429 / litellm.RateLimitError)"""
+    if type(error).__name__ == "RateLimitError":
+        return True
+    if getattr(error, "status_code", None) == 429:
+        return True
+    message = str(error).lower()
+    return "429" in message or "rate limit" in message or "resource_exhausted" in message
+
+
+class TokenBucket:
+    """Refills at rate_per_minute; callers reserve capacity and sleep off any debt"""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate_per_second)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        """Take amount from the bucket and return how long the caller has to wait"""
+        with self._lock:
+            self._refill()
+            self.tokens -= amount
+            if self.tokens >= 0 or self.rate_per_second <= 0:
+                return 0.0
+            return -self.tokens / self.rate_per_second
+
+    def refund(self, amount: float):
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+    def drain(self):
+        """Empty the bucket, e.g. after the provider told us to slow down"""
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.tokens, 0.0)
+
+
+class ModelLimiter:
+    """
+    Request + token buckets and an AIMD concurrency window for one model.
+    The window grows by roughly one slot per window of healthy calls and is
+    halved on 429s (and shrunk on latency spikes).
+    """
+
+    def __init__(self, model: str, rpm: float, tpm: float):
+        self.model = model
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.limit = min(INITIAL_CONCURRENCY, MAX_CONCURRENCY)
+        self.in_flight = 0
+        self.waiting = 0
+        self.latency_ewma: Optional[float] = None
+        self._cond = threading.Condition()
+
+        # Statistics
+        self.calls = 0
+        self.throttled = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _acquire_slot(self):
+        with self._cond:
+            self.waiting += 1
+            while self.in_flight >= max(1, int(self.limit)):
+                self._cond.wait()
+            self.waiting -= 1
+            self.in_flight += 1
+
+    def _release_slot(self, latency: float, throttled: bool):
+        with self._cond:
+            self.in_flight -= 1
+            if throttled:
+                self.limit = max(1.0, self.limit / 2)
+            elif self.latency_ewma is not None and latency > LATENCY_SPIKE_FACTOR * self.latency_ewma:
+                self.limit = max(1.0, self.limit * 0.8)
+            else:
+                self.limit = min(MAX_CONCURRENCY, self.limit + 1.0 / max(1.0, self.limit))
+
+            if not throttled:
+                self.latency_ewma = latency if self.latency_ewma is None else 0.8 * self.latency_ewma + 0.2 * latency
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, estimated_tokens: int):
+        """Wait for rate-limit capacity and a concurrency slot, then run the call"""
+        start = time.monotonic()
+        self._acquire_slot()
+        wait = max(self.requests.reserve(1), self.tokens.reserve(estimated_tokens))
+        if wait > 0:
+            time.sleep(wait)
+        waited = time.monotonic() - start
+
+        with self._cond:
+            self.calls += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+
+        call_start = time.monotonic()
+        throttled = False
+        try:
+            yield self
+        except Exception as e:
+            if is_rate_limit_error(e):
+                throttled = True
+                with self._cond:
+                    self.throttled += 1
+                self.requests.drain()
+            raise
+        finally:
+            self._release_slot(time.monotonic() - call_start, throttled)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "model": self.model,
+                "concurrency_limit": round(self.limit, 2),
+                "in_flight": self.in_flight,
+                "queue_depth": self.waiting,
+                "calls": self.calls,
+                "throttled": self.throttled,
+                "avg_wait_s": round(self.total_wait / self.calls, 3) if self.calls else 0.0,
+                "max_wait_s": round(self.max_wait, 3),
+            }
+
+
+_limiters: Dict[str, ModelLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def _limits_for(model: str):
+    overrides = json.loads(os.getenv("LLM_RATE_LIMITS", "{}") or "{}")
+    provider = model.split("/", 1)[0] if "/" in model else model
+    rpm, tpm = PROVIDER_DEFAULTS.get(provider, FALLBACK_LIMITS)
+    for name in (provider, model):
+        if name in overrides:
+            rpm = overrides[name].get("rpm", rpm)
+            tpm = overrides[name].get("tpm", tpm)
+    return rpm, tpm
+
+
+def get_limiter(model: str) -> ModelLimiter:
+    """Process-wide limiter for a model, shared by every crew and flow"""
+    model = model or "default"
+    with _limiters_lock:
+        limiter = _limiters.get(model)
+        if limiter is None:
+            limiter = ModelLimiter(model, *_limits_for(model))
+            _limiters[model] = limiter
+        return limiter
+
+
+def estimate_request_tokens(messages, max_tokens: Optional[int] = None) -> int:
+    """Prompt tokens plus the completion tokens we may be charged for"""
+    if isinstance(messages, str):
+        prompt = messages
+    else:
+        prompt = "".join(str(m.get("content", "")) for m in messages)
+    return estimate_tokens(prompt) + (max_tokens or DEFAULT_COMPLETION_TOKENS)
+
+
+def limiter_stats() -> list:
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return [limiter.stats() for limiter in limiters]
+
+
+def format_limiter_stats() -> str:
+    lines = []
+    for s in limiter_stats():
+        lines.append(
+            f"Rate limiter [{s['model']}]: {s['calls']} calls, {s['throttled']} throttled, "
+            f"concurrency {s['concurrency_limit']}, queue {s['queue_depth']}, "
+            f"avg wait {s['avg_wait_s']}s (max {s['max_wait_s']}s)"
+        )
+    return "\n".join(lines)
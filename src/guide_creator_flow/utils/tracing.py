@@ -0,0 +1,249 @@
+import argparse
+import contextvars
+import json
+import math
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import List, Optional
+
+from .context_store import estimate_tokens
+
+TRACE_PATH = os.getenv("TRACE_PATH", os.path.join("output", "trace.jsonl"))
+TRACING_DISABLED = os.getenv("TRACING_DISABLED", "").lower() in ("1", "true", "yes")
+
+# One id per process run, so several runs can share a trace file
+RUN_ID = uuid.uuid4().hex[:12]
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+_lock = threading.Lock()
+
+
+class Span:
+    """One timed unit of work; LLM usage recorded in a span rolls up to its parents"""
+
+    def __init__(self, name: str, parent: Optional["Span"] = None, rollup: bool = True, **attrs):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.parent = parent
+        self.rollup = rollup
+        self.attrs = attrs
+        self.start = time.time()
+        self.end: Optional[float] = None
+        self.model: Optional[str] = None
+        self.cache: Optional[str] = None
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+        self.llm_calls = 0
+        self.retries = 0
+        self.error: Optional[str] = None
+
+    def add_usage(self, prompt_tokens=0, completion_tokens=0, cost=0.0, llm_calls=0, retries=0):
+        with _lock:
+            node = self
+            while node is not None:
+                node.prompt_tokens += prompt_tokens
+                node.completion_tokens += completion_tokens
+                node.cost += cost
+                node.llm_calls += llm_calls
+                node.retries += retries
+                node = node.parent if node.rollup else None
+
+    def usage(self) -> tuple:
+        with _lock:
+            return self.prompt_tokens, self.completion_tokens, self.cost, self.llm_calls, self.retries
+
+    def to_dict(self) -> dict:
+        return {
+            "run_id": RUN_ID,
+            "span_id": self.id,
+            "parent_id": self.parent.id if self.parent else None,
+            "name": self.name,
+            "start": self.start,
+            "wall_s": round((self.end or time.time()) - self.start, 4),
+            "model": self.model,
+            "cache": self.cache,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cost_usd": round(self.cost, 6),
+            "llm_calls": self.llm_calls,
+            "retries": self.retries,
+            "error": self.error,
+            "attrs": self.attrs,
+        }
+
+
+def _write(record: dict):
+    if TRACING_DISABLED:
+        return
+    directory = os.path.dirname(TRACE_PATH)
+    with _lock:
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(TRACE_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """Trace a block of work as a child of the current span"""
+    s = Span(name, parent=_current_span.get(), **attrs)
+    token = _current_span.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.error = repr(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        s.end = time.time()
+        _write(s.to_dict())
+
+
+def count_tokens(model: str, messages=None, text: Optional[str] = None) -> int:
+    """Token count via litellm when it knows the model, else the cheap estimate"""
+    try:
+        import litellm
+        if text is not None:
+            return litellm.token_counter(model=model, text=text)
+        if isinstance(messages, str):
+            messages = [{"role": "user", "content": messages}]
+        return litellm.token_counter(model=model, messages=messages)
+    except Exception:
+        if text is not None:
+            return estimate_tokens(text)
+        if isinstance(messages, str):
+            return estimate_tokens(messages)
+        return estimate_tokens("".join(str(m.get("content", "")) for m in messages or []))
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    try:
+        import litellm
+        prompt_cost, completion_cost = litellm.cost_per_token(
+            model=model, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens
+        )
+        return prompt_cost + completion_cost
+    except Exception:
+        return 0.0
+
+
+def record_llm_call(s: Span, model: str, messages, response, cache: Optional[str]):
+    """Attach model, token usage, cost and cache outcome to an llm.call span"""
+    s.model = model
+    s.cache = cache
+    prompt_tokens = count_tokens(model, messages=messages)
+    completion_tokens = count_tokens(model, text=response) if isinstance(response, str) else 0
+    # Cache hits and cassette replays cost nothing
+    cost = 0.0 if cache in ("hit", "replay") else estimate_cost(model, prompt_tokens, completion_tokens)
+    s.add_usage(prompt_tokens, completion_tokens, cost, llm_calls=1)
+
+
+def trace_crew_tasks(crew, stage: str, task_names: List[str]):
+    """
+    Emit a span per task of a sequential crew (e.g. lecture.write, lecture.review).
+    Each task span covers the time and LLM usage since the previous task finished.
+    """
+    parent = _current_span.get()
+    state = {"start": time.time(), "usage": parent.usage() if parent else (0, 0, 0.0, 0, 0)}
+
+    def make_callback(task_name: str):
+        def callback(_output):
+            now = time.time()
+            s = Span(f"{stage}.{task_name}", parent=parent, rollup=False)
+            s.start = state["start"]
+            s.end = now
+            if parent is not None:
+                usage = parent.usage()
+                delta = [a - b for a, b in zip(usage, state["usage"])]
+                s.prompt_tokens, s.completion_tokens, s.cost, s.llm_calls, s.retries = delta
+                s.model = parent.model
+                state["usage"] = usage
+            state["start"] = now
+            _write(s.to_dict())
+        return callback
+
+    for task, task_name in zip(crew.tasks, task_names):
+        task.callback = make_callback(task_name)
+    return crew
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile: the smallest value with at least pct% of the values at or below it"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct * len(ordered) / 100) - 1))
+    return ordered[index]
+
+
+def load_trace(path: str = TRACE_PATH, run_id: Optional[str] = None) -> List[dict]:
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                records.append(json.loads(line))
+    if run_id == "last" and records:
+        run_id = records[-1]["run_id"]
+    if run_id:
+        records = [r for r in records if r["run_id"] == run_id]
+    return records
+
+
+def summarize(records: List[dict]) -> dict:
+    """Per-stage wall time percentiles plus token, cache and cost totals"""
+    stages = defaultdict(list)
+    for record in records:
+        stages[record["name"]].append(record)
+
+    summary = {}
+    for name, items in stages.items():
+        walls = [r["wall_s"] for r in items]
+        summary[name] = {
+            "count": len(items),
+            "p50_s": round(_percentile(walls, 50), 3),
+            "p95_s": round(_percentile(walls, 95), 3),
+            "total_s": round(sum(walls), 3),
+            "prompt_tokens": sum(r["prompt_tokens"] for r in items),
+            "completion_tokens": sum(r["completion_tokens"] for r in items),
+            "cache_hits": sum(1 for r in items if r.get("cache") == "hit"),
+            "retries": sum(r["retries"] for r in items),
+            "errors": sum(1 for r in items if r.get("error")),
+        }
+
+    # Usage rolls up to the root spans, so the run total is their sum
+    roots = [r for r in records if r["parent_id"] is None]
+    total_cost = sum(r["cost_usd"] for r in roots)
+    return {"stages": summary, "total_cost_usd": round(total_cost, 4)}
+
+
+def report():
+    """Console script: summarize a trace file per stage"""
+    parser = argparse.ArgumentParser(description="Summarize a flow trace (JSONL) per stage")
+    parser.add_argument("path", nargs="?", default=TRACE_PATH)
+    parser.add_argument("--run", default=None, help="Run id to report on, or 'last'")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args()
+
+    summary = summarize(load_trace(args.path, args.run))
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+
+    print(f"{'stage':32} {'count':>6} {'p50 s':>8} {'p95 s':>8} {'total s':>9} "
+          f"{'prompt tok':>11} {'compl tok':>10} {'hits':>5} {'retries':>7}")
+    for name, s in sorted(summary["stages"].items(), key=lambda item: -item[1]["total_s"]):
+        print(f"{name:32} {s['count']:>6} {s['p50_s']:>8.2f} {s['p95_s']:>8.2f} {s['total_s']:>9.2f} "
+              f"{s['prompt_tokens']:>11} {s['completion_tokens']:>10} {s['cache_hits']:>5} {s['retries']:>7}")
+    print(f"\nTotal cost: ${summary['total_cost_usd']:.4f}")
+
+
+if __name__ == "__main__":
+    report()
@@ -1,25 +1,41 @@
 # config/llm_config.py
 
-from crewai import LLM
 import os
+from guide_creator_flow.utils.llm_registry import get_llm
 
-DEFAULT_LLM = LLM(
-    model="openai/gpt-4o-mini",  # ← Change this to switch models
+# LLMs come from the shared registry (pooled connections + on-disk response cache),
+# see guide_creator_flow/utils/llm_registry.py
+DEFAULT_LLM = get_llm(
+    "openai/gpt-4o-mini",  # ← Change this to switch models
     temperature=0.3,
     max_tokens=2048,
     api_key=os.getenv("OPENAI_API_KEY")  # Or Gemini, Anthropic, etc.
 )
 
+
+def structured_llm(response_format):
+    """
+    DEFAULT_LLM with schema-constrained output: the provider only emits JSON that
+    matches the Pydantic model (pair it with the task's output_pydantic).
+    """
+    return get_llm(
+        DEFAULT_LLM.model,
+        temperature=0.3,
+        max_tokens=2048,
+        api_key=os.getenv("OPENAI_API_KEY"),
+        response_format=response_format,
+    )
+
 # Optional: Define other LLMs if needed
-GEMINI_LLM = LLM(
-    model="google/gemini-1.5-flash",
+GEMINI_LLM = get_llm(
+    "google/gemini-1.5-flash",
     temperature=0.2,
     max_tokens=2048,
     api_key=os.getenv("GEMINI_API_KEY")
 )
 
-ANTHROPIC_LLM = LLM(
-    model="anthropic/claude-3-haiku",
+ANTHROPIC_LLM = get_llm(
+    "anthropic/claude-3-haiku",
     temperature=0.1,
     max_tokens=1024,
     api_key=os.getenv("ANTHROPIC_API_KEY")
@@ -0,0 +1,84 @@
+"""
+Long-lived worker process that runs UdemyCourseCreationFlow jobs for the job service
+(guide_creator_flow/service.py). CrewAI, the crews and the LLM clients are imported
+once; every job then runs inside its own directory, because the flow writes to ./output.
+
+Protocol: one JSON job per line on stdin ({"id", "dir", "inputs"}), one JSON result
+per line on stdout ({"id", "status", "error", "wall_s"}). Flow output goes to
+<dir>/job.log. The results are written to a private copy of file descriptor 1, and
+fds 1/2 themselves point at the job log, so output of subprocesses the flow starts
+(lecture workers) and of C extensions can never end up in the protocol stream.
+"""
+import contextlib
+import json
+import os
+import sys
+import time
+import traceback
+
+# The shared caches must not follow the per-job chdir (traces do, one per job)
+os.environ["LLM_CACHE_PATH"] = os.path.abspath(os.getenv("LLM_CACHE_PATH", os.path.join(".cache", "llm_cache.sqlite")))
+os.environ["HTML_FRAGMENT_CACHE"] = os.path.abspath(os.getenv("HTML_FRAGMENT_CACHE", os.path.join(".cache", "html_fragments")))
+
+from flows.udemy_course_flow import UdemyCourseCreationFlow
+from guide_creator_flow.utils.tracing import span
+
+
+def _protocol_channel():
+    """Move the protocol off fd 1: results go to a duplicate, fd 1 now goes where stderr goes"""
+    sys.stdout.flush()
+    channel = os.fdopen(os.dup(sys.stdout.fileno()), "w", encoding="utf-8")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    return channel
+
+
+@contextlib.contextmanager
+def _job_output(log):
+    """Point fds 1 and 2 (and sys.stdout/stderr) at the job log, restoring them afterwards"""
+    sys.stdout.flush()
+    sys.stderr.flush()
+    saved = [os.dup(1), os.dup(2)]
+    try:
+        os.dup2(log.fileno(), 1)
+        os.dup2(log.fileno(), 2)
+        with contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+            yield
+    finally:
+        log.flush()
+        os.dup2(saved[0], 1)
+        os.dup2(saved[1], 2)
+        for fd in saved:
+            os.close(fd)
+
+
+def run_job(job: dict) -> dict:
+    start = time.time()
+    os.makedirs(job["dir"], exist_ok=True)
+    home = os.getcwd()
+    with open(os.path.join(job["dir"], "job.log"), "a", encoding="utf-8") as log:
+        with _job_output(log):
+            try:
+                os.chdir(job["dir"])
+                with span("course_job", job_id=job["id"]):
+                    UdemyCourseCreationFlow().kickoff(inputs=job["inputs"])
+                result = {"status": "done", "error": None}
+            except Exception as e:
+                traceback.print_exc()
+                result = {"status": "failed", "error": repr(e)}
+            finally:
+                os.chdir(home)
+    return {"id": job["id"], **result, "wall_s": round(time.time() - start, 2)}
+
+
+def main():
+    protocol = _protocol_channel()
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        result = run_job(json.loads(line))
+        protocol.write(json.dumps(result) + "\n")
+        protocol.flush()
+
+
+if __name__ == "__main__":
+    main()
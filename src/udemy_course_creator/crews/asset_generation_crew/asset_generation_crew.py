@@ -1,7 +1,8 @@
 from crewai import Agent, Crew, Task, Process
 from crewai.project import CrewBase, agent, crew, task
 from utils.slide_template_renderer import SlideTemplateRenderer
-from config.llm_config import DEFAULT_LLM
+from config.llm_config import structured_llm
+from models.slide_deck_model import SlideDeck
 
 
 @CrewBase
@@ -16,11 +17,11 @@ class AssetGenerationCrew:
 
     @agent
     def slide_generator(self) -> Agent:
-        return Agent(config=self.agents_config['slide_generator'], llm=DEFAULT_LLM)
+        return Agent(config=self.agents_config['slide_generator'], llm=structured_llm(SlideDeck))
 
     @task
     def generate_lecture_slides_task(self) -> Task:
-        return Task(config=self.tasks_config['generate_lecture_slides'])
+        return Task(config=self.tasks_config['generate_lecture_slides'], output_pydantic=SlideDeck)
 
     @crew
     def crew(self) -> Crew:
@@ -29,4 +30,29 @@ class AssetGenerationCrew:
             tasks=self.tasks,
             process=Process.sequential,
             verbose=True
-        )
\ No newline at end of file
+        )
+
+
+@CrewBase
+class SlideFragmentCrew:
+    """Map step of slide generation: turns one chunk of a long lecture into a few slides"""
+
+    agents_config = "config/agents.yaml"
+    tasks_config = "config/tasks.yaml"
+
+    @agent
+    def slide_generator(self) -> Agent:
+        return Agent(config=self.agents_config['slide_generator'], llm=structured_llm(SlideDeck))
+
+    @task
+    def generate_chunk_slides_task(self) -> Task:
+        return Task(config=self.tasks_config['generate_chunk_slides'], output_pydantic=SlideDeck)
+
+    @crew
+    def crew(self) -> Crew:
+        return Crew(
+            agents=self.agents,
+            tasks=self.tasks,
+            process=Process.sequential,
+            verbose=True
+        )
@@ -1,7 +1,8 @@
 from crewai import Agent, Crew, Task, Process
 from crewai.project import CrewBase, agent, crew, task
-from src.udemy_course_creator.config.llm_config import DEFAULT_LLM
-llm = DEFAULT_LLM
+from src.udemy_course_creator.config.llm_config import structured_llm
+from models.curriculum_model import Curriculum
+llm = structured_llm(Curriculum)
 
 @CrewBase
 class CourseDesignCrew:
@@ -21,6 +22,7 @@ class CourseDesignCrew:
     def design_course_structure_task(self) -> Task:
         return Task(
             config=self.tasks_config['design_course_structure'],
+            output_pydantic=Curriculum,
             llm=llm,
             )
 
@@ -2,48 +2,118 @@
 
 from crewai.flow.flow import Flow, start, listen
 from models.curriculum_model import CourseState, Curriculum
+from config.llm_config import DEFAULT_LLM
 #from typing import List
+import asyncio
 import os
 import json
+import subprocess
+import sys
+import time
 from crews.course_design_crew.course_design_crew import CourseDesignCrew
 from crews.content_crew.content_crew import ContentCrew
 from crews.asset_generation_crew.asset_generation_crew import AssetGenerationCrew
 from tools.file_manager_tool import save_file
-from utils.parser import parse_curriculum_markdown
+from utils.curriculum_extractor import apply_followup, build_followup_messages, extract_curriculum, missing_fields
 from utils.helpers import sanitize_filename
-from utils.pptx_converter import convert_md_to_pptx
+from utils.markdown_views import curriculum_to_markdown
+from utils.pptx_render_pool import PptxRenderPool, save_deck_source
+from utils.slide_map_reduce import generate_slides, map_reduce_settings
+from utils.checkpoint import LectureManifest
+from utils.work_queue import SLIDES_PRIORITY, WorkQueue, slides_key
+from guide_creator_flow.utils.cassette import get_cassette
+from guide_creator_flow.utils.crew_factory import build_crew, crew_fingerprint
+from guide_creator_flow.utils.fingerprint import RebuildPlan, artifact_fingerprint, changed_parts
+from guide_creator_flow.utils.html_export import export_lectures_html, get_fragment_cache
+from guide_creator_flow.utils.llm_cache import get_default_cache
+from guide_creator_flow.utils.passage_index import PassageIndex
+from guide_creator_flow.utils.rate_limiter import format_limiter_stats
+from guide_creator_flow.utils.tracing import TRACE_PATH, span, trace_crew_tasks
+
+
+CURRICULUM_JSON_PATH = os.path.join("output", "curriculum", "course_curriculum.json")
+
+# Lecture pipeline settings: writers feed slide generators through a bounded queue
+LECTURE_WRITE_CONCURRENCY = int(os.getenv("LECTURE_WRITE_CONCURRENCY", "3"))
+SLIDE_CONCURRENCY = int(os.getenv("SLIDE_CONCURRENCY", "2"))
+PIPELINE_QUEUE_SIZE = int(os.getenv("LECTURE_PIPELINE_QUEUE_SIZE", "4"))
+
+# Distributed mode: lectures and slides go through a shared SQLite work queue to lecture_worker.py
+LECTURE_QUEUE_PATH = os.getenv("LECTURE_QUEUE_PATH")
+LECTURE_QUEUE_LOCAL_WORKERS = int(os.getenv("LECTURE_QUEUE_LOCAL_WORKERS", "2"))
+LECTURE_QUEUE_POLL_SECONDS = float(os.getenv("LECTURE_QUEUE_POLL_SECONDS", "2"))
+# Give up on the lectures still pending after this long
+LECTURE_QUEUE_TIMEOUT_SECONDS = float(os.getenv("LECTURE_QUEUE_TIMEOUT_SECONDS", "3600"))
+# ... or once no worker has held a lease for this long (no local worker alive, no remote one active)
+LECTURE_QUEUE_IDLE_TIMEOUT_SECONDS = float(os.getenv("LECTURE_QUEUE_IDLE_TIMEOUT_SECONDS", "300"))
+# Times the local workers are started again after they all exited (crash or --idle-exit)
+LECTURE_QUEUE_MAX_RESPAWNS = int(os.getenv("LECTURE_QUEUE_MAX_RESPAWNS", "3"))
+# Token budget for the previous_sections context retrieved from the lectures of earlier
+# sections; 0 turns retrieval (and the section-by-section ordering it needs) off
+LECTURE_CONTEXT_TOKEN_BUDGET = int(os.getenv("LECTURE_CONTEXT_TOKEN_BUDGET", "1200"))
+# Opt-in: a section starts only once every earlier section is written and retrieves from those
+# alone, so previous_sections (and cache/cassette keys) are the same on every run. Off, lectures
+# retrieve from whatever earlier lectures are written by then and sections overlap.
+LECTURE_CONTEXT_SECTION_BARRIER = os.getenv("LECTURE_CONTEXT_SECTION_BARRIER", "").lower() in ("1", "true", "yes")
+
+LECTURE_WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "lecture_worker.py")
+LECTURE_WORKER_LOG = os.path.join("output", "lecture_workers.log")
 
 
 class UdemyCourseCreationFlow(Flow[CourseState]):
+    async def kickoff_async(self, *args, **kwargs):
+        """Run the flow (kickoff() goes through here); the PPTX render pool is shut down however the run ends"""
+        try:
+            return await super().kickoff_async(*args, **kwargs)
+        finally:
+            render_pool = getattr(self, "render_pool", None)
+            if render_pool is not None:
+                render_pool.shutdown()
+
     @start()
     def get_inputs(self):
         """Automatically receive inputs from main.py"""
         print("📥 Inputs received by flow.")
+        # A fresh run starts a new manifest; --resume and --rebuild pick up the existing one
+        self.manifest = LectureManifest(reset=not (self.state.resume or self.state.rebuild))
+        self.render_pool = PptxRenderPool()
+        # Lectures are indexed as they finish; each new lecture retrieves from them
+        self.lecture_index = PassageIndex()
         return self.state
 
     @listen(get_inputs)
     def design_curriculum(self):
+        if (self.state.resume or self.state.rebuild) and self._load_curriculum():
+            print(f"♻️ Resuming with saved curriculum from {CURRICULUM_JSON_PATH}")
+            return self.state
+
         print("🧠 Designing course curriculum...")
-        crew = CourseDesignCrew().crew()
+        with span("design_curriculum"):
+            crew = build_crew(CourseDesignCrew)
 
-        result = crew.kickoff(inputs={
-            "course_title": self.state.course_title,
-            "course_goal": self.state.course_goal,
-            "target_audience": self.state.target_audience,
-            "description_points": "\n".join(self.state.description_points),
-        })
+            result = crew.kickoff(inputs={
+                "course_title": self.state.course_title,
+                "course_goal": self.state.course_goal,
+                "target_audience": self.state.target_audience,
+                "description_points": "\n".join(self.state.description_points),
+            })
 
         # Save raw output
         save_file("output/curriculum", "course_curriculum_raw.md", result.raw)
 
-        # Extract structured data
-        curriculum_data = self._extract_curriculum_data(result.raw)
+        # Structured output from the task; the tolerant extractor only covers a failed parse
+        if isinstance(result.pydantic, Curriculum):
+            curriculum_data = result.pydantic.model_dump()
+        else:
+            curriculum_data = self._extract_curriculum_data(result.raw)
 
         # Validate and store in flow state
         try:
             validated_curriculum = Curriculum(**curriculum_data)
             self.state.curriculum = validated_curriculum
-            save_file("output/curriculum", "course_curriculum.json", json.dumps(curriculum_data, indent=2))
+            save_file(os.path.dirname(CURRICULUM_JSON_PATH), os.path.basename(CURRICULUM_JSON_PATH),
+                      json.dumps(curriculum_data, indent=2))
+            save_file("output/curriculum", "course_curriculum.md", curriculum_to_markdown(validated_curriculum))
             print("✅ Curriculum validated and stored in structured format")
         except Exception as e:
             print(f"⚠️ Curriculum validation failed: {e}")
@@ -52,137 +122,528 @@ class UdemyCourseCreationFlow(Flow[CourseState]):
         print("✅ Curriculum designed and saved.")
         return self.state
 
+    def _load_curriculum(self) -> bool:
+        if not os.path.exists(CURRICULUM_JSON_PATH):
+            return False
+        with open(CURRICULUM_JSON_PATH, "r", encoding="utf-8") as f:
+            self.state.curriculum = Curriculum(**json.load(f))
+        return True
+
     def _extract_curriculum_data(self, markdown_text: str) -> dict:
         """
-        Try to extract JSON curriculum from LLM response.
-        Fall back to Markdown parsing if needed.
+        Extract the curriculum from the crew output in one tolerant pass (repaired JSON
+        merged with the Markdown outline). Fields still missing afterwards are filled
+        by one small follow-up LLM call instead of re-running the whole crew.
         """
         print("🔍 Attempting to extract curriculum data...")
-
-        try:
-            json_start = markdown_text.rfind("```json") + 6
-            json_end = markdown_text.rfind("```", json_start)
-            if json_start > 6 and json_end > json_start:
-                json_str = markdown_text[json_start:json_end].strip()
-                print("📄 Extracted JSON:\n", json_str)
-                return json.loads(json_str)
-            else:
-                raise ValueError("No valid JSON block found")
-        except Exception as e:
-            print(f"⚠️ Failed to extract JSON: {e}")
-            print("Parsing Markdown instead...")
-
-        parsed = parse_curriculum_markdown(markdown_text)
-
-        if not parsed["sections"]:
+        extraction = extract_curriculum(markdown_text)
+        print(f"📄 Extracted curriculum: {extraction.summary()}")
+
+        if extraction.missing and extraction.data["sections"]:
+            print(f"🩹 Asking for {len(extraction.missing)} missing fields only...")
+            messages = build_followup_messages(
+                extraction.data, extraction.missing,
+                course_context=f"Course: {self.state.course_title}\nGoal: {self.state.course_goal}\n"
+                               f"Audience: {self.state.target_audience}",
+            )
+            try:
+                with span("design_curriculum.followup", missing=len(extraction.missing)):
+                    response = DEFAULT_LLM.call(messages)
+                data = apply_followup(extraction.data, response)
+                remaining = missing_fields(data)
+                print(f"🩹 Follow-up filled {len(extraction.missing) - len(remaining)} fields"
+                      + (f", still missing: {', '.join(remaining)}" if remaining else ""))
+                return data
+            except Exception as e:
+                print(f"⚠️ Follow-up for missing fields failed: {e}")
+
+        if not extraction.data["sections"]:
             raise ValueError("LLM did not return properly formatted curriculum")
 
-        return parsed
+        return extraction.data
 
     @listen(design_curriculum)
-    def write_lecture_content(self):
+    async def write_lecture_content(self):
+        """
+        Write lectures and stream each finished lecture straight into slide generation.
+        A bounded queue between the two stages keeps writers from running too far ahead.
+        """
         print("✍️ Writing lecture content...")
 
         if not self.state.curriculum:
             print("⚠️ No curriculum found. Skipping lecture writing.")
             return self.state
 
-        for section in self.state.curriculum.sections:
-            section_folder = sanitize_filename(section.title)
-            section_dir = os.path.join("output", "lectures", section_folder)
-            os.makedirs(section_dir, exist_ok=True)
-            print(f"📁 Saving Section: {section.title} → {section_dir}")
+        if self.state.rebuild:
+            print(self.rebuild_plan().format())
+        self._index_written_lectures()
 
-            for lecture in section.lectures:
-                print(f"📝 Generating lecture: {lecture.title}")
-                crew = ContentCrew().crew()
-
-                result = crew.kickoff(inputs={
-                    "lecture_title": lecture.title,
-                    "lecture_objective": lecture.objective,
-                    "section_description": section.title,
-                    "audience_level": self.state.target_audience,
-                    "previous_sections": "No previous sections."  # Replace with real logic later
-                })
-
-                filename = f"{sanitize_filename(lecture.title)}.md"
-                lecture_path = os.path.join(section_dir, filename)
-                save_file(section_dir, filename, result.raw)
-                print(f"💾 Lecture saved to: {lecture_path}")
+        if LECTURE_QUEUE_PATH:
+            await self._write_lectures_distributed()
+            print("✅ Lecture content written and saved.")
+            return self.state
+
+        queue = asyncio.Queue(maxsize=max(1, PIPELINE_QUEUE_SIZE))
+        write_slots = asyncio.Semaphore(max(1, LECTURE_WRITE_CONCURRENCY))
+        sections = self.state.curriculum.sections
+        # With the section barrier a section starts once the earlier ones are written
+        section_written = [asyncio.Event() for _ in sections]
+        section_remaining = [len(section.lectures) for section in sections]
+        for index, remaining in enumerate(section_remaining):
+            if not remaining:
+                section_written[index].set()
+
+        def lecture_finished(index):
+            section_remaining[index] -= 1
+            if not section_remaining[index]:
+                section_written[index].set()
+
+        async def write_lecture(index, section, lecture):
+            if LECTURE_CONTEXT_TOKEN_BUDGET > 0 and LECTURE_CONTEXT_SECTION_BARRIER:
+                # Waited for outside write_slots, so waiting lectures never hold a slot
+                for event in section_written[:index]:
+                    await event.wait()
+            async with write_slots:
+                try:
+                    lecture_content = await write_one(section, lecture)
+                finally:
+                    lecture_finished(index)
+                # Hand the lecture to the slide stage in memory; blocks while the queue is full
+                if lecture_content:
+                    await queue.put((section, lecture, lecture_content))
+
+        async def write_one(section, lecture):
+            section_dir = os.path.join("output", "lectures", sanitize_filename(section.title))
+            filename = f"{sanitize_filename(lecture.title)}.md"
+            lecture_path = os.path.join(section_dir, filename)
+
+            if self._lecture_done(section, lecture):
+                print(f"⏭️ Lecture already written: {lecture.title}")
+                if self._slides_done(section, lecture):
+                    return None
+                return self._read_lecture(lecture_path)
+
+            print(f"📝 Generating lecture: {lecture.title}")
+            with span("lecture", lecture=lecture.title):
+                crew = trace_crew_tasks(build_crew(ContentCrew), "lecture", ["write", "review"])
+
+                inputs = self._lecture_inputs(section, lecture, self._previous_lectures(section, lecture))
+                result = await crew.kickoff_async(inputs=inputs)
+
+            lecture_content = result.raw
+            save_file(section_dir, filename, lecture_content)
+            self.lecture_index.add(self.manifest.key(section.title, lecture.title), lecture_content)
+            self.manifest.mark_lecture(section.title, lecture.title, lecture_path,
+                                       self._lecture_fingerprint(section, lecture))
+            print(f"💾 Lecture saved to: {lecture_path}")
+            return lecture_content
+
+        async def slide_worker():
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                section, lecture, lecture_content = item
+                try:
+                    await self._generate_slides(section, lecture, lecture_content)
+                except Exception as e:
+                    # Left unmarked in the manifest, so generate_lecture_slides retries it
+                    print(f"⚠️ Slide generation failed for '{lecture.title}': {e}")
+
+        workers = [asyncio.create_task(slide_worker()) for _ in range(max(1, SLIDE_CONCURRENCY))]
+        writers = [
+            asyncio.create_task(write_lecture(index, section, lecture))
+            for index, section in enumerate(sections)
+            for lecture in section.lectures
+        ]
+        try:
+            await asyncio.gather(*writers)
+        finally:
+            # gather() leaves the other writers running when one fails; stop them
+            # before the slide workers, or they keep calling the crew and block on put()
+            for task in writers:
+                task.cancel()
+            await asyncio.gather(*writers, return_exceptions=True)
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
 
         print("✅ Lecture content written and saved.")
         return self.state
 
     @listen(write_lecture_content)
-    def generate_lecture_slides(self):
-        print("🖼️ Generating lecture slides...")
+    async def generate_lecture_slides(self):
+        """Catch-up pass for lectures whose slides were not produced by the pipeline"""
+        print("🖼️ Checking lecture slides...")
 
         if not self.state.curriculum:
             print("⚠️ No curriculum data found. Skipping slide generation.")
             return self.state
 
-        # Encodings to try when reading lecture files
-        encodings_to_try = ['utf-8', 'utf-8-sig', 'latin-1', 'cp1252']
-
+        failed = []
         for section in self.state.curriculum.sections:
             section_folder = sanitize_filename(section.title)
-            slide_section_dir = os.path.join("output", "slides", section_folder)
-            os.makedirs(slide_section_dir, exist_ok=True)
 
             for lecture in section.lectures:
-                lecture_title = lecture.title
-                print(f"📐 Creating slides for: {lecture_title}")
+                if self._slides_done(section, lecture):
+                    continue
 
-                # Build correct lecture file path
                 lecture_filename = f"{sanitize_filename(lecture.title)}.md"
                 lecture_path = os.path.join("output", "lectures", section_folder, lecture_filename)
-
-                # Read lecture content with fallback encodings
-                lecture_content = None
-                for encoding in encodings_to_try:
-                    try:
-                        with open(lecture_path, 'r', encoding=encoding) as f:
-                            lecture_content = f.read()
-                        print(f"📄 Loaded lecture content from: {lecture_path} using {encoding}")
-                        break
-                    except UnicodeDecodeError:
-                        continue
-
+                lecture_content = self._read_lecture(lecture_path)
                 if not lecture_content:
                     print(f"❌ Failed to read lecture: {lecture_path}")
                     continue
 
-                # Run slide generation crew
-                crew = AssetGenerationCrew().crew()
-                result = crew.kickoff(inputs={
-                    "lecture_title": lecture.title,
-                    "lecture_objective": lecture.objective,
-                    "section_description": section.title,
-                    "audience_level": self.state.target_audience,
-                    "lecture_content": lecture_content
-                })
-
-                # Store generated slides
-                slides_md = result.raw
-
-                if not slides_md.strip():
-                    raise ValueError(f"⚠️ Empty content returned for '{lecture.title}'")
-
-                # Save Markdown Slides
-                slide_md_path = os.path.join(slide_section_dir, lecture_filename)
-                save_file(slide_section_dir, lecture_filename, slides_md)
-                print(f"💾 Markdown slides saved to: {slide_md_path}")
-
-                # Save PowerPoint (.pptx) version
-                slide_pptx_path = os.path.join(slide_section_dir,f"{sanitize_filename(lecture.title)}.pptx"
-)
-                convert_md_to_pptx(slides_md, slide_pptx_path)
-                print(f"📊 PowerPoint slides saved to: {slide_pptx_path}")
-
-        print("✅ Slides generated and saved in both Markdown and PPTX formats.")
+                try:
+                    await self._generate_slides(section, lecture, lecture_content)
+                except Exception as e:
+                    # Left unmarked in the manifest, so --resume retries it
+                    failed.append(lecture.title)
+                    print(f"⚠️ Slide generation failed for '{lecture.title}': {e}")
+
+        if failed:
+            print(f"⚠️ Slides missing for {len(failed)} lecture(s): {', '.join(failed)}")
+        else:
+            print("✅ Slides generated and saved in both Markdown and PPTX formats.")
         return self.state
 
+    async def _write_lectures_distributed(self):
+        """
+        Fan lectures and slide decks out to lecture_worker.py processes through the
+        shared work queue and record their results in the manifest as they land.
+        """
+        queue = WorkQueue(LECTURE_QUEUE_PATH)
+        started = time.time()
+        pending = {}
+        section_of = {}
+        # Lectures still to write, per section index; with the section barrier a section is
+        # queued once the earlier ones are written, otherwise all are queued at once
+        waves = {}
+
+        for index, section in enumerate(self.state.curriculum.sections):
+            for lecture in section.lectures:
+                if self._slides_done(section, lecture):
+                    continue
+                key = self.manifest.key(section.title, lecture.title)
+                section_of[key] = index
+                if self._lecture_done(section, lecture):
+                    payload = self._lecture_task_payload(section, lecture, key)
+                    queue.enqueue("slides", slides_key(key), payload, priority=SLIDES_PRIORITY)
+                    pending[key] = (section, lecture, payload, True)
+                else:
+                    waves.setdefault(index, []).append((section, lecture, key))
+
+        def queue_ready_waves():
+            while waves:
+                index = min(waves)
+                if LECTURE_CONTEXT_TOKEN_BUDGET > 0 and LECTURE_CONTEXT_SECTION_BARRIER and any(
+                        not written and section_of[key] < index for key, (*_, written) in pending.items()):
+                    return
+                for section, lecture, key in waves.pop(index):
+                    payload = self._lecture_task_payload(section, lecture, key)
+                    queue.enqueue("lecture", key, payload)
+                    pending[key] = (section, lecture, payload, False)
+
+        queue_ready_waves()
+        print(f"📬 Queued {len(pending)} lectures on {LECTURE_QUEUE_PATH}"
+              + (f" ({sum(map(len, waves.values()))} more once earlier sections are written)" if waves else ""))
+        workers = self._spawn_lecture_workers()
+        respawns = 0
+        idle_since = None
+        try:
+            while pending or waves:
+                await asyncio.sleep(LECTURE_QUEUE_POLL_SECONDS)
+                tasks = queue.get_many(list(pending) + [slides_key(key) for key in pending])
+
+                for key, (section, lecture, payload, lecture_written) in list(pending.items()):
+                    # Tasks not touched since this run started are leftovers from an earlier run
+                    lecture_task = tasks.get(key)
+                    if not lecture_written and lecture_task and lecture_task["updated"] >= started:
+                        if lecture_task["status"] == "failed":
+                            print(f"⚠️ Lecture failed on workers: {lecture.title}: {lecture_task['error']}")
+                            del pending[key]
+                            continue
+                        if lecture_task["status"] == "done":
+                            self.manifest.mark_lecture(section.title, lecture.title, payload["lecture_path"],
+                                                       self._lecture_fingerprint(section, lecture))
+                            self.lecture_index.add(key, self._read_lecture(payload["lecture_path"]) or "")
+                            print(f"💾 Lecture saved to: {payload['lecture_path']} ({lecture_task['lease_owner'] or 'worker'})")
+                            lecture_written = True
+                            pending[key] = (section, lecture, payload, True)
+
+                    slide_task = tasks.get(slides_key(key))
+                    if not lecture_written or not slide_task or slide_task["updated"] < started:
+                        continue
+                    if slide_task["status"] == "done":
+                        self.manifest.mark_slides(section.title, lecture.title,
+                                                  payload["slides_md_path"], payload["slides_pptx_path"],
+                                                  self._slides_fingerprint(section, lecture))
+                        print(f"📊 PowerPoint slides saved to: {payload['slides_pptx_path']}")
+                        del pending[key]
+                    elif slide_task["status"] == "failed":
+                        # Left unmarked in the manifest, so generate_lecture_slides retries it locally
+                        print(f"⚠️ Slide generation failed on workers for '{lecture.title}': {slide_task['error']}")
+                        del pending[key]
+                queue_ready_waves()
+
+                # Liveness: a live local worker or an unexpired lease means someone is working
+                now = time.time()
+                idle_exited = [proc for proc in workers if proc.poll() == 0]
+                if idle_exited and any(task["status"] == "queued" for task in tasks.values()):
+                    # Workers that ran out of work (--idle-exit) while a section was being written
+                    workers = [proc for proc in workers if proc not in idle_exited]
+                    workers += self._spawn_lecture_workers(len(idle_exited))
+                alive = any(proc.poll() is None for proc in workers)
+                leased = any(task["status"] == "leased" and (task["lease_expires"] or 0) > now
+                             for task in tasks.values())
+                give_up = None
+                if now - started > LECTURE_QUEUE_TIMEOUT_SECONDS:
+                    give_up = f"timed out after {LECTURE_QUEUE_TIMEOUT_SECONDS:.0f}s"
+                elif alive or leased:
+                    idle_since = None
+                elif workers and respawns < LECTURE_QUEUE_MAX_RESPAWNS:
+                    respawns += 1
+                    codes = sorted({proc.returncode for proc in workers})
+                    print(f"🔁 All local lecture workers exited (codes {codes}); "
+                          f"starting them again ({respawns}/{LECTURE_QUEUE_MAX_RESPAWNS})")
+                    workers = self._spawn_lecture_workers()
+                else:
+                    idle_since = idle_since or now
+                    if now - idle_since > LECTURE_QUEUE_IDLE_TIMEOUT_SECONDS:
+                        give_up = f"no live workers for {LECTURE_QUEUE_IDLE_TIMEOUT_SECONDS:.0f}s"
+                if give_up:
+                    queue.abandon(list(pending) + [slides_key(key) for key in pending], give_up)
+                    stranded = [entry[1] for entry in pending.values()]
+                    stranded += [lecture for wave in waves.values() for _section, lecture, _key in wave]
+                    for lecture in stranded:
+                        # Left unmarked in the manifest, so --resume (or the slide catch-up) retries it
+                        print(f"⚠️ Giving up on '{lecture.title}': {give_up}")
+                    pending.clear()
+                    waves.clear()
+        finally:
+            for proc in workers:
+                proc.terminate()
+        print(f"📬 Work queue: {queue.counts()}")
+
+    def _spawn_lecture_workers(self, count: int = None) -> list:
+        """Local workers; set LECTURE_QUEUE_LOCAL_WORKERS=0 when workers run on other hosts"""
+        env = dict(os.environ)
+        package_dir = os.path.dirname(LECTURE_WORKER_SCRIPT)
+        env["PYTHONPATH"] = os.pathsep.join([package_dir, os.path.dirname(package_dir), env.get("PYTHONPATH", "")])
+        # Their output goes to a log file, never to the flow's stdout (a protocol pipe under course_worker.py)
+        os.makedirs(os.path.dirname(LECTURE_WORKER_LOG), exist_ok=True)
+        with open(LECTURE_WORKER_LOG, "a", encoding="utf-8") as log:
+            return [
+                subprocess.Popen(
+                    [sys.executable, LECTURE_WORKER_SCRIPT, "--queue", os.path.abspath(LECTURE_QUEUE_PATH),
+                     "--workdir", os.getcwd(), "--idle-exit", "60"],
+                    env=env, stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT,
+                )
+                for _ in range(max(0, LECTURE_QUEUE_LOCAL_WORKERS if count is None else count))
+            ]
+
+    def _lecture_task_payload(self, section, lecture, key: str) -> dict:
+        """Everything a lecture worker needs; paths are relative to the flow's working directory"""
+        section_folder = sanitize_filename(section.title)
+        filename = sanitize_filename(lecture.title)
+        return {
+            "key": key,
+            "lecture_title": lecture.title,
+            # previous_sections is retrieved by the worker when it claims the task, from the
+            # earlier lectures on disk by then
+            "lecture_inputs": self._lecture_inputs(section, lecture),
+            "context": self._lecture_context_spec(section, lecture),
+            "slide_inputs": self._slide_inputs(section, lecture),
+            "lecture_path": os.path.join("output", "lectures", section_folder, f"{filename}.md"),
+            "slides_md_path": os.path.join("output", "slides", section_folder, f"{filename}.md"),
+            "slides_pptx_path": os.path.join("output", "slides", section_folder, f"{filename}.pptx"),
+        }
+
+    def _lecture_inputs(self, section, lecture, previous_sections: str = "") -> dict:
+        return {
+            "lecture_title": lecture.title,
+            "lecture_objective": lecture.objective,
+            "section_description": section.title,
+            "audience_level": self.state.target_audience,
+            "previous_sections": previous_sections,
+        }
+
+    def _index_written_lectures(self):
+        """Index the lectures already on disk (resume/rebuild), so new lectures can retrieve from them"""
+        for section in self.state.curriculum.sections:
+            for lecture in section.lectures:
+                key = self.manifest.key(section.title, lecture.title)
+                if key in self.lecture_index or not self._lecture_done(section, lecture):
+                    continue
+                path = os.path.join("output", "lectures", sanitize_filename(section.title),
+                                    f"{sanitize_filename(lecture.title)}.md")
+                content = self._read_lecture(path)
+                if content:
+                    self.lecture_index.add(key, content)
+
+    def _earlier_lectures(self, section, lecture) -> list:
+        """
+        (key, path) of the lectures before this one in curriculum order; only those
+        of earlier sections with the section barrier
+        """
+        earlier = []
+        for other_section in self.state.curriculum.sections:
+            for other in other_section.lectures:
+                if other is lecture or (LECTURE_CONTEXT_SECTION_BARRIER and other_section is section):
+                    return earlier
+                earlier.append((self.manifest.key(other_section.title, other.title),
+                                os.path.join("output", "lectures", sanitize_filename(other_section.title),
+                                             f"{sanitize_filename(other.title)}.md")))
+        return earlier
+
+    @staticmethod
+    def _context_query(section, lecture) -> str:
+        return f"{section.title}\n{lecture.title}\n{lecture.objective}\n{lecture.activity}"
+
+    def _lecture_context_spec(self, section, lecture) -> dict:
+        """What a lecture worker needs to retrieve previous_sections itself (lecture_worker.retrieve_context)"""
+        return {
+            "query": self._context_query(section, lecture),
+            "token_budget": LECTURE_CONTEXT_TOKEN_BUDGET,
+            "documents": self._earlier_lectures(section, lecture),
+        }
+
+    def _previous_lectures(self, section, lecture) -> str:
+        """
+        The passages of earlier lectures most relevant to this one, within
+        LECTURE_CONTEXT_TOKEN_BUDGET, from those written by now. Ranking and order
+        depend only on the earlier lectures, not on what else is indexed.
+        """
+        if LECTURE_CONTEXT_TOKEN_BUDGET <= 0:
+            return "No previous lectures written yet."
+        context = self.lecture_index.build_context(
+            self._context_query(section, lecture), LECTURE_CONTEXT_TOKEN_BUDGET,
+            documents=[key for key, _path in self._earlier_lectures(section, lecture)])
+        return context or "No previous lectures written yet."
+
+    def _slide_inputs(self, section, lecture) -> dict:
+        return {
+            "lecture_title": lecture.title,
+            "lecture_objective": lecture.objective,
+            "section_description": section.title,
+            "audience_level": self.state.target_audience,
+        }
+
+    def _outline_entry(self, section, lecture) -> dict:
+        return {"section": section.title, "title": lecture.title,
+                "objective": lecture.objective, "activity": lecture.activity}
+
+    def _lecture_fingerprint(self, section, lecture) -> dict:
+        return artifact_fingerprint(self._outline_entry(section, lecture),
+                                    self._lecture_inputs(section, lecture), crew_fingerprint(ContentCrew))
+
+    def _slides_fingerprint(self, section, lecture) -> dict:
+        # Slides also depend on the lecture they were made from
+        inputs = {**self._slide_inputs(section, lecture),
+                  "lecture_sha256": self.manifest.lecture_sha256(section.title, lecture.title),
+                  "map_reduce": map_reduce_settings()}
+        return artifact_fingerprint(self._outline_entry(section, lecture), inputs,
+                                    crew_fingerprint(AssetGenerationCrew))
+
+    def _lecture_done(self, section, lecture) -> bool:
+        """On disk; in a rebuild, also generated from the current inputs"""
+        expected = self._lecture_fingerprint(section, lecture) if self.state.rebuild else None
+        return self.manifest.lecture_done(section.title, lecture.title, expected)
+
+    def _slides_done(self, section, lecture) -> bool:
+        if self.state.rebuild and not self._lecture_done(section, lecture):
+            return False
+        expected = self._slides_fingerprint(section, lecture) if self.state.rebuild else None
+        return self.manifest.slides_done(section.title, lecture.title, expected)
+
+    def rebuild_plan(self) -> RebuildPlan:
+        """Which lectures and slide decks a rebuild would regenerate, compared with the manifest"""
+        if getattr(self, "manifest", None) is None:
+            self.manifest = LectureManifest()
+        plan = RebuildPlan("lectures and slide decks")
+        if self.state.curriculum is None and not self._load_curriculum():
+            print(f"No saved curriculum at {CURRICULUM_JSON_PATH}; a rebuild designs the whole course")
+            return plan
+
+        for section in self.state.curriculum.sections:
+            for lecture in section.lectures:
+                name = self.manifest.key(section.title, lecture.title)
+                lecture_fp, slides_fp = self.manifest.fingerprints(section.title, lecture.title)
+                lecture_reasons = changed_parts(lecture_fp, self._lecture_fingerprint(section, lecture))
+                if not lecture_reasons and not self.manifest.lecture_done(section.title, lecture.title):
+                    lecture_reasons = ["missing"]
+                plan.add(name, lecture_reasons)
+
+                if lecture_reasons:
+                    slides_reasons = ["lecture"]
+                else:
+                    slides_reasons = changed_parts(slides_fp, self._slides_fingerprint(section, lecture))
+                    if not slides_reasons and not self.manifest.slides_done(section.title, lecture.title):
+                        slides_reasons = ["missing"]
+                plan.add(f"{name} [slides]", slides_reasons)
+        return plan
+
+    def _read_lecture(self, lecture_path: str):
+        """Read lecture content from disk with fallback encodings"""
+        if not os.path.exists(lecture_path):
+            return None
+
+        for encoding in ['utf-8', 'utf-8-sig', 'latin-1', 'cp1252']:
+            try:
+                with open(lecture_path, 'r', encoding=encoding) as f:
+                    lecture_content = f.read()
+                print(f"📄 Loaded lecture content from: {lecture_path} using {encoding}")
+                return lecture_content
+            except UnicodeDecodeError:
+                continue
+        return None
+
+    async def _generate_slides(self, section, lecture, lecture_content: str):
+        """Generate Markdown + PPTX slides for one lecture"""
+        print(f"📐 Creating slides for: {lecture.title}")
+        slide_section_dir = os.path.join("output", "slides", sanitize_filename(section.title))
+        os.makedirs(slide_section_dir, exist_ok=True)
+        lecture_filename = f"{sanitize_filename(lecture.title)}.md"
+
+        # One crew call, or map-reduce over chunks for long lectures;
+        # Markdown is rendered locally from the structured deck
+        with span("slides", lecture=lecture.title):
+            slides_md, deck = await generate_slides(self._slide_inputs(section, lecture), lecture_content)
+
+        if not slides_md.strip():
+            raise ValueError(f"⚠️ Empty content returned for '{lecture.title}'")
+
+        # Save Markdown Slides
+        slide_md_path = os.path.join(slide_section_dir, lecture_filename)
+        save_file(slide_section_dir, lecture_filename, slides_md)
+        save_deck_source(slide_md_path, deck)
+        print(f"💾 Markdown slides saved to: {slide_md_path}")
+
+        # Save PowerPoint (.pptx) version in the render process pool
+        slide_pptx_path = os.path.join(slide_section_dir, f"{sanitize_filename(lecture.title)}.pptx")
+        with span("slides.render", lecture=lecture.title):
+            render_seconds = await self.render_pool.render_async(deck, slide_pptx_path)
+        self.manifest.mark_slides(section.title, lecture.title, slide_md_path, slide_pptx_path,
+                                  self._slides_fingerprint(section, lecture))
+        print(f"📊 PowerPoint slides saved to: {slide_pptx_path} ({render_seconds:.2f}s)")
+
     @listen(generate_lecture_slides)
+    async def export_html(self):
+        """HTML pages for every lecture plus a course page; unchanged lectures reuse cached fragments"""
+        if not self.state.curriculum:
+            return
+        order = [
+            os.path.join(sanitize_filename(section.title), f"{sanitize_filename(lecture.title)}.md")
+            for section in self.state.curriculum.sections for lecture in section.lectures
+        ]
+        pages = await asyncio.to_thread(
+            export_lectures_html, os.path.join("output", "lectures"), os.path.join("output", "html"),
+            order, self.state.curriculum.title,
+        )
+        print(f"🌐 HTML export: {len(pages)} pages updated in output/html")
+
+    @listen(export_html)
     def final_debug_report(self):
         print("\n📊 Final Report:")
         if self.state.curriculum:
@@ -192,8 +653,21 @@ class UdemyCourseCreationFlow(Flow[CourseState]):
             print("Lectures written: output/lectures/<section>/<lecture>.md")
             print("Slides generated: output/slides/<section>/<lecture>.md")
             print("PowerPoint versions: output/slides/<section>/<lecture>.pptx")
+            print("HTML: output/html/course.html and output/html/lectures/<section>/<lecture>.html")
+            print(f"Completion manifest: {self.manifest.path}")
         else:
             print("❌ Curriculum not available. Check earlier steps.")
 
+        cache = get_default_cache()
+        if cache is not None:
+            print(cache.format_stats())
+        cassette = get_cassette()
+        if cassette is not None:
+            print(cassette.format_stats())
+        print(format_limiter_stats())
+        print(get_fragment_cache().format_stats())
+        print(self.lecture_index.format_stats())
+        print(f"Trace written to {TRACE_PATH}")
+
         print("✅ Udemy course generation complete.")
         return self.state
\ No newline at end of file
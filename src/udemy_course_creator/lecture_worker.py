@@ -0,0 +1,144 @@
+"""
+Lecture worker for the distributed course pipeline (utils/work_queue.py).
+
+    python src/udemy_course_creator/lecture_worker.py --queue /shared/course/output/work_queue.sqlite \
+        --workdir /shared/course
+
+Claims "lecture" and "slides" tasks queued by UdemyCourseCreationFlow (when
+LECTURE_QUEUE_PATH is set), runs the crew, writes the artifacts under --workdir
+and reports the result back through the queue. Start as many workers as you like,
+on this machine or on others that mount the same directory. Artifact paths in
+tasks are relative to the flow's working directory, so --workdir must point at
+the same directory as seen from this host.
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from crews.content_crew.content_crew import ContentCrew
+from tools.file_manager_tool import save_file
+from utils.pptx_render_pool import render_deck, save_deck_source
+from utils.slide_map_reduce import generate_slides
+from utils.work_queue import SLIDES_PRIORITY, WorkQueue, default_worker_id, slides_key
+from guide_creator_flow.utils.crew_factory import build_crew
+from guide_creator_flow.utils.passage_index import PassageIndex
+from guide_creator_flow.utils.tracing import span, trace_crew_tasks
+
+def _read(path: str) -> str:
+    for encoding in ("utf-8", "utf-8-sig", "latin-1"):
+        try:
+            with open(path, "r", encoding=encoding) as f:
+                return f.read()
+        except UnicodeDecodeError:
+            continue
+    raise ValueError(f"Cannot decode {path}")
+
+
+def retrieve_context(spec: dict) -> str:
+    """
+    previous_sections for a lecture, retrieved at claim time from the earlier
+    lectures already on disk (spec from UdemyCourseCreationFlow._lecture_context_spec)
+    """
+    if not spec or spec["token_budget"] <= 0:
+        return "No previous lectures written yet."
+    index = PassageIndex()
+    for key, path in spec["documents"]:
+        if os.path.isfile(path) and os.path.getsize(path) > 0:
+            index.add(key, _read(path))
+    context = index.build_context(spec["query"], spec["token_budget"],
+                                  documents=[key for key, _path in spec["documents"]])
+    return context or "No previous lectures written yet."
+
+
+def run_lecture(task: dict) -> dict:
+    payload = task["payload"]
+    inputs = dict(payload["lecture_inputs"])
+    if "context" in payload:
+        inputs["previous_sections"] = retrieve_context(payload["context"])
+    with span("lecture", lecture=payload["lecture_title"], worker=True):
+        crew = trace_crew_tasks(build_crew(ContentCrew), "lecture", ["write", "review"])
+        result = crew.kickoff(inputs=inputs)
+    if not result.raw.strip():
+        raise ValueError(f"Empty lecture returned for '{payload['lecture_title']}'")
+
+    path = payload["lecture_path"]
+    save_file(os.path.dirname(path), os.path.basename(path), result.raw)
+    return {"lecture_path": path}
+
+
+def follow_up_tasks(task: dict) -> list:
+    """Tasks queued when a task completes; the deck is its own task, so any worker can pick it up"""
+    if task["kind"] != "lecture":
+        return []
+    payload = task["payload"]
+    return [("slides", slides_key(payload["key"]), payload, SLIDES_PRIORITY)]
+
+
+def run_slides(task: dict) -> dict:
+    payload = task["payload"]
+    lecture_content = _read(payload["lecture_path"])
+    with span("slides", lecture=payload["lecture_title"], worker=True):
+        slides_md, deck = asyncio.run(generate_slides(payload["slide_inputs"], lecture_content))
+    if not slides_md.strip():
+        raise ValueError(f"Empty slides returned for '{payload['lecture_title']}'")
+
+    md_path, pptx_path = payload["slides_md_path"], payload["slides_pptx_path"]
+    save_file(os.path.dirname(md_path), os.path.basename(md_path), slides_md)
+    save_deck_source(md_path, deck)
+    with span("slides.render", lecture=payload["lecture_title"]):
+        render_deck(deck, pptx_path)
+    return {"slides_md_path": md_path, "slides_pptx_path": pptx_path}
+
+
+def work(queue: WorkQueue, worker_id: str, kinds=None, idle_exit: float = 0, poll: float = 2.0) -> int:
+    """Claim and run tasks until idle for idle_exit seconds (0 = forever); returns tasks done"""
+    done = 0
+    idle_since = time.monotonic()
+    while True:
+        task = queue.claim(worker_id, kinds)
+        if task is None:
+            if idle_exit and time.monotonic() - idle_since > idle_exit:
+                return done
+            time.sleep(poll)
+            continue
+
+        print(f"[{worker_id}] {task['kind']} {task['key']} (attempt {task['attempts']})", flush=True)
+        with queue.lease(task, worker_id) as lost:
+            try:
+                result = run_lecture(task) if task["kind"] == "lecture" else run_slides(task)
+                error = None
+            except Exception as e:
+                result, error = None, repr(e)
+
+        if lost.is_set():
+            print(f"[{worker_id}] lease lost on {task['key']}, result dropped", flush=True)
+        elif error is not None:
+            queue.fail(task["id"], worker_id, error)
+            print(f"[{worker_id}] {task['key']} failed: {error}", flush=True)
+        elif queue.complete(task["id"], worker_id, result, follow_up_tasks(task)):
+            done += 1
+        idle_since = time.monotonic()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run lecture and slide tasks from a shared work queue")
+    parser.add_argument("--queue", default=os.getenv("LECTURE_QUEUE_PATH"), help="Path of the SQLite work queue")
+    parser.add_argument("--workdir", default=".", help="The flow's working directory, as mounted on this host")
+    parser.add_argument("--worker-id", default=None)
+    parser.add_argument("--kinds", default="lecture,slides", help="Task kinds to take, e.g. 'slides'")
+    parser.add_argument("--idle-exit", type=float, default=0, help="Exit after this many idle seconds (0 = never)")
+    args = parser.parse_args()
+    if not args.queue:
+        parser.error("--queue (or LECTURE_QUEUE_PATH) is required")
+
+    queue = WorkQueue(os.path.abspath(args.queue))
+    os.chdir(args.workdir)
+    worker_id = args.worker_id or default_worker_id()
+    print(f"Lecture worker {worker_id} polling {queue.path}", flush=True)
+    done = work(queue, worker_id, args.kinds.split(","), args.idle_exit)
+    print(f"Lecture worker {worker_id} finished {done} tasks", flush=True)
+
+
+if __name__ == "__main__":
+    main()
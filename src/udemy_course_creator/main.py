@@ -1,5 +1,6 @@
 from flows.udemy_course_flow import UdemyCourseCreationFlow
-#from flows.test_slide_generation_only import UdemyCourseCreationFlow
+from guide_creator_flow.utils.tracing import span
+import argparse
 import sys
 import io
 
@@ -19,20 +20,47 @@ COURSE_DESCRIPTION_POINTS = [
 TARGET_AUDIENCE_DESC = "Developers and AI enthusiasts familiar with Python who want to build advanced CrewAI-powered applications."
 COURSE_MAIN_GOAL = "By the end of this course, students will be able to design, implement, and deploy full-stack CrewAI applications."
 
-def kickoff():
-    print("🚀 Starting Udemy Course Creation Flow...")
+COURSE_INPUTS = {
+    "course_title": COURSE_TITLE,
+    "course_subtitle": COURSE_SUBTITLE_IDEA,
+    "description_points": COURSE_DESCRIPTION_POINTS,  # Pass as list, not joined string
+    "target_audience": TARGET_AUDIENCE_DESC,
+    "course_goal": COURSE_MAIN_GOAL,
+}
+
+def kickoff(resume: bool = False, rebuild: bool = False):
+    if rebuild:
+        print("🔁 Rebuilding lectures and slides whose inputs changed since the last run...")
+    elif resume:
+        print("♻️ Resuming Udemy Course Creation Flow from output/course_manifest.json...")
+    else:
+        print("🚀 Starting Udemy Course Creation Flow...")
     flow = UdemyCourseCreationFlow()
     
     # Pass inputs directly instead of prompting
-    flow.kickoff(inputs={
-        "course_title": COURSE_TITLE,
-        "course_subtitle": COURSE_SUBTITLE_IDEA,
-        "description_points": COURSE_DESCRIPTION_POINTS,  # Pass as list, not joined string
-        "target_audience": TARGET_AUDIENCE_DESC,
-        "course_goal": COURSE_MAIN_GOAL
-        })
+    with span("course_flow", resume=resume, rebuild=rebuild):
+        flow.kickoff(inputs={**COURSE_INPUTS, "resume": resume, "rebuild": rebuild})
     
     print("✅ Course generation complete!")
 
+def print_rebuild_plan():
+    """What --rebuild would regenerate, without running any crew"""
+    flow = UdemyCourseCreationFlow()
+    for field, value in COURSE_INPUTS.items():
+        setattr(flow.state, field, value)
+    flow.state.rebuild = True
+    print(flow.rebuild_plan().format())
+
 if __name__ == "__main__":
-    kickoff()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Generate a Udemy course with CrewAI")
+    parser.add_argument("--resume", action="store_true",
+                        help="Reuse the saved curriculum and skip lectures/slides that are already complete")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Reuse the saved curriculum and regenerate only lectures/slides whose inputs "
+                             "(curriculum entry, prompt inputs, crew YAML, model settings) changed")
+    parser.add_argument("--dry-run", action="store_true", help="With --rebuild: print the plan and exit")
+    args = parser.parse_args()
+    if args.rebuild and args.dry_run:
+        print_rebuild_plan()
+    else:
+        kickoff(resume=args.resume, rebuild=args.rebuild)
\ No newline at end of file
@@ -20,4 +20,6 @@ class CourseState(BaseModel):
     description_points: List[str] = []
     target_audience: str = ""
     course_goal: str = ""
-    curriculum: Optional[Curriculum] = None  # ✅ Now accepts None
\ No newline at end of file
+    curriculum: Optional[Curriculum] = None  # ✅ Now accepts None
+    resume: bool = False  # Reload the saved curriculum and skip finished lectures
+    rebuild: bool = False  # Reload the saved curriculum and redo only lectures/slides whose inputs changed
\ No newline at end of file
@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+from typing import List, Literal
+
+# Every field is required: OpenAI's strict structured outputs reject optional fields,
+# so slides that don't use a field leave it empty instead.
+
+class Slide(BaseModel):
+    type: Literal["title", "concept", "code", "summary"]
+    title: str
+    bullets: List[str]
+    code: str  # Only for code slides, "" otherwise
+    language: str  # Language of the code block, "" when there is none
+
+class SlideDeck(BaseModel):
+    lecture_title: str
+    slides: List[Slide]
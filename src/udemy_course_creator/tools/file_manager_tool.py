@@ -1,12 +1,14 @@
 import os
+from guide_creator_flow.utils.tracing import span
 
 def save_file(path, filename, content):
     """Saves content to a file using UTF-8 encoding"""
     os.makedirs(path, exist_ok=True)
     full_path = os.path.join(path, filename)
     
-    with open(full_path, 'w', encoding='utf-8', errors='utf-8-sig') as f:
-        f.write(content)
+    with span("file.save", path=full_path):
+        with open(full_path, 'w', encoding='utf-8', errors='utf-8-sig') as f:
+            f.write(content)
 
     return full_path
 
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import zipfile
+from typing import Optional, Tuple
+from utils.helpers import sanitize_filename
+
+DEFAULT_MANIFEST_PATH = os.path.join("output", "course_manifest.json")
+
+
+def _sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(65536), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def atomic_write_json(path: str, data: dict):
+    """Write JSON through a temp file + rename so readers never see a half-written file"""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp_", suffix=".json")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class LectureManifest:
+    """
+    Per-lecture completion manifest for UdemyCourseCreationFlow.
+    Every finished lecture / slide deck is recorded with the hash of the files
+    written, so a resumed run can skip work that is already on disk and valid,
+    and with the fingerprint of its inputs, so a rebuild can also skip work
+    whose inputs did not change.
+    """
+
+    def __init__(self, path: str = DEFAULT_MANIFEST_PATH, reset: bool = False):
+        self.path = path
+        self._lock = threading.Lock()
+        self.data = {"lectures": {}}
+        if not reset and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.data = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"⚠️ Ignoring unreadable manifest {path}: {e}")
+        self.data.setdefault("lectures", {})
+
+    @staticmethod
+    def key(section_title: str, lecture_title: str) -> str:
+        return f"{sanitize_filename(section_title)}/{sanitize_filename(lecture_title)}"
+
+    def _entry(self, section_title: str, lecture_title: str) -> dict:
+        return self.data["lectures"].setdefault(self.key(section_title, lecture_title), {})
+
+    def _save(self):
+        self.data["updated_at"] = time.time()
+        atomic_write_json(self.path, self.data)
+
+    @staticmethod
+    def _file_record(path: str) -> dict:
+        return {"path": path, "sha256": _sha256_file(path)}
+
+    @staticmethod
+    def _file_valid(record: dict) -> bool:
+        if not record:
+            return False
+        path = record.get("path", "")
+        if not os.path.isfile(path) or os.path.getsize(path) == 0:
+            return False
+        if path.endswith(".pptx") and not zipfile.is_zipfile(path):
+            return False
+        return _sha256_file(path) == record.get("sha256")
+
+    def mark_lecture(self, section_title: str, lecture_title: str, lecture_path: str,
+                     fingerprint: Optional[dict] = None):
+        with self._lock:
+            entry = self._entry(section_title, lecture_title)
+            entry["lecture"] = {**self._file_record(lecture_path), "fingerprint": fingerprint}
+            # A rewritten lecture invalidates its slides
+            entry.pop("slides", None)
+            self._save()
+
+    def mark_slides(self, section_title: str, lecture_title: str, slides_md_path: str, slides_pptx_path: str,
+                    fingerprint: Optional[dict] = None):
+        with self._lock:
+            entry = self._entry(section_title, lecture_title)
+            entry["slides"] = {
+                "markdown": self._file_record(slides_md_path),
+                "pptx": self._file_record(slides_pptx_path),
+                "fingerprint": fingerprint,
+            }
+            self._save()
+
+    def _records(self, section_title: str, lecture_title: str) -> Tuple[dict, dict]:
+        entry = self.data["lectures"].get(self.key(section_title, lecture_title), {})
+        return entry.get("lecture") or {}, entry.get("slides") or {}
+
+    def lecture_done(self, section_title: str, lecture_title: str, fingerprint: Optional[dict] = None) -> bool:
+        """Written and intact; with a fingerprint, also written from the same inputs"""
+        lecture, _ = self._records(section_title, lecture_title)
+        if fingerprint is not None and lecture.get("fingerprint") != fingerprint:
+            return False
+        return self._file_valid(lecture)
+
+    def slides_done(self, section_title: str, lecture_title: str, fingerprint: Optional[dict] = None) -> bool:
+        _, slides = self._records(section_title, lecture_title)
+        if fingerprint is not None and slides.get("fingerprint") != fingerprint:
+            return False
+        return self._file_valid(slides.get("markdown")) and self._file_valid(slides.get("pptx"))
+
+    def fingerprints(self, section_title: str, lecture_title: str) -> Tuple[Optional[dict], Optional[dict]]:
+        """Recorded (lecture, slides) input fingerprints"""
+        lecture, slides = self._records(section_title, lecture_title)
+        return lecture.get("fingerprint"), slides.get("fingerprint")
+
+    def lecture_sha256(self, section_title: str, lecture_title: str) -> Optional[str]:
+        lecture, _ = self._records(section_title, lecture_title)
+        return lecture.get("sha256")
@@ -0,0 +1,365 @@
+"""
+Tolerant curriculum extraction from CourseDesignCrew output.
+
+One pass over the raw completion yields both views the model writes: the JSON
+block (repaired when it is truncated or sloppy) and the Markdown outline. They
+are merged field by field, and whatever is still missing is reported by path
+(e.g. "sections[2].lectures[0].objective"), so a follow-up LLM call only has
+to fill those gaps instead of regenerating the whole curriculum.
+"""
+import json
+import re
+from typing import List, Optional, Tuple
+
+from models.curriculum_model import Curriculum
+
+LECTURE_FIELDS = ("title", "objective", "activity")
+
+# A number after a Section/Lecture/Module/Lesson label, or a dotted outline number ("1.", "1.2");
+# a plain leading integer is part of the title ("2024 Trends", "10 Tips for X")
+_NUMBER_PREFIX = re.compile(
+    r"^(?:(?:section|lecture|module|lesson)\s*\d+(?:\.\d+)*\.?|\d+(?:\.\d+)+\.?(?=[\s:)\-–—])|\d+\.(?=\s))"
+    r"\s*[:.)\-–—]?\s*", re.IGNORECASE)
+_LABEL_PREFIX = re.compile(r"^(?:course\s+(?:outline|title)|course)\s*:\s*", re.IGNORECASE)
+_FIELD_LINE = re.compile(
+    r"^[-*+]?\s*\**\s*(learning\s+objectives?|objectives?|goals?|activit(?:y|ies)|exercises?)\s*\**\s*:\s*\**\s*(.*)$",
+    re.IGNORECASE,
+)
+_LECTURE_LINE = re.compile(r"^(?:#{3,6}\s+|[-*+]\s+)?\**\s*(?:lecture|lesson)\s+[\d.]+\s*[:.)\-–—]?\s*(.+?)\**\s*$",
+                           re.IGNORECASE)
+_SECTION_LINE = re.compile(r"^(?:#{2,3}\s+|[-*+]\s+)?\**\s*(?:section|module)\s+\d+\s*[:.)\-–—]?\s*(.+?)\**\s*$",
+                           re.IGNORECASE)
+
+
+def clean_title(title: str) -> str:
+    """Strip Markdown emphasis and 'Section 1:' / 'Lecture 1.2:' style numbering"""
+    title = title.strip().strip("*_#").strip()
+    title = _LABEL_PREFIX.sub("", title)
+    return _NUMBER_PREFIX.sub("", title).strip().strip("*_").strip()
+
+
+def _append(existing: str, value: str) -> str:
+    if not existing:
+        return value
+    return f"{existing} {value}" if existing.endswith((".", "!", "?", ";")) else f"{existing}; {value}"
+
+
+def _norm(title: str) -> str:
+    return re.sub(r"[^a-z0-9]+", " ", clean_title(title).lower()).strip()
+
+
+# --- JSON ---
+
+def _json_candidate(text: str) -> Optional[str]:
+    """The last ```json block (possibly unterminated), else the last object that mentions sections"""
+    fence = text.rfind("```json")
+    if fence != -1:
+        body = text[fence + len("```json"):]
+        end = body.find("```")
+        return body if end == -1 else body[:end]
+    start = text.find('{"title"') if '{"title"' in text else text.find("{")
+    while start != -1:
+        if '"sections"' in text[start:]:
+            return text[start:]
+        start = text.find("{", start + 1)
+    return None
+
+
+def repair_json(fragment: str) -> Tuple[Optional[object], bool]:
+    """
+    Parse possibly truncated JSON in a single scan. The scanner tracks nesting and
+    remembers the last point where a value was complete; if the text ends early it
+    is cut back to that point and the open containers are closed.
+    Returns (data or None, whether a repair was needed).
+    """
+    text = fragment.strip()
+    try:
+        return json.loads(text), False
+    except json.JSONDecodeError:
+        pass
+
+    stack = []       # open containers: "{" or "["
+    expect = []      # per container: what comes next ("key", "colon", "value", "comma")
+    safe_end, safe_stack = None, None
+    i, n = 0, len(text)
+
+    def value_done(position):
+        nonlocal safe_end, safe_stack
+        if expect:
+            expect[-1] = "comma"
+        safe_end, safe_stack = position, list(stack)
+
+    while i < n:
+        ch = text[i]
+        if ch in " \t\r\n":
+            i += 1
+        elif ch in "{[":
+            stack.append(ch)
+            expect.append("key" if ch == "{" else "value")
+            i += 1
+            safe_end, safe_stack = i, list(stack)
+        elif ch in "}]":
+            if not stack:
+                break
+            stack.pop()
+            expect.pop()
+            i += 1
+            value_done(i)
+            if not stack:
+                break
+        elif ch == '"':
+            j = i + 1
+            while j < n and text[j] != '"':
+                j += 2 if text[j] == "\\" else 1
+            if j >= n:
+                break  # truncated inside a string
+            i = j + 1
+            if expect and expect[-1] == "key":
+                expect[-1] = "colon"
+            else:
+                value_done(i)
+        elif ch == ":":
+            if expect:
+                expect[-1] = "value"
+            i += 1
+        elif ch == ",":
+            if expect:
+                expect[-1] = "key" if stack[-1] == "{" else "value"
+            i += 1
+        else:
+            j = i
+            while j < n and (text[j].isalnum() or text[j] in "+-."):
+                j += 1
+            if j >= n or j == i:
+                break  # truncated literal, or junk we cannot interpret
+            i = j
+            value_done(i)
+
+    if safe_end is None:
+        return None, True
+    repaired = text[:safe_end].rstrip().rstrip(",")
+    repaired += "".join("}" if c == "{" else "]" for c in reversed(safe_stack))
+    # Trailing commas before a closer are a common model quirk
+    repaired = re.sub(r",\s*([}\]])", r"\1", repaired)
+    try:
+        return json.loads(repaired), True
+    except json.JSONDecodeError:
+        return None, True
+
+
+# --- Markdown ---
+
+def parse_outline_markdown(text: str) -> dict:
+    """
+    Parse the Markdown outline, tolerating the layouts the model drifts between:
+    '## Section 1: ...' or '**Section 1: ...**', '### Lecture 1.1: ...',
+    '- **Lecture 1.1: ...**' or '#### Lecture 1.1: ...', and objectives/activities
+    given inline ('- **Objective:** ...') or as nested bullet lists.
+    """
+    result = {"title": "", "sections": []}
+    section, lecture, field = None, None, None
+    in_fence = False
+
+    for raw in text.splitlines():
+        line = raw.strip()
+        if line.startswith("```"):
+            in_fence = not in_fence
+            continue
+        if in_fence or not line or line == "---":
+            continue
+
+        if line.startswith("# ") and not result["title"]:
+            result["title"] = clean_title(line[2:])
+            continue
+
+        field_match = _FIELD_LINE.match(line)
+        lecture_match = _LECTURE_LINE.match(line)
+        section_match = _SECTION_LINE.match(line)
+
+        if section_match and not lecture_match:
+            section = {"title": clean_title(section_match.group(1)), "lectures": []}
+            result["sections"].append(section)
+            lecture, field = None, None
+        elif lecture_match or (line.startswith("### ") and section is not None
+                               and not field_match and not line.endswith(":")):
+            title = lecture_match.group(1) if lecture_match else line[4:]
+            if section is None:
+                section = {"title": "", "lectures": []}
+                result["sections"].append(section)
+            lecture = {"title": clean_title(title), "objective": "", "activity": ""}
+            section["lectures"].append(lecture)
+            field = None
+        elif field_match and lecture is not None:
+            label = field_match.group(1).lower()
+            field = "objective" if label.startswith(("objective", "learning", "goal")) else "activity"
+            value = field_match.group(2).strip().strip("*").strip()
+            if value:
+                lecture[field] = _append(lecture[field], value)
+        elif field and lecture is not None and re.match(r"^[-*+]\s+", line):
+            # Nested bullets under an 'Objectives:' / 'Activities:' label
+            lecture[field] = _append(lecture[field], re.sub(r"^[-*+]\s+", "", line).strip())
+        elif line.startswith("## "):
+            # Any other H2 (description, prerequisites...) ends the current lecture
+            lecture, field = None, None
+
+    return result
+
+
+# --- Merge, validate, report ---
+
+def _merge_lectures(primary: list, secondary: list) -> list:
+    by_title = {_norm(lec.get("title", "")): lec for lec in secondary}
+    merged = []
+    for index, lecture in enumerate(primary):
+        lecture = {field: (lecture.get(field) or "").strip() for field in LECTURE_FIELDS}
+        other = by_title.get(_norm(lecture["title"])) or (secondary[index] if index < len(secondary) else {})
+        for field in LECTURE_FIELDS:
+            if not lecture[field] and other.get(field):
+                lecture[field] = other[field]
+        merged.append(lecture)
+    # The JSON was cut short: keep the lectures only the Markdown has
+    merged += [dict(lec) for lec in secondary[len(primary):]]
+    for lecture in merged:
+        lecture["title"] = clean_title(lecture.get("title") or "")
+    return merged
+
+
+def merge_curriculum(primary: dict, secondary: dict) -> dict:
+    """Fill every empty field of primary from secondary, matching by title and then position"""
+    merged = {"title": clean_title(primary.get("title") or "") or clean_title(secondary.get("title") or ""),
+              "sections": []}
+    other_sections = secondary.get("sections") or []
+    by_title = {_norm(s.get("title", "")): s for s in other_sections}
+
+    primary_sections = primary.get("sections") or []
+    for index, section in enumerate(primary_sections):
+        other = by_title.get(_norm(section.get("title", ""))) or (
+            other_sections[index] if index < len(other_sections) else {})
+        merged["sections"].append({
+            "title": clean_title(section.get("title") or "") or clean_title(other.get("title") or ""),
+            "lectures": _merge_lectures(section.get("lectures") or [], other.get("lectures") or []),
+        })
+    for section in other_sections[len(primary_sections):]:
+        merged["sections"].append({"title": clean_title(section.get("title") or ""),
+                                   "lectures": _merge_lectures(section.get("lectures") or [], [])})
+    return merged
+
+
+def missing_fields(data: dict) -> List[str]:
+    """Paths of every field a valid, complete curriculum still lacks"""
+    missing = []
+    if not data.get("title"):
+        missing.append("title")
+    if not data.get("sections"):
+        missing.append("sections")
+    for s, section in enumerate(data.get("sections") or []):
+        if not section.get("title"):
+            missing.append(f"sections[{s}].title")
+        if not section.get("lectures"):
+            missing.append(f"sections[{s}].lectures")
+        for l, lecture in enumerate(section.get("lectures") or []):
+            for field in LECTURE_FIELDS:
+                if not lecture.get(field):
+                    missing.append(f"sections[{s}].lectures[{l}].{field}")
+    return missing
+
+
+class CurriculumExtraction:
+    """Outcome of one extraction: merged data, what is missing and where it came from"""
+
+    def __init__(self, data: dict, json_status: str, markdown_sections: int):
+        self.data = data
+        self.json_status = json_status  # "complete", "repaired" or "none"
+        self.markdown_sections = markdown_sections
+        self.missing = missing_fields(data)
+
+    @property
+    def complete(self) -> bool:
+        return not self.missing
+
+    def validate(self) -> Curriculum:
+        return Curriculum(**self.data)
+
+    def summary(self) -> str:
+        lectures = sum(len(s["lectures"]) for s in self.data["sections"])
+        text = (f"{len(self.data['sections'])} sections / {lectures} lectures "
+                f"(JSON: {self.json_status}, Markdown sections: {self.markdown_sections})")
+        if self.missing:
+            text += f"; missing {len(self.missing)} fields: {', '.join(self.missing[:8])}"
+            if len(self.missing) > 8:
+                text += ", ..."
+        return text
+
+
+def extract_curriculum(text: str) -> CurriculumExtraction:
+    candidate = _json_candidate(text)
+    data, repaired = repair_json(candidate) if candidate else (None, False)
+    if not isinstance(data, dict):
+        data = None
+    json_status = "none" if data is None else ("repaired" if repaired else "complete")
+
+    markdown = parse_outline_markdown(text)
+    if data and data.get("sections"):
+        merged = merge_curriculum(data, markdown)
+    else:
+        merged = merge_curriculum(markdown, data or {})
+    return CurriculumExtraction(merged, json_status, len(markdown["sections"]))
+
+
+# --- Targeted follow-up ---
+
+def build_followup_messages(data: dict, missing: List[str], course_context: str = "") -> list:
+    """A prompt that asks only for the missing fields, keyed by their paths"""
+    outline = []
+    for s, section in enumerate(data.get("sections") or []):
+        outline.append(f"sections[{s}]: {section.get('title') or '?'}")
+        for l, lecture in enumerate(section.get("lectures") or []):
+            outline.append(f"  sections[{s}].lectures[{l}]: {lecture.get('title') or '?'}")
+
+    wanted = []
+    for path in missing:
+        if path.endswith(".lectures") or path == "sections":
+            wanted.append(f'"{path}": a JSON list of {{"title", "objective", "activity"}} objects')
+        else:
+            wanted.append(f'"{path}": a string')
+
+    return [
+        {"role": "system", "content": "You complete partially extracted course curricula. Reply with JSON only."},
+        {"role": "user", "content": (
+            f"{course_context}\n\nCurriculum outline so far:\n" + "\n".join(outline) +
+            "\n\nProvide ONLY these missing fields as one JSON object keyed by path:\n" + "\n".join(wanted)
+        )},
+    ]
+
+
+def apply_followup(data: dict, response: str) -> dict:
+    """Write the values of a follow-up response into data at their paths"""
+    candidate = _json_candidate(response) or response
+    patch, _ = repair_json(candidate)
+    if not isinstance(patch, dict):
+        return data
+
+    for path, value in patch.items():
+        parts = re.findall(r"(\w+)(?:\[(\d+)\])?", path)
+        target = data
+        try:
+            for depth, (name, index) in enumerate(parts):
+                last = depth == len(parts) - 1
+                if last and not index:
+                    if name == "lectures" and isinstance(value, list):
+                        value = [{f: str(lec.get(f, "")).strip() for f in LECTURE_FIELDS} for lec in value]
+                        for lecture in value:
+                            lecture["title"] = clean_title(lecture["title"])
+                    elif name == "sections" and isinstance(value, list):
+                        value = [{"title": clean_title(str(sec.get("title", ""))),
+                                  "lectures": sec.get("lectures") or []} for sec in value]
+                    elif name == "title":
+                        value = clean_title(str(value))
+                    else:
+                        value = str(value).strip()
+                    target[name] = value
+                else:
+                    target = target[name][int(index)] if index else target[name]
+        except (KeyError, IndexError, TypeError, ValueError):
+            continue  # a path the model made up
+    return data
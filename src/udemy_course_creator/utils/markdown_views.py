@@ -0,0 +1,46 @@
+"""
+Markdown views rendered locally from the crews' structured (output_pydantic) results,
+so the model only generates the data once and never has to write the Markdown itself.
+"""
+from typing import Tuple, Union
+
+from models.curriculum_model import Curriculum
+from models.slide_deck_model import SlideDeck
+from utils.curriculum_extractor import clean_title
+
+
+def curriculum_to_markdown(curriculum: Curriculum) -> str:
+    """The course outline in the layout CourseDesignCrew used to write by hand"""
+    lines = [f"# {curriculum.title}", ""]
+    for s, section in enumerate(curriculum.sections, start=1):
+        lines += [f"## Section {s}: {clean_title(section.title)}", ""]
+        for l, lecture in enumerate(section.lectures, start=1):
+            lines += [
+                f"### Lecture {s}.{l}: {clean_title(lecture.title)}",
+                f"- Objective: {lecture.objective}",
+                f"- Activity: {lecture.activity}",
+                "",
+            ]
+    return "\n".join(lines).rstrip() + "\n"
+
+
+def slide_deck_to_markdown(deck: SlideDeck) -> str:
+    """Numbered Markdown slides separated by '---', as read by convert_md_to_pptx"""
+    slides = []
+    for number, slide in enumerate(deck.slides, start=1):
+        lines = [f"# [Slide {number}] {slide.title}"]
+        lines += [f"- {bullet}" for bullet in slide.bullets]
+        if slide.code.strip():
+            lines += ["", f"```{slide.language}", slide.code.rstrip(), "```"]
+        slides.append("\n".join(lines))
+    return "\n\n---\n\n".join(slides) + "\n"
+
+
+def slides_from_result(result) -> Tuple[str, Union[str, dict]]:
+    """
+    (Markdown, render source) for an AssetGenerationCrew result. The render source is
+    the deck as a dict when the structured output parsed, else the raw Markdown.
+    """
+    if isinstance(result.pydantic, SlideDeck) and result.pydantic.slides:
+        return slide_deck_to_markdown(result.pydantic), result.pydantic.model_dump()
+    return result.raw, result.raw
@@ -1,6 +1,7 @@
 from pptx import Presentation
-from pptx.util import Inches
+from pptx.util import Inches, Pt
 from pathlib import Path
+from guide_creator_flow.utils.markdown_ast import parse_cached, plain
 
 def convert_md_to_pptx(md_content: str, output_path: str):
     """
@@ -13,27 +14,25 @@ def convert_md_to_pptx(md_content: str, output_path: str):
     title_slide_layout = prs.slide_layouts[0]
     content_slide_layout = prs.slide_layouts[5]  # Title and Content
 
-    lines = md_content.split('\n')
     current_title = ""
     current_body = []
 
-    for line in lines:
-        if line.startswith("# ") or line.startswith("## "):
+    for block in parse_cached(md_content).blocks:
+        if block.kind == "heading" and block.level <= 2:
             if current_title:
                 _add_slide(prs, current_title, current_body)
                 current_body = []
 
-            current_title = line.lstrip('# ').strip()
-        elif line.startswith('- ') or line.strip() == "":
-            if line.startswith('- '):
-                item = line.lstrip('- ').strip()
-                current_body.append(item)
-        elif line == "---":
-            continue
-        else:
-            # Handle normal text or headers inside content
-            if line.strip():
-                current_body.append(line.strip())
+            current_title = plain(block.text)
+        elif block.kind == "list":
+            current_body.extend(plain(text) for _, text in block.items)
+        elif block.kind == "code":
+            current_body.extend(line.strip() for line in block.text.splitlines() if line.strip())
+        elif block.kind == "table":
+            current_body.extend(" | ".join(plain(cell) for cell in row) for row in block.items)
+        elif block.kind != "rule":
+            # Normal text, quotes and headers inside content
+            current_body.extend(plain(line).strip() for line in block.text.splitlines() if line.strip())
 
     # Add last slide
     if current_title and current_body:
@@ -61,6 +60,36 @@ def _add_slide(prs, title: str, content: list):
             p.text = point
 
 
+def convert_deck_to_pptx(deck: dict, output_path: str):
+    """
+    Build a PowerPoint deck straight from a SlideDeck (as a dict), so nothing
+    has to be guessed from Markdown. Code goes in a monospace paragraph per line.
+    """
+    prs = Presentation()
+
+    for slide_data in deck["slides"]:
+        if slide_data["type"] == "title":
+            slide = prs.slides.add_slide(prs.slide_layouts[0])
+            slide.shapes.title.text = slide_data["title"]
+            slide.placeholders[1].text = "\n".join(slide_data["bullets"]) or deck["lecture_title"]
+            continue
+
+        slide = prs.slides.add_slide(prs.slide_layouts[1])
+        slide.shapes.title.text = slide_data["title"]
+        tf = slide.placeholders[1].text_frame
+        paragraphs = [(point, False) for point in slide_data["bullets"]]
+        paragraphs += [(line, True) for line in slide_data["code"].rstrip().splitlines()]
+        for i, (text, is_code) in enumerate(paragraphs):
+            p = tf.paragraphs[0] if i == 0 else tf.add_paragraph()
+            p.text = text
+            if is_code:
+                p.font.name = "Courier New"
+                p.font.size = Pt(12)
+
+    prs.save(output_path)
+    print(f"📊 Saved PPTX: {output_path}")
+
+
 if __name__ == "__main__":
     sample_md = """
 # [Slide 1] Title Slide
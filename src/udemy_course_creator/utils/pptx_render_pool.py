@@ -0,0 +1,144 @@
+import argparse
+import asyncio
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Optional, Tuple, Union
+from utils.pptx_converter import convert_deck_to_pptx, convert_md_to_pptx
+
+DEFAULT_RENDER_WORKERS = int(os.getenv("PPTX_RENDER_WORKERS", str(os.cpu_count() or 2)))
+
+
+def render_deck(source: Union[str, dict], output_path: str):
+    """Render Markdown slides, or a structured SlideDeck given as a dict"""
+    if isinstance(source, dict):
+        convert_deck_to_pptx(source, output_path)
+    else:
+        convert_md_to_pptx(source, output_path)
+
+
+def deck_json_path(md_path: str) -> str:
+    """Where the structured deck behind a slides Markdown file is kept"""
+    return os.path.splitext(md_path)[0] + ".deck.json"
+
+
+def save_deck_source(md_path: str, source: Union[str, dict]):
+    """
+    Keep the structured deck next to its Markdown so rerender_tree renders what
+    the flow rendered; a Markdown-only deck removes a stale JSON from an earlier run
+    """
+    json_path = deck_json_path(md_path)
+    if isinstance(source, dict):
+        tmp = f"{json_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(source, f, ensure_ascii=False)
+        os.replace(tmp, json_path)
+    elif os.path.exists(json_path):
+        os.remove(json_path)
+
+
+def load_deck_source(md_path: str) -> Union[str, dict]:
+    """The deck saved by save_deck_source, else the Markdown itself"""
+    json_path = deck_json_path(md_path)
+    if os.path.isfile(json_path):
+        try:
+            with open(json_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable {json_path}: {e}")
+    with open(md_path, "r", encoding="utf-8", errors="replace") as f:
+        return f.read()
+
+
+def _render_job(job: Tuple[Union[str, dict], str]) -> Tuple[str, float]:
+    """Render one (markdown or deck, output path) job; runs inside a worker process"""
+    source, output_path = job
+    start = time.perf_counter()
+    render_deck(source, output_path)
+    return output_path, time.perf_counter() - start
+
+
+class PptxRenderPool:
+    """
+    Process pool for python-pptx deck construction and saving, which is CPU-bound
+    and would otherwise run one deck at a time on the flow thread.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or DEFAULT_RENDER_WORKERS
+        self._executor = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    async def render_async(self, source: Union[str, dict], output_path: str) -> float:
+        """Render a deck from async code; returns the render time in seconds"""
+        loop = asyncio.get_running_loop()
+        _, seconds = await loop.run_in_executor(self.executor, _render_job, (source, output_path))
+        return seconds
+
+    def render_many(self, jobs: List[Tuple[str, str]]) -> List[dict]:
+        """Render many (markdown, output path) jobs in parallel and return per-deck timings"""
+        results = []
+        futures = {self.executor.submit(_render_job, job): job[1] for job in jobs}
+        for future in as_completed(futures):
+            output_path = futures[future]
+            try:
+                _, seconds = future.result()
+                results.append({"path": output_path, "seconds": seconds, "error": None})
+            except Exception as e:
+                results.append({"path": output_path, "seconds": 0.0, "error": str(e)})
+        return results
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+def rerender_tree(root: str = os.path.join("output", "slides"), max_workers: Optional[int] = None) -> List[dict]:
+    """
+    Re-render every slides Markdown file under root to a sibling .pptx, without any
+    LLM calls; from the saved structured deck when there is one, like the flow does
+    """
+    md_paths = sorted(glob.glob(os.path.join(root, "**", "*.md"), recursive=True))
+    if not md_paths:
+        print(f"⚠️ No slide Markdown files found under {root}")
+        return []
+
+    jobs = [(load_deck_source(md_path), os.path.splitext(md_path)[0] + ".pptx") for md_path in md_paths]
+
+    pool = PptxRenderPool(max_workers)
+    print(f"🖨️ Rendering {len(jobs)} decks with {pool.max_workers} workers...")
+    start = time.perf_counter()
+    try:
+        results = pool.render_many(jobs)
+    finally:
+        pool.shutdown()
+    elapsed = time.perf_counter() - start
+
+    for result in sorted(results, key=lambda r: r["path"]):
+        if result["error"]:
+            print(f"❌ {result['path']}: {result['error']}")
+        else:
+            print(f"📊 {result['seconds'] * 1000:8.1f} ms  {result['path']}")
+
+    rendered = [r for r in results if not r["error"]]
+    cpu_total = sum(r["seconds"] for r in rendered)
+    print(f"✅ Rendered {len(rendered)}/{len(results)} decks in {elapsed:.2f}s wall "
+          f"({cpu_total:.2f}s summed render time)")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-render all slide decks from their saved deck data or Markdown")
+    parser.add_argument("root", nargs="?", default=os.path.join("output", "slides"),
+                        help="Directory containing <section>/<lecture>.md slide files")
+    parser.add_argument("--workers", type=int, default=None, help="Number of render processes")
+    args = parser.parse_args()
+    rerender_tree(args.root, args.workers)
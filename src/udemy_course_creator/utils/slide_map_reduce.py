@@ -0,0 +1,170 @@
+"""
+Slide generation for one lecture, in one call or map-reduce.
+
+Short lectures go to AssetGenerationCrew in one prompt. Long lectures are split
+into heading-aligned chunks, SlideFragmentCrew turns each chunk into a few
+slides in parallel (map), and the fragments are merged locally (reduce):
+one title slide, the body slides in lecture order with duplicates folded
+together, and one summary slide with the takeaways of every chunk. Latency then
+follows the chunk size instead of the lecture size, and no single response has
+to fit the whole deck into max_tokens.
+"""
+import asyncio
+import os
+import re
+from typing import List, Tuple, Union
+
+from crews.asset_generation_crew.asset_generation_crew import AssetGenerationCrew, SlideFragmentCrew
+from models.slide_deck_model import Slide, SlideDeck
+from utils.markdown_views import slide_deck_to_markdown, slides_from_result
+from guide_creator_flow.utils.context_store import estimate_tokens
+from guide_creator_flow.utils.crew_factory import build_crew
+from guide_creator_flow.utils.markdown_ast import parse_cached
+from guide_creator_flow.utils.tracing import span, trace_crew_tasks
+
+# Lectures longer than this (estimated tokens) are map-reduced; 0 turns map-reduce off
+SLIDE_MAP_REDUCE_MIN_TOKENS = int(os.getenv("SLIDE_MAP_REDUCE_MIN_TOKENS", "2000"))
+# Target size of one chunk; larger heading sections are cut between blocks
+SLIDE_CHUNK_TOKENS = int(os.getenv("SLIDE_CHUNK_TOKENS", "1000"))
+# Chunks of one lecture sent at the same time
+SLIDE_MAP_CONCURRENCY = int(os.getenv("SLIDE_MAP_CONCURRENCY", "4"))
+MAX_SLIDE_BULLETS = 6
+MAX_SUMMARY_BULLETS = 6
+
+
+def map_reduce_settings() -> dict:
+    """The settings that change the deck produced for a lecture (part of its fingerprint)"""
+    return {"min_tokens": SLIDE_MAP_REDUCE_MIN_TOKENS, "chunk_tokens": SLIDE_CHUNK_TOKENS}
+
+
+def _units(document, chunk_tokens: int):
+    """(source, starts a level-1/2 section) per heading section; oversized ones are cut between blocks"""
+    for section in document.sections(3):
+        start = section.heading.start if section.heading is not None else section.start
+        source = document.source(start, section.end).strip()
+        if not source:
+            continue
+        major = section.heading is not None and section.heading.level <= 2
+        if estimate_tokens(source) <= chunk_tokens or not section.blocks:
+            yield source, major
+            continue
+        # Whole blocks only, so code and lists are never split
+        piece_start = start
+        for block in section.blocks:
+            if block.start > piece_start and estimate_tokens(document.source(piece_start, block.end)) > chunk_tokens:
+                yield document.source(piece_start, block.start).strip(), major
+                piece_start, major = block.start, False
+        yield document.source(piece_start, section.end).strip(), major
+
+
+def split_lecture(text: str, chunk_tokens: int = SLIDE_CHUNK_TOKENS) -> List[str]:
+    """Pack consecutive heading sections (level 3 and up) into chunks of about chunk_tokens"""
+    document = parse_cached(text)
+    chunks, current, current_tokens = [], [], 0
+    for source, major in _units(document, chunk_tokens):
+        tokens = estimate_tokens(source)
+        # A new level-1/2 section starts a new chunk once the current one is half full
+        if current and (current_tokens + tokens > chunk_tokens or (major and current_tokens >= chunk_tokens // 2)):
+            chunks.append("\n\n".join(current))
+            current, current_tokens = [], 0
+        current.append(source)
+        current_tokens += tokens
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", " ", text.lower()).strip()
+
+
+def reduce_fragments(lecture_title: str, lecture_objective: str, fragments: List[SlideDeck]) -> SlideDeck:
+    """
+    Merge chunk decks into one: a title slide, body slides in chunk order with
+    slides of the same title (and code) folded together, and one summary slide.
+    """
+    body: List[Slide] = []
+    by_key = {}
+    takeaways, seen_takeaways = [], set()
+
+    for fragment in fragments:
+        for slide in fragment.slides:
+            if slide.type == "title":
+                continue
+            if slide.type == "summary":
+                for bullet in slide.bullets:
+                    if _normalize(bullet) not in seen_takeaways:
+                        seen_takeaways.add(_normalize(bullet))
+                        takeaways.append(bullet)
+                continue
+
+            key = (_normalize(slide.title), _normalize(slide.code))
+            existing = by_key.get(key)
+            if existing is None:
+                slide = slide.model_copy(update={"bullets": list(slide.bullets)})
+                by_key[key] = slide
+                body.append(slide)
+                continue
+            # The same slide from another chunk: keep only the points it adds
+            known = {_normalize(bullet) for bullet in existing.bullets}
+            fresh = [bullet for bullet in slide.bullets if _normalize(bullet) not in known]
+            room = max(0, MAX_SLIDE_BULLETS - len(existing.bullets))
+            existing.bullets.extend(fresh[:room])
+            if fresh[room:]:
+                continued = slide.model_copy(update={"title": f"{slide.title} (cont.)", "bullets": fresh[room:]})
+                by_key[key] = continued
+                body.append(continued)
+
+    if not takeaways:
+        takeaways = [slide.title for slide in body if slide.type == "concept"]
+
+    title = Slide(type="title", title=lecture_title, bullets=[lecture_objective] if lecture_objective else [],
+                  code="", language="")
+    summary = Slide(type="summary", title="Key Takeaways", bullets=takeaways[:MAX_SUMMARY_BULLETS],
+                    code="", language="")
+    return SlideDeck(lecture_title=lecture_title, slides=[title, *body, summary])
+
+
+async def _map_chunks(slide_inputs: dict, chunks: List[str]) -> List[SlideDeck]:
+    semaphore = asyncio.Semaphore(max(1, SLIDE_MAP_CONCURRENCY))
+
+    async def run(index: int, chunk: str):
+        async with semaphore:
+            with span("slides.map", lecture=slide_inputs["lecture_title"], chunk=index):
+                crew = trace_crew_tasks(build_crew(SlideFragmentCrew), "slides.map", ["generate"])
+                result = await crew.kickoff_async(inputs={
+                    **slide_inputs,
+                    "chunk_content": chunk,
+                    "chunk_number": index + 1,
+                    "chunk_count": len(chunks),
+                })
+        if isinstance(result.pydantic, SlideDeck) and result.pydantic.slides:
+            return result.pydantic
+        print(f"⚠️ Chunk {index + 1}/{len(chunks)} of '{slide_inputs['lecture_title']}' returned no slides")
+        return None
+
+    fragments = await asyncio.gather(*(run(i, chunk) for i, chunk in enumerate(chunks)))
+    return [fragment for fragment in fragments if fragment is not None]
+
+
+async def generate_slides(slide_inputs: dict, lecture_content: str) -> Tuple[str, Union[str, dict]]:
+    """(Markdown, render source) of the slides for one lecture, see slides_from_result"""
+    tokens = estimate_tokens(lecture_content)
+    chunks = []
+    if SLIDE_MAP_REDUCE_MIN_TOKENS and tokens > SLIDE_MAP_REDUCE_MIN_TOKENS:
+        chunks = split_lecture(lecture_content, SLIDE_CHUNK_TOKENS)
+
+    if len(chunks) > 1:
+        print(f"🧩 Map-reducing slides for '{slide_inputs['lecture_title']}': "
+              f"{len(chunks)} chunks from ~{tokens} tokens")
+        fragments = await _map_chunks(slide_inputs, chunks)
+        if fragments:
+            with span("slides.reduce", lecture=slide_inputs["lecture_title"], fragments=len(fragments)):
+                deck = reduce_fragments(slide_inputs["lecture_title"], slide_inputs.get("lecture_objective", ""),
+                                        fragments)
+            return slide_deck_to_markdown(deck), deck.model_dump()
+        print(f"⚠️ No chunk produced slides; generating '{slide_inputs['lecture_title']}' in one call")
+
+    crew = trace_crew_tasks(build_crew(AssetGenerationCrew), "slides", ["generate"])
+    result = await crew.kickoff_async(inputs={**slide_inputs, "lecture_content": lecture_content})
+    return slides_from_result(result)
@@ -1,15 +1,22 @@
 import yaml
+from functools import lru_cache
 from pathlib import Path
 
 
+@lru_cache(maxsize=None)
+def load_slide_templates(template_path: str = "templates/slide_templates.yaml") -> dict:
+    """Parse the slide template YAML once per process"""
+    path = Path(template_path)
+    if not path.exists():
+        raise FileNotFoundError(f"Slide templates not found at {path}")
+
+    with open(path, "r") as f:
+        return yaml.safe_load(f)
+
+
 class SlideTemplateRenderer:
     def __init__(self):
-        template_path = Path("templates/slide_templates.yaml")
-        if not template_path.exists():
-            raise FileNotFoundError(f"Slide templates not found at {template_path}")
-
-        with open(template_path, "r") as f:
-            self.templates = yaml.safe_load(f)
+        self.templates = load_slide_templates()
 
     def render_title_slide(self, course_title: str, lecture_title: str, audience_level: str, slide_number: int):
         return self.templates["title_slide"].format(
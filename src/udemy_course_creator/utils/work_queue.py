@@ -0,0 +1,261 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Iterable, List, Optional
+
+DEFAULT_LEASE_SECONDS = float(os.getenv("WORK_QUEUE_LEASE_SECONDS", "120"))
+DEFAULT_MAX_ATTEMPTS = int(os.getenv("WORK_QUEUE_MAX_ATTEMPTS", "3"))
+# WAL needs shared memory between processes on one host; use DELETE on network volumes
+JOURNAL_MODE = os.getenv("WORK_QUEUE_JOURNAL", "WAL")
+
+# Lecture pipeline: finish decks for written lectures before starting new lectures
+SLIDES_PRIORITY = 1
+
+
+def slides_key(lecture_key: str) -> str:
+    return f"slides:{lecture_key}"
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+class WorkQueue:
+    """
+    SQLite-backed task queue shared by the course flow and lecture workers.
+    Workers claim a task with a time-limited lease and keep it alive with
+    heartbeats; a task whose lease runs out (crashed or hung worker) is handed
+    to the next worker, up to max_attempts times.
+    """
+
+    def __init__(self, path: str, lease_seconds: float = DEFAULT_LEASE_SECONDS,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                id TEXT PRIMARY KEY,
+                key TEXT UNIQUE NOT NULL,
+                kind TEXT NOT NULL,
+                priority INTEGER NOT NULL DEFAULT 0,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                lease_owner TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                result TEXT,
+                error TEXT,
+                created REAL NOT NULL,
+                updated REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_claim ON tasks(status, kind, priority, created)")
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread (the heartbeat thread gets its own)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute(f"PRAGMA journal_mode={JOURNAL_MODE}")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """Write transaction that takes the database lock up front, so claims never race"""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _task(row) -> Optional[dict]:
+        if row is None:
+            return None
+        task = dict(row)
+        task["payload"] = json.loads(task["payload"])
+        task["result"] = json.loads(task["result"]) if task["result"] else None
+        return task
+
+    # --- Producer side ---
+
+    def enqueue(self, kind: str, key: str, payload: dict, priority: int = 0) -> str:
+        """
+        Queue a task under a unique key. Re-enqueueing a finished or failed key
+        resets it; a key that is queued or leased right now is left alone.
+        """
+        with self._transaction() as conn:
+            return self._enqueue(conn, kind, key, payload, priority)
+
+    @staticmethod
+    def _enqueue(conn: sqlite3.Connection, kind: str, key: str, payload: dict, priority: int) -> str:
+        now = time.time()
+        row = conn.execute("SELECT id, status FROM tasks WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            task_id = uuid.uuid4().hex[:12]
+            conn.execute(
+                "INSERT INTO tasks (id, key, kind, priority, payload, status, created, updated) "
+                "VALUES (?, ?, ?, ?, ?, 'queued', ?, ?)",
+                (task_id, key, kind, priority, json.dumps(payload), now, now),
+            )
+            return task_id
+        if row["status"] in ("done", "failed"):
+            conn.execute(
+                "UPDATE tasks SET kind = ?, priority = ?, payload = ?, status = 'queued', lease_owner = NULL, "
+                "lease_expires = NULL, attempts = 0, result = NULL, error = NULL, updated = ? WHERE id = ?",
+                (kind, priority, json.dumps(payload), now, row["id"]),
+            )
+        return row["id"]
+
+    def get(self, key: str) -> Optional[dict]:
+        return self._task(self._conn().execute("SELECT * FROM tasks WHERE key = ?", (key,)).fetchone())
+
+    def get_many(self, keys: Iterable[str]) -> dict:
+        keys = list(keys)
+        tasks = {}
+        # Stay well below SQLite's bound-parameter limit
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            rows = self._conn().execute(
+                f"SELECT * FROM tasks WHERE key IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall()
+            tasks.update({row["key"]: self._task(row) for row in rows})
+        return tasks
+
+    def counts(self) -> dict:
+        rows = self._conn().execute("SELECT kind, status, COUNT(*) FROM tasks GROUP BY kind, status").fetchall()
+        counts = {}
+        for kind, status, count in rows:
+            counts.setdefault(kind, {})[status] = count
+        return counts
+
+    def abandon(self, keys: Iterable[str], error: str) -> int:
+        """
+        Mark queued or leased tasks failed, e.g. when the producer gives up on them.
+        A worker still running one finds its lease gone and drops the result.
+        """
+        keys = list(keys)
+        changed = 0
+        with self._transaction() as conn:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                cursor = conn.execute(
+                    "UPDATE tasks SET status = 'failed', lease_owner = NULL, error = ?, updated = ? "
+                    f"WHERE status IN ('queued', 'leased') AND key IN ({','.join('?' * len(chunk))})",
+                    [error, time.time()] + chunk,
+                )
+                changed += cursor.rowcount
+        return changed
+
+    # --- Worker side ---
+
+    def claim(self, worker_id: str, kinds: Optional[List[str]] = None) -> Optional[dict]:
+        """Lease the next queued task (or one whose lease expired), highest priority first"""
+        now = time.time()
+        kind_filter, params = "", [now]
+        if kinds:
+            kind_filter = f"AND kind IN ({','.join('?' * len(kinds))})"
+            params += list(kinds)
+
+        with self._transaction() as conn:
+            while True:
+                row = conn.execute(
+                    "SELECT * FROM tasks WHERE (status = 'queued' OR (status = 'leased' AND lease_expires < ?)) "
+                    f"{kind_filter} ORDER BY priority DESC, created LIMIT 1",
+                    params,
+                ).fetchone()
+                if row is None:
+                    return None
+                if row["attempts"] >= self.max_attempts:
+                    # Its workers kept dying or hanging; stop handing it out
+                    conn.execute(
+                        "UPDATE tasks SET status = 'failed', lease_owner = NULL, updated = ?, "
+                        "error = COALESCE(error, 'lease expired too many times') WHERE id = ?",
+                        (now, row["id"]),
+                    )
+                    continue
+                conn.execute(
+                    "UPDATE tasks SET status = 'leased', lease_owner = ?, lease_expires = ?, "
+                    "attempts = attempts + 1, updated = ? WHERE id = ?",
+                    (worker_id, now + self.lease_seconds, now, row["id"]),
+                )
+                return self._task(conn.execute("SELECT * FROM tasks WHERE id = ?", (row["id"],)).fetchone())
+
+    def _update_owned(self, task_id: str, worker_id: str, sql: str, params: tuple) -> bool:
+        with self._transaction() as conn:
+            return self._set_owned(conn, task_id, worker_id, sql, params)
+
+    @staticmethod
+    def _set_owned(conn: sqlite3.Connection, task_id: str, worker_id: str, sql: str, params: tuple) -> bool:
+        cursor = conn.execute(
+            f"UPDATE tasks SET {sql}, updated = ? WHERE id = ? AND lease_owner = ? AND status = 'leased'",
+            params + (time.time(), task_id, worker_id),
+        )
+        return cursor.rowcount == 1
+
+    def heartbeat(self, task_id: str, worker_id: str) -> bool:
+        """Extend the lease; False means the lease was lost"""
+        return self._update_owned(task_id, worker_id, "lease_expires = ?", (time.time() + self.lease_seconds,))
+
+    def complete(self, task_id: str, worker_id: str, result: Optional[dict] = None,
+                 follow_ups: Iterable[tuple] = ()) -> bool:
+        """
+        Mark the task done. follow_ups are (kind, key, payload, priority) tasks queued in
+        the same transaction, so they exist only if this worker still held the lease.
+        """
+        with self._transaction() as conn:
+            if not self._set_owned(conn, task_id, worker_id, "status = 'done', lease_owner = NULL, result = ?",
+                                   (json.dumps(result or {}),)):
+                return False
+            for kind, key, payload, priority in follow_ups:
+                self._enqueue(conn, kind, key, payload, priority)
+            return True
+
+    def fail(self, task_id: str, worker_id: str, error: str) -> bool:
+        """Put the task back for another attempt, or mark it failed once attempts are used up"""
+        return self._update_owned(
+            task_id, worker_id,
+            "status = CASE WHEN attempts < ? THEN 'queued' ELSE 'failed' END, lease_owner = NULL, error = ?",
+            (self.max_attempts, error),
+        )
+
+    @contextmanager
+    def lease(self, task: dict, worker_id: str):
+        """
+        Keep a claimed task's lease alive from a background thread while the body runs.
+        Yields an Event that is set if the lease was lost.
+        """
+        lost = threading.Event()
+        stop = threading.Event()
+
+        def beat():
+            while not stop.wait(self.lease_seconds / 3):
+                if not self.heartbeat(task["id"], worker_id):
+                    lost.set()
+                    return
+
+        thread = threading.Thread(target=beat, name=f"heartbeat-{task['id']}", daemon=True)
+        thread.start()
+        try:
+            yield lost
+        finally:
+            stop.set()
+            thread.join()
@@ -0,0 +1,10 @@
+import os
+import sys
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+# The guide helpers import as guide_creator_flow.utils.*; the course modules use the
+# bare utils.* / models.* imports rooted at src/udemy_course_creator
+for path in (SRC, os.path.join(SRC, "udemy_course_creator")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
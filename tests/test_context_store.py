@@ -0,0 +1,49 @@
+import pytest
+
+from guide_creator_flow.utils.context_store import SectionContextStore, estimate_tokens
+
+
+def _section(n: int) -> str:
+    paragraphs = [f"Paragraph {i} of section {n} explains one idea in detail. " + "More words follow. " * 20
+                  for i in range(6)]
+    return f"# Section {n}\n\n" + "\n\n".join(paragraphs)
+
+
+def _store(count: int, token_budget: int) -> tuple:
+    store = SectionContextStore(token_budget=token_budget)
+    titles = [f"Section {n}" for n in range(count)]
+    for title, n in zip(titles, range(count)):
+        store.add(title, _section(n))
+    return store, titles
+
+
+@pytest.mark.parametrize("token_budget", [40, 80, 150, 400, 1500])
+def test_context_stays_within_budget(token_budget):
+    store, titles = _store(12, token_budget)
+    context = store.build(titles + ["Next"], exclude="Next")
+    assert estimate_tokens(context) <= token_budget
+
+
+def test_newest_sections_keep_their_digests_and_older_ones_are_listed():
+    store, titles = _store(12, 400)
+    context = store.build(titles)
+    assert "## Section 11\n" in context
+    assert "## Section 0\n" not in context
+    assert "Also covered earlier: Section 0;" in context
+
+
+def test_excluded_and_unfinished_sections_are_left_out():
+    store, titles = _store(3, 1500)
+    context = store.build(titles + ["Unwritten"], exclude="Section 2")
+    assert "Section 2" not in context
+    assert "Unwritten" not in context
+    assert store.build(["Unwritten"]) == ""
+
+
+def test_stats_count_tokens_saved():
+    store, titles = _store(12, 200)
+    context = store.build(titles)
+    stats = store.stats()
+    assert stats["builds"] == 1
+    assert stats["tokens_sent"] == estimate_tokens(context)
+    assert stats["tokens_saved"] == stats["tokens_full"] - stats["tokens_sent"] > 0
@@ -0,0 +1,50 @@
+import pytest
+
+pytest.importorskip("pydantic")
+
+from utils.curriculum_extractor import clean_title, repair_json  # noqa: E402
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("Section 1: Getting Started", "Getting Started"),
+    ("**Lecture 1.2: Variables**", "Variables"),
+    ("Module 3 - Deployment", "Deployment"),
+    ("lesson 4. Wrap-up", "Wrap-up"),
+    ("1. Introduction", "Introduction"),
+    ("1.2 Lists and Tuples", "Lists and Tuples"),
+    ("2.3.1: Edge Cases", "Edge Cases"),
+    ("## Course Title: Python Basics", "Python Basics"),
+    ("2024 Trends", "2024 Trends"),
+    ("10 Tips for Faster Python", "10 Tips for Faster Python"),
+    ("3D Printing Basics", "3D Printing Basics"),
+    ("1.5x Speedups", "1.5x Speedups"),
+    ("Python 3.12 Features", "Python 3.12 Features"),
+])
+def test_clean_title(raw, expected):
+    assert clean_title(raw) == expected
+
+
+def test_repair_json_leaves_valid_json_alone():
+    assert repair_json('{"title": "C", "sections": []}') == ({"title": "C", "sections": []}, False)
+
+
+def test_repair_json_closes_truncated_containers():
+    data, repaired = repair_json('{"title": "C", "sections": [{"title": "S1", "lectures": [{"title": "L1"}')
+    assert repaired
+    assert data == {"title": "C", "sections": [{"title": "S1", "lectures": [{"title": "L1"}]}]}
+
+
+def test_repair_json_drops_a_value_cut_off_mid_string():
+    data, repaired = repair_json('{"title": "C", "sections": [{"title": "S1"}, {"title": "S2", "lectures": [{"tit')
+    assert repaired
+    assert data == {"title": "C", "sections": [{"title": "S1"}, {"title": "S2", "lectures": [{}]}]}
+
+
+def test_repair_json_handles_trailing_commas_and_escaped_quotes():
+    data, repaired = repair_json('{"title": "The \\"Best\\" Course", "sections": [1, 2,],}')
+    assert repaired
+    assert data == {"title": 'The "Best" Course', "sections": [1, 2]}
+
+
+def test_repair_json_gives_up_on_text_without_json():
+    assert repair_json("no json here") == (None, True)
@@ -0,0 +1,26 @@
+import pytest
+
+from guide_creator_flow.utils.tracing import _percentile
+
+
+@pytest.mark.parametrize("count, pct, expected", [
+    (1, 50, 1),
+    (2, 50, 1),
+    (4, 50, 2),
+    (5, 50, 3),
+    (10, 50, 5),
+    (2, 95, 2),
+    (10, 95, 10),
+    (20, 95, 19),
+    (21, 95, 20),
+    (100, 95, 95),
+    (100, 99, 99),
+])
+def test_percentile_is_nearest_rank(count, pct, expected):
+    assert _percentile(list(range(1, count + 1)), pct) == expected
+
+
+def test_percentile_sorts_its_input():
+    assert _percentile([3.0, 1.0, 2.0], 50) == 2.0
+    assert _percentile([3.0, 1.0, 2.0], 100) == 3.0
+    assert _percentile([3.0, 1.0, 2.0], 0) == 1.0
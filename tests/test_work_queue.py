@@ -0,0 +1,16 @@
+from utils.work_queue import WorkQueue, slides_key
+
+
+def test_follow_ups_are_queued_only_by_the_lease_owner(tmp_path):
+    queue = WorkQueue(str(tmp_path / "queue.sqlite"))
+    queue.enqueue("lecture", "S1/L1", {"key": "S1/L1"})
+    task = queue.claim("w1")
+    follow_ups = [("slides", slides_key("S1/L1"), task["payload"], 10)]
+
+    assert not queue.complete(task["id"], "w2", {}, follow_ups)
+    assert queue.get(slides_key("S1/L1")) is None
+
+    assert queue.complete(task["id"], "w1", {"lecture_path": "L1.md"}, follow_ups)
+    assert queue.get("S1/L1")["status"] == "done"
+    assert queue.get(slides_key("S1/L1"))["status"] == "queued"
+    assert not queue.complete(task["id"], "w1", {})